@@ -0,0 +1,20 @@
+"""
+Trading account identifiers.
+
+One backend process serves several Kite accounts. Each account has its own
+credentials, session, rate budgets and ticker connection; requests select
+an account with the `X-Account-Id` header (or `account` query parameter for
+WebSockets). Requests without one use the default account.
+"""
+import re
+
+DEFAULT_ACCOUNT = "default"
+
+ACCOUNT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+def validate_account_id(account_id: str) -> str:
+    """Return `account_id` if it is safe to use in file names, else raise ValueError."""
+    if not ACCOUNT_ID_PATTERN.match(account_id or ""):
+        raise ValueError("Invalid account id (1-32 letters, digits, '-' or '_')")
+    return account_id
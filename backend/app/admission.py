@@ -0,0 +1,211 @@
+"""
+Admission control per route class.
+
+Every HTTP request that talks to Kite is classified by method and path:
+
+- orders     order placement, modification, cancellation, conditional orders
+- quotes     LTP, full quote, depth
+- candles    historical candles and stored history
+- portfolio  holdings, positions, margins, order book reads
+- session    vault, session, config and login
+
+Each class admits at most `limit` requests at a time. Requests over the
+limit wait up to `queue_timeout` seconds (at most `limit` of them) for a
+slot, then get an immediate `503` with `Retry-After` instead of piling up
+threads and memory. Across all classes at most ADMISSION_TOTAL requests are
+in flight, and the last ADMISSION_ORDER_RESERVE of those slots are only
+given to orders, so a polling storm can never crowd out order placement.
+
+Limits are set per class with `ADMISSION_<CLASS>=limit[:queue_timeout]`
+(e.g. `ADMISSION_CANDLES=8:0.5`). Routes outside these classes (metrics,
+WebSocket, health, alerts) are not limited.
+
+All bookkeeping happens on the event loop, so plain counters suffice.
+"""
+import asyncio
+import logging
+import math
+import os
+from collections import deque
+from typing import Dict, Optional
+from fastapi.responses import JSONResponse
+from app.observability.metrics import admission_rejected
+from app.observability.prometheus import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# class -> (concurrent requests, seconds a request may wait for a slot)
+DEFAULT_LIMITS = {
+    "orders": (32, 2.0),
+    "quotes": (64, 0.5),
+    "candles": (16, 1.0),
+    "portfolio": (16, 1.0),
+    "session": (8, 2.0),
+}
+ADMISSION_TOTAL = int(os.getenv("ADMISSION_TOTAL") or 128)
+ADMISSION_ORDER_RESERVE = int(os.getenv("ADMISSION_ORDER_RESERVE") or 16)
+
+_ORDER_WRITES = ("/api/kite/order", "/api/kite/conditional-orders")
+# Path prefix -> class, checked in order
+_PREFIX_CLASSES = (
+    ("/api/kite/login", "session"),
+    ("/api/kite/", "portfolio"),  # positions, margins, order book (writes matched above)
+    ("/portfolio/", "portfolio"),
+    ("/candles/", "candles"),
+    ("/api/history", "candles"),
+    ("/ltp/", "quotes"),
+    ("/quote/", "quotes"),
+    ("/depth/", "quotes"),
+    ("/api/vault", "session"),
+    ("/api/session", "session"),
+    ("/config", "session"),  # POST /config rewrites API credentials
+)
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None if it is not admission-controlled."""
+    if method != "GET" and path.startswith(_ORDER_WRITES) and not path.endswith("/validate"):
+        return "orders"
+    for prefix, route_class in _PREFIX_CLASSES:
+        if path.startswith(prefix):
+            return route_class
+    return None
+
+
+def _parse_limit(name: str, default: tuple) -> tuple:
+    value = os.getenv(f"ADMISSION_{name.upper()}")
+    if not value:
+        return default
+    try:
+        limit, _, timeout = value.partition(":")
+        return int(limit), float(timeout) if timeout else default[1]
+    except ValueError:
+        logger.warning(f"Ignoring invalid ADMISSION_{name.upper()}={value!r}")
+        return default
+
+
+class RouteClass:
+    def __init__(self, name: str, limit: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiters: deque = deque()
+
+    def info(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+        }
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, tuple], total: int, order_reserve: int):
+        self.classes = {name: RouteClass(name, *limit) for name, limit in limits.items()}
+        self.total = total
+        self.order_reserve = order_reserve
+        self.in_flight = 0
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        if route_class.in_flight >= route_class.limit:
+            return False
+        shared = self.total if route_class.name == "orders" else self.total - self.order_reserve
+        return self.in_flight < shared
+
+    def _take(self, route_class: RouteClass):
+        route_class.in_flight += 1
+        self.in_flight += 1
+
+    async def acquire(self, route_class: RouteClass) -> bool:
+        """Take a slot, waiting up to the class queue timeout; False = shed."""
+        if not route_class.waiters and self._has_room(route_class):
+            self._take(route_class)
+            return True
+        if route_class.queue_timeout <= 0 or len(route_class.waiters) >= route_class.limit:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        # release() takes the slot on our behalf before resolving the future
+        granted = lambda: waiter.done() and not waiter.cancelled()
+        try:
+            await asyncio.wait_for(waiter, route_class.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return granted()  # Granted just as the timeout fired
+        except asyncio.CancelledError:
+            if granted():
+                self.release(route_class)  # Client went away after being admitted
+            raise
+        finally:
+            if waiter in route_class.waiters:
+                route_class.waiters.remove(waiter)
+
+    def release(self, route_class: RouteClass):
+        route_class.in_flight -= 1
+        self.in_flight -= 1
+        # Hand freed slots to waiters, orders first
+        for candidate in (self.classes["orders"], route_class, *self.classes.values()):
+            while candidate.waiters and self._has_room(candidate):
+                waiter = candidate.waiters.popleft()
+                if not waiter.done():
+                    self._take(candidate)
+                    waiter.set_result(True)
+
+    def status(self) -> dict:
+        return {
+            "total": self.total,
+            "order_reserve": self.order_reserve,
+            "in_flight": self.in_flight,
+            "classes": {name: route_class.info() for name, route_class in self.classes.items()},
+        }
+
+
+admission = AdmissionController(
+    {name: _parse_limit(name, default) for name, default in DEFAULT_LIMITS.items()},
+    ADMISSION_TOTAL,
+    ADMISSION_ORDER_RESERVE,
+)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying `admission` (holds the slot until the body is sent)."""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        route_class = self.controller.classes[name]
+        if not await self.controller.acquire(route_class):
+            admission_rejected.labels(name).inc()
+            retry_after = max(1, math.ceil(route_class.queue_timeout))
+            response = JSONResponse(
+                {"detail": f"Server busy ({name} requests at capacity); retry in {retry_after}s"},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
+
+
+REGISTRY.callback(
+    "tradexr_admission_requests",
+    "Admission-controlled requests per route class by state (in_flight/queued).",
+    ("route_class", "state"),
+    lambda: {
+        key: value
+        for name, c in admission.classes.items()
+        for key, value in (((name, "in_flight"), c.in_flight), ((name, "queued"), len(c.waiters)))
+    },
+)
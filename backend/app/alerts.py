@@ -0,0 +1,264 @@
+"""
+Tick-driven price alerts.
+
+Alerts are one-shot thresholds on an instrument's last price:
+
+- `above`: fires once the price is at or above the threshold
+- `below`: fires once the price is at or below the threshold
+- `cross`: fires when a tick moves the price through the threshold
+  (either direction) relative to the previous tick
+
+Each account has one `AlertEngine`, registered as a callback on that
+account's ticker. Thresholds are kept per instrument token in sorted lists
+(`PriceTriggers`, also used by app/conditional_orders.py), so a tick costs
+one dict lookup for tokens without alerts and a couple of bisects
+otherwise; only alerts that actually fire are touched. Fired alerts
+are removed from the index, kept in a short history and handed to listeners
+(the /ws/ticks fan-out pushes them to the account's clients).
+
+Alerts live in process memory, so the alert routes are refused when
+workers share a feed (`FEED_SOCKET`): requests and /ws/ticks clients would
+land on workers that do not hold the alert.
+"""
+import itertools
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from app.observability.metrics import alerts_triggered
+from app.observability.prometheus import REGISTRY
+from app.ticker_service import TickerService
+
+logger = logging.getLogger(__name__)
+
+CONDITIONS = ("above", "below", "cross")
+MAX_ALERTS_PER_ACCOUNT = 50000
+# Fired alerts kept for GET /api/alerts
+TRIGGERED_HISTORY = 500
+
+
+class Alert:
+    def __init__(self, alert_id: str, account_id: str, symbol: str, exchange: str,
+                 instrument_token: int, condition: str, price: float, note: Optional[str] = None):
+        self.alert_id = alert_id
+        self.account_id = account_id
+        self.symbol = symbol
+        self.exchange = exchange
+        self.instrument_token = instrument_token
+        self.condition = condition
+        self.price = price
+        self.note = note
+        self.created_at = time.time()
+        self.triggered_at = None
+        self.trigger_price = None
+
+    def info(self) -> dict:
+        return {
+            "alert_id": self.alert_id,
+            "account_id": self.account_id,
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "instrument_token": self.instrument_token,
+            "condition": self.condition,
+            "price": self.price,
+            "note": self.note,
+            "created_at": self.created_at,
+            "triggered_at": self.triggered_at,
+            "trigger_price": self.trigger_price,
+        }
+
+
+class _Thresholds:
+    """Items of one condition, sorted by threshold price (parallel lists)."""
+
+    __slots__ = ("prices", "items")
+
+    def __init__(self):
+        self.prices: List[float] = []
+        self.items: list = []
+
+    def add(self, price: float, item):
+        i = bisect_right(self.prices, price)
+        self.prices.insert(i, price)
+        self.items.insert(i, item)
+
+    def remove(self, price: float, item) -> bool:
+        i = bisect_left(self.prices, price)
+        hi = bisect_right(self.prices, price)
+        for j in range(i, hi):
+            if self.items[j] is item:
+                del self.prices[j]
+                del self.items[j]
+                return True
+        return False
+
+    def pop(self, lo: int, hi: int) -> list:
+        fired = self.items[lo:hi]
+        del self.prices[lo:hi]
+        del self.items[lo:hi]
+        return fired
+
+    def __len__(self):
+        return len(self.prices)
+
+
+class PriceTriggers:
+    """above/below/cross thresholds of one instrument."""
+
+    __slots__ = ("above", "below", "cross", "last_price")
+
+    def __init__(self, last_price: Optional[float] = None):
+        self.above = _Thresholds()
+        self.below = _Thresholds()
+        self.cross = _Thresholds()
+        self.last_price = last_price
+
+    def add(self, condition: str, price: float, item):
+        getattr(self, condition).add(price, item)
+
+    def remove(self, condition: str, price: float, item) -> bool:
+        return getattr(self, condition).remove(price, item)
+
+    def fire(self, price: float) -> list:
+        """Remove and return the items `price` satisfies."""
+        fired = []
+        above = self.above.prices
+        if above and above[0] <= price:
+            fired += self.above.pop(0, bisect_right(above, price))
+        below = self.below.prices
+        if below and below[-1] >= price:
+            fired += self.below.pop(bisect_left(below, price), len(below))
+        cross = self.cross.prices
+        previous = self.last_price
+        if cross and previous is not None and previous != price:
+            if price > previous:  # Thresholds in (previous, price]
+                lo, hi = bisect_right(cross, previous), bisect_right(cross, price)
+            else:  # Thresholds in [price, previous)
+                lo, hi = bisect_left(cross, price), bisect_left(cross, previous)
+            if lo < hi:
+                fired += self.cross.pop(lo, hi)
+        self.last_price = price
+        return fired
+
+    def empty(self) -> bool:
+        return not (self.above or self.below or self.cross)
+
+
+class AlertEngine:
+    """Price alerts of one account, evaluated on its ticker thread."""
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self.alerts: Dict[str, Alert] = {}
+        self.triggered = deque(maxlen=TRIGGERED_HISTORY)
+        self.listeners: List[Callable[[List[dict]], None]] = []
+        self._tokens: Dict[int, PriceTriggers] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.ticker = TickerService(account_id)
+        self.ticker.add_callback(self.on_ticks)
+
+    def add(self, symbol: str, exchange: str, instrument_token: int, condition: str,
+            price: float, note: Optional[str] = None) -> Alert:
+        if condition not in CONDITIONS:
+            raise ValueError(f"condition must be one of {', '.join(CONDITIONS)}")
+        if not price > 0:
+            raise ValueError("price must be positive")
+        if len(self.alerts) >= MAX_ALERTS_PER_ACCOUNT:
+            raise ValueError(f"At most {MAX_ALERTS_PER_ACCOUNT} active alerts per account")
+
+        alert = Alert(f"{int(time.time())}-{next(self._ids)}", self.account_id, symbol, exchange,
+                      int(instrument_token), condition, float(price), note)
+        last_tick = self.ticker.get_last_tick(alert.instrument_token)
+        with self._lock:
+            entry = self._tokens.get(alert.instrument_token)
+            if entry is None:
+                entry = PriceTriggers(last_tick.get("last_price") if last_tick else None)
+                self._tokens[alert.instrument_token] = entry
+            entry.add(condition, alert.price, alert)
+            self.alerts[alert.alert_id] = alert
+        self.ticker.subscribe([alert.instrument_token])
+        return alert
+
+    def remove(self, alert_id: str) -> Optional[Alert]:
+        with self._lock:
+            alert = self.alerts.pop(alert_id, None)
+            if alert is None:
+                return None
+            entry = self._tokens.get(alert.instrument_token)
+            if entry is not None:
+                entry.remove(alert.condition, alert.price, alert)
+                if entry.empty():
+                    del self._tokens[alert.instrument_token]
+        return alert
+
+    def active(self) -> List[dict]:
+        return [alert.info() for alert in list(self.alerts.values())]
+
+    def add_listener(self, listener: Callable[[List[dict]], None]):
+        """Called on the ticker thread with the info dicts of fired alerts."""
+        self.listeners.append(listener)
+
+    def on_ticks(self, ticks):
+        """TickerService callback: fire alerts crossed by this batch."""
+        tokens = self._tokens
+        if not tokens:
+            return
+        fired = None
+        with self._lock:
+            for tick in ticks:
+                token = tick.get("instrument_token")
+                entry = tokens.get(token)
+                if entry is None:
+                    continue
+                price = tick.get("last_price")
+                if price is None:
+                    continue
+                hits = entry.fire(price)
+                if hits:
+                    now = time.time()
+                    for alert in hits:
+                        alert.triggered_at = now
+                        alert.trigger_price = price
+                        del self.alerts[alert.alert_id]
+                    if entry.empty():
+                        del tokens[token]
+                    fired = hits if fired is None else fired + hits
+        if fired is None:
+            return
+
+        alerts_triggered.inc(len(fired))
+        messages = [alert.info() for alert in fired]
+        self.triggered.extend(messages)
+        for alert in messages:
+            logger.info(f"Alert {alert['alert_id']} fired: {alert['symbol']} {alert['condition']} "
+                        f"{alert['price']} at {alert['trigger_price']}")
+        for listener in self.listeners:
+            try:
+                listener(messages)
+            except Exception as e:
+                logger.error(f"Error in alert listener: {e}")
+
+
+_engines: Dict[str, AlertEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def alert_engine_for(account_id: str) -> AlertEngine:
+    engine = _engines.get(account_id)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(account_id)
+            if engine is None:
+                engine = _engines[account_id] = AlertEngine(account_id)
+    return engine
+
+
+REGISTRY.callback(
+    "tradexr_alerts_active",
+    "Active price alerts per account.",
+    ("account",),
+    lambda: {(account,): len(engine.alerts) for account, engine in list(_engines.items())},
+)
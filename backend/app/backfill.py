@@ -0,0 +1,337 @@
+"""
+Chunked historical backfill.
+
+Kite caps the date range of one `historical_data` call by interval (60 days
+of minute candles, 2000 days of daily candles, ...). `fetch_range` splits
+any range into interval-legal chunks, fetches them in parallel under the
+account's historical rate limit and drops the duplicate candles where
+adjacent chunks meet.
+
+Backfill jobs run in the background on their own executor (so a long job
+never queues live `/candles` fetches behind its chunks), report per-chunk
+progress and persist
+candles per (instrument token, interval) as one structured NumPy array file
+under `HISTORY_DIR`, merging with whatever was stored before. Files are
+memory-mapped on read, so `iter_load` and `iter_range` can stream any range
+with bounded memory.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Longest range (days) Kite serves in one historical call, per interval
+MAX_DAYS_PER_REQUEST = {
+    "minute": 60,
+    "3minute": 100,
+    "5minute": 100,
+    "10minute": 100,
+    "15minute": 200,
+    "30minute": 200,
+    "60minute": 400,
+    "day": 2000,
+}
+# Chunk fetches in flight across all backfills, and across live range fetches
+# (the rate limiter paces them)
+BACKFILL_CONCURRENCY = 3
+MAX_CHUNKS_PER_JOB = 200
+MAX_STORED_JOBS = 50
+
+HISTORY_DIR = Path(os.getenv("HISTORY_DIR") or Path(__file__).parent.parent / "data" / "history")
+IST = timezone(timedelta(hours=5, minutes=30))
+_FIELDS = ("open", "high", "low", "close", "volume")
+CANDLE_DTYPE = np.dtype([("date", "<i8")] + [(field, "<f8") for field in _FIELDS])
+# Stored rows converted to dicts per step when streaming
+READ_BATCH = 1000
+
+# Live range fetches (/candles, streaming) and background jobs get separate pools
+_executor = ThreadPoolExecutor(max_workers=BACKFILL_CONCURRENCY, thread_name_prefix="range")
+_job_executor = ThreadPoolExecutor(max_workers=BACKFILL_CONCURRENCY, thread_name_prefix="backfill")
+
+
+def split_range(from_date: datetime, to_date: datetime, interval: str) -> List[Tuple[datetime, datetime]]:
+    """Consecutive (from, to) chunks no longer than Kite allows for `interval`."""
+    step = timedelta(days=MAX_DAYS_PER_REQUEST.get(interval, 60))
+    chunks = []
+    start = from_date
+    while True:
+        end = min(start + step, to_date)
+        chunks.append((start, end))
+        if end >= to_date:
+            return chunks
+        start = end  # Kite's range is inclusive; the shared boundary is de-duplicated
+
+
+def _merge_chunks(parts: List[list]) -> list:
+    """Concatenate ordered chunk results, skipping candles already seen."""
+    merged = []
+    last = None
+    for part in parts:
+        for candle in part:
+            if last is not None and candle["date"] <= last:
+                continue
+            merged.append(candle)
+            last = candle["date"]
+    return merged
+
+
+def _fetch_chunk(kite_client, instrument_token: int, interval: str, chunk, on_chunk=None) -> list:
+    kite_client.historical_limiter.acquire()
+    data = kite_client.kite.historical_data(
+        instrument_token=instrument_token,
+        from_date=chunk[0],
+        to_date=chunk[1],
+        interval=interval
+    )
+    if on_chunk is not None:
+        on_chunk(len(data))
+    return data
+
+
+def fetch_range(kite_client, instrument_token: int, interval: str, from_date: datetime, to_date: datetime,
+                on_chunk: Optional[Callable[[int], None]] = None, executor: ThreadPoolExecutor = _executor) -> list:
+    """Candles for any range, in as many parallel Kite calls as it takes."""
+    chunks = split_range(from_date, to_date, interval)
+    if len(chunks) == 1:
+        return _fetch_chunk(kite_client, instrument_token, interval, chunks[0], on_chunk)
+    return _merge_chunks(list(executor.map(
+        lambda chunk: _fetch_chunk(kite_client, instrument_token, interval, chunk, on_chunk), chunks
+    )))
+
+
+def iter_range(kite_client, instrument_token: int, interval: str,
+               from_date: datetime, to_date: datetime) -> Iterator[dict]:
+    """Yield candles in order as chunks arrive.
+
+    At most BACKFILL_CONCURRENCY chunks are fetched ahead of the consumer,
+    so memory stays bounded however long the range is.
+    """
+    chunks = iter(split_range(from_date, to_date, interval))
+    pending = deque()
+
+    def submit_next():
+        chunk = next(chunks, None)
+        if chunk is not None:
+            pending.append(_executor.submit(_fetch_chunk, kite_client, instrument_token, interval, chunk))
+
+    for _ in range(BACKFILL_CONCURRENCY):
+        submit_next()
+    last = None
+    while pending:
+        part = pending.popleft().result()
+        submit_next()
+        for candle in part:
+            if last is not None and candle["date"] <= last:
+                continue  # Shared chunk boundary
+            last = candle["date"]
+            yield candle
+
+
+def epoch_seconds(value) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=IST)  # Kite times are IST
+    return int(value.timestamp())
+
+
+def naive_ist(value: datetime) -> datetime:
+    """`value` as a naive IST datetime (how Kite takes and returns candle times)."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(IST).replace(tzinfo=None)
+
+
+class HistoryStore:
+    """Candles persisted per (token, interval) as a structured .npy array."""
+
+    def __init__(self, root: Path = HISTORY_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _path(self, instrument_token: int, interval: str) -> Path:
+        if interval not in MAX_DAYS_PER_REQUEST:
+            raise ValueError(f"Unsupported interval: {interval}")  # Never a path component
+        return self.root / f"{int(instrument_token)}_{interval}.npy"
+
+    def _read(self, path: Path) -> Optional[np.ndarray]:
+        """Memory-mapped candles (pages are only read when touched)."""
+        if not path.exists():
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def save(self, instrument_token: int, interval: str, candles: list) -> int:
+        """Merge candles into the stored series; returns the stored count."""
+        if not candles:
+            return 0
+        new = np.empty(len(candles), dtype=CANDLE_DTYPE)
+        new["date"] = [epoch_seconds(c["date"]) for c in candles]
+        for field in _FIELDS:
+            new[field] = [c[field] for c in candles]
+
+        path = self._path(instrument_token, interval)
+        with self._lock:
+            old = self._read(path)
+            # New candles win over stored ones with the same timestamp
+            combined = new if old is None else np.concatenate([new, old])
+            _, keep = np.unique(combined["date"], return_index=True)
+            merged = combined[keep]
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, merged)
+            os.replace(tmp, path)
+        return len(merged)
+
+    def _slice(self, instrument_token: int, interval: str,
+               from_date: Optional[datetime], to_date: Optional[datetime]) -> Optional[np.ndarray]:
+        with self._lock:
+            data = self._read(self._path(instrument_token, interval))
+        if data is None:
+            return None
+        dates = data["date"]
+        lo = np.searchsorted(dates, epoch_seconds(from_date)) if from_date else 0
+        hi = np.searchsorted(dates, epoch_seconds(to_date), side="right") if to_date else len(dates)
+        return data[lo:hi]
+
+    def iter_load(self, instrument_token: int, interval: str,
+                  from_date: Optional[datetime] = None, to_date: Optional[datetime] = None) -> Iterator[dict]:
+        """Yield stored candles as dicts, READ_BATCH rows at a time."""
+        rows = self._slice(instrument_token, interval, from_date, to_date)
+        if rows is None:
+            return
+        for start in range(0, len(rows), READ_BATCH):
+            for ts, o, h, l, c, v in rows[start:start + READ_BATCH].tolist():
+                yield {"date": datetime.fromtimestamp(ts, IST), "open": o, "high": h,
+                       "low": l, "close": c, "volume": int(v)}
+
+    def load(self, instrument_token: int, interval: str,
+             from_date: Optional[datetime] = None, to_date: Optional[datetime] = None) -> list:
+        return [
+            {**candle, "date": candle["date"].isoformat()}
+            for candle in self.iter_load(instrument_token, interval, from_date, to_date)
+        ]
+
+    def coverage(self, instrument_token: int, interval: str) -> Optional[dict]:
+        with self._lock:
+            data = self._read(self._path(instrument_token, interval))
+        if data is None or not len(data):
+            return None
+        return {
+            "candles": int(len(data)),
+            "first": datetime.fromtimestamp(int(data["date"][0]), IST).isoformat(),
+            "last": datetime.fromtimestamp(int(data["date"][-1]), IST).isoformat(),
+        }
+
+
+class BackfillJob:
+    def __init__(self, job_id: str, account_id: str, symbol: str, exchange: str, instrument_token: int,
+                 interval: str, from_date: datetime, to_date: datetime):
+        self.job_id = job_id
+        self.account_id = account_id
+        self.symbol = symbol
+        self.exchange = exchange
+        self.instrument_token = instrument_token
+        self.interval = interval
+        self.from_date = from_date
+        self.to_date = to_date
+        self.chunks_total = len(split_range(from_date, to_date, interval))
+        self.chunks_done = 0
+        self.candles_fetched = 0
+        self.candles_stored = 0
+        self.status = "running"
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def _on_chunk(self, count: int):
+        with self._lock:
+            self.chunks_done += 1
+            self.candles_fetched += count
+
+    def info(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "account_id": self.account_id,
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "instrument_token": self.instrument_token,
+            "interval": self.interval,
+            "from_date": self.from_date.isoformat(),
+            "to_date": self.to_date.isoformat(),
+            "status": self.status,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "progress": round(self.chunks_done / self.chunks_total, 3),
+            "candles_fetched": self.candles_fetched,
+            "candles_stored": self.candles_stored,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class BackfillManager:
+    """Starts backfill jobs and keeps the most recent ones for progress queries."""
+
+    def __init__(self, store: HistoryStore):
+        self.store = store
+        self.jobs: OrderedDict = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, kite_client, symbol: str, exchange: str, instrument_token: int,
+              interval: str, from_date: datetime, to_date: datetime) -> BackfillJob:
+        if interval not in MAX_DAYS_PER_REQUEST:
+            raise ValueError(f"Unsupported interval: {interval}")
+        # Request bodies may carry offsets; datetime.now() defaults do not
+        from_date, to_date = naive_ist(from_date), naive_ist(to_date)
+        if from_date >= to_date:
+            raise ValueError("from_date must be before to_date")
+        job = BackfillJob(f"{int(time.time())}-{next(self._ids)}", kite_client.account_id, symbol,
+                          exchange, instrument_token, interval, from_date, to_date)
+        if job.chunks_total > MAX_CHUNKS_PER_JOB:
+            raise ValueError(f"Range needs {job.chunks_total} requests; at most {MAX_CHUNKS_PER_JOB} per backfill")
+        with self._lock:
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > MAX_STORED_JOBS:
+                self.jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(kite_client, job), name=f"backfill-{job.job_id}", daemon=True).start()
+        return job
+
+    def _run(self, kite_client, job: BackfillJob):
+        try:
+            candles = fetch_range(kite_client, job.instrument_token, job.interval,
+                                  job.from_date, job.to_date, on_chunk=job._on_chunk, executor=_job_executor)
+            job.candles_stored = self.store.save(job.instrument_token, job.interval, candles)
+            job.status = "done"
+        except Exception as e:
+            logger.error(f"Backfill {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str, account_id: str) -> Optional[BackfillJob]:
+        job = self.jobs.get(job_id)
+        return job if job is not None and job.account_id == account_id else None
+
+    def for_account(self, account_id: str) -> List[BackfillJob]:
+        """`account_id`'s recent jobs, oldest first."""
+        return [job for job in list(self.jobs.values()) if job.account_id == account_id]
+
+
+history_store = HistoryStore()
+backfill_manager = BackfillManager(history_store)
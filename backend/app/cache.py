@@ -0,0 +1,94 @@
+"""
+Shared in-process caches for market data and per-account portfolio data.
+
+Quotes, LTPs and historical candles are the same no matter which account
+fetched them, so every account reads and fills the same caches. Entries
+expire after a TTL and the least recently used entries are evicted once a
+cache is full. Hit/miss counts are exported at `/metrics`.
+
+Invalidation bumps a generation counter, so a caller that read
+`generation(key)` before a slow fetch can pass it to `set` and have the
+result dropped if the entry was invalidated while it was fetching.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app.observability.metrics import cache_counters
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # key -> (value, stored_at, expires_at) using time.monotonic()
+        self._entries: OrderedDict = OrderedDict()
+        # Invalidation counts: everything (`_epoch`) and per key
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._hit, self._miss = cache_counters(name)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for `key`, or None if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self._hit.inc()
+                return entry[0]
+        self._miss.inc()
+        return None
+
+    def get_stale(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Last stored value and its age in seconds, even if expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0], time.monotonic() - entry[1]
+
+    def generation(self, key: Hashable) -> Tuple[int, int]:
+        """Token for `set(..., generation=)`; changes whenever `key` is invalidated."""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            generation: Optional[Tuple[int, int]] = None) -> bool:
+        """Store `value`; with `generation`, only if `key` was not invalidated since it was read."""
+        now = time.monotonic()
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key, 0)):
+                return False
+            self._entries[key] = (value, now, now + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or everything when `key` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._epoch += 1
+            else:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Kite's quote endpoints allow ~1 request/second per key
+quote_cache = TTLCache("quote", ttl=1.0)
+# Historical candles only change when a new bar closes
+candle_cache = TTLCache("candles", ttl=30.0, maxsize=256)
+# Last good portfolio responses per account; only read (as stale) while Kite is failing
+portfolio_cache = TTLCache("portfolio", ttl=0.0, maxsize=256)
+# Portfolio analytics per account; also dropped on every order update
+analytics_cache = TTLCache("portfolio_analytics", ttl=15.0, maxsize=256)
@@ -0,0 +1,120 @@
+"""
+Per endpoint class circuit breakers for Kite REST calls.
+
+After `failure_threshold` consecutive transient failures (timeouts,
+connection errors, 5xx/429) a breaker opens and calls in that endpoint
+class fail immediately with `CircuitOpenError` instead of tying up a
+worker thread until the upstream times out. After `reset_timeout` seconds
+one probe call is let through (half-open); success closes the breaker,
+failure re-opens it. Client errors (bad input, expired token) mean the
+upstream is answering, so they count as successes.
+
+Routes with cached data answer from the last good response while a
+breaker is open (see routes/quote.py).
+"""
+import math
+import threading
+import time
+from typing import Dict
+import requests
+from kiteconnect import exceptions as kite_exceptions
+from app.observability.prometheus import REGISTRY
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 10.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Kite while an endpoint class is failing."""
+
+    code = 503
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Kite {endpoint} endpoints are unavailable; retry in {math.ceil(retry_after)}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying and counting against the breaker."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, kite_exceptions.NetworkException):
+        return True
+    if isinstance(error, (kite_exceptions.GeneralException, kite_exceptions.DataException)):
+        return getattr(error, "code", 500) >= 500
+    return False
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now."""
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self._probing = True
+
+    def record_success(self):
+        if self.state == CLOSED and self.failures == 0:
+            return
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def info(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(endpoint: str) -> CircuitBreaker:
+    """Shared breaker for an endpoint class (all accounts hit the same upstream)."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+    return breaker
+
+
+def breaker_states() -> Dict[str, dict]:
+    return {name: breaker.info() for name, breaker in list(_breakers.items())}
+
+
+REGISTRY.callback(
+    "tradexr_kite_circuit_state",
+    "Kite circuit breaker state per endpoint class (0=closed, 1=half-open, 2=open).",
+    ("endpoint",),
+    lambda: {(name,): _STATE_VALUES[b.state] for name, b in list(_breakers.items())},
+)
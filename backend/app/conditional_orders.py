@@ -0,0 +1,221 @@
+"""
+Server-side conditional orders.
+
+A conditional order is a regular LIMIT order held locally until the
+instrument's last price meets its trigger (`above`, `below` or `cross`,
+same semantics as price alerts). Triggers are evaluated in the account's
+TickerService tick callback, registered ahead of the other tick consumers,
+so reaction time is bounded by tick arrival rather than browser polling.
+
+A fired order is handed to the order lane (app/lanes.py; the tick thread
+never waits on Kite) and placed with `KiteClient.place_order` over the
+dedicated order connection. Its `OrderTrace` starts at the triggering tick,
+so `/metrics/orders` reports trigger-to-submit latency (`trigger_to_submit`)
+alongside the usual stages.
+
+Without a `price` the order is placed as a LIMIT at the triggering tick's
+last price. Orders live in process memory, so the conditional order routes
+are refused when workers share a feed (`FEED_SOCKET`).
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from app.alerts import CONDITIONS, PriceTriggers
+from app.kite_client import KiteClient
+from app.lanes import order_lane
+from app.observability.order_latency import order_latency
+from app.observability.prometheus import REGISTRY
+from app.ticker_service import TickerService
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_PER_ACCOUNT = 1000
+# Finished (submitted/failed) orders kept for GET /api/kite/conditional-orders
+FINISHED_HISTORY = 200
+
+
+class ConditionalOrder:
+    def __init__(self, order_ref: str, account_id: str, symbol: str, exchange: str, instrument_token: int,
+                 condition: str, trigger_price: float, transaction_type: str, quantity: int,
+                 price: Optional[float] = None):
+        self.order_ref = order_ref
+        self.account_id = account_id
+        self.symbol = symbol
+        self.exchange = exchange
+        self.instrument_token = instrument_token
+        self.condition = condition
+        self.trigger_price = trigger_price
+        self.transaction_type = transaction_type
+        self.quantity = quantity
+        self.price = price
+        self.status = "pending"  # pending | triggered | submitted | failed
+        self.created_at = time.time()
+        self.triggered_at = None
+        self.tick_price = None
+        self.order_id = None
+        self.error = None
+        self.trigger_to_submit_ms = None
+
+    def info(self) -> dict:
+        return {
+            "order_ref": self.order_ref,
+            "account_id": self.account_id,
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "instrument_token": self.instrument_token,
+            "condition": self.condition,
+            "trigger_price": self.trigger_price,
+            "transaction_type": self.transaction_type,
+            "quantity": self.quantity,
+            "price": self.price,
+            "status": self.status,
+            "created_at": self.created_at,
+            "triggered_at": self.triggered_at,
+            "tick_price": self.tick_price,
+            "order_id": self.order_id,
+            "error": self.error,
+            "trigger_to_submit_ms": self.trigger_to_submit_ms,
+        }
+
+
+class ConditionalOrderEngine:
+    """Pending conditional orders of one account."""
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self.pending: Dict[str, ConditionalOrder] = {}
+        self.finished = deque(maxlen=FINISHED_HISTORY)
+        self._tokens: Dict[int, PriceTriggers] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.ticker = TickerService(account_id)
+        self.ticker.add_callback(self.on_ticks, first=True)
+
+    def add(self, symbol: str, exchange: str, instrument_token: int, condition: str, trigger_price: float,
+            transaction_type: str, quantity: int, price: Optional[float] = None) -> ConditionalOrder:
+        if condition not in CONDITIONS:
+            raise ValueError(f"condition must be one of {', '.join(CONDITIONS)}")
+        if transaction_type.upper() not in ("BUY", "SELL"):
+            raise ValueError("transaction_type must be BUY or SELL")
+        if not trigger_price > 0 or (price is not None and not price > 0):
+            raise ValueError("trigger_price and price must be positive")
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+        if len(self.pending) >= MAX_PENDING_PER_ACCOUNT:
+            raise ValueError(f"At most {MAX_PENDING_PER_ACCOUNT} pending conditional orders per account")
+
+        order = ConditionalOrder(f"c{int(time.time())}-{next(self._ids)}", self.account_id, symbol, exchange,
+                                 int(instrument_token), condition, float(trigger_price),
+                                 transaction_type.upper(), int(quantity), price)
+        last_tick = self.ticker.get_last_tick(order.instrument_token)
+        with self._lock:
+            entry = self._tokens.get(order.instrument_token)
+            if entry is None:
+                entry = PriceTriggers(last_tick.get("last_price") if last_tick else None)
+                self._tokens[order.instrument_token] = entry
+            entry.add(condition, order.trigger_price, order)
+            self.pending[order.order_ref] = order
+        self.ticker.subscribe([order.instrument_token])
+        return order
+
+    def cancel(self, order_ref: str) -> Optional[ConditionalOrder]:
+        """Disarm a pending order; None if unknown or already triggered."""
+        with self._lock:
+            order = self.pending.pop(order_ref, None)
+            if order is None:
+                return None
+            entry = self._tokens.get(order.instrument_token)
+            if entry is not None:
+                entry.remove(order.condition, order.trigger_price, order)
+                if entry.empty():
+                    del self._tokens[order.instrument_token]
+        order.status = "cancelled"
+        return order
+
+    def orders(self) -> dict:
+        return {
+            "pending": [order.info() for order in list(self.pending.values())],
+            "finished": [order.info() for order in list(self.finished)],
+        }
+
+    def on_ticks(self, ticks):
+        """TickerService callback: submit orders whose trigger this batch met."""
+        tokens = self._tokens
+        if not tokens:
+            return
+        received_ns = time.monotonic_ns()
+        fired = None
+        with self._lock:
+            for tick in ticks:
+                token = tick.get("instrument_token")
+                entry = tokens.get(token)
+                if entry is None:
+                    continue
+                price = tick.get("last_price")
+                if price is None:
+                    continue
+                hits = entry.fire(price)
+                if hits:
+                    for order in hits:
+                        order.tick_price = price
+                        del self.pending[order.order_ref]
+                    if entry.empty():
+                        del tokens[token]
+                    fired = hits if fired is None else fired + hits
+        if fired is None:
+            return
+
+        now = time.time()
+        for order in fired:
+            order.status = "triggered"
+            order.triggered_at = now
+            trace = order_latency.start(order.symbol)
+            trace.mark("triggered", received_ns)
+            order_lane.submit(self._submit, order, trace)
+
+    def _submit(self, order: ConditionalOrder, trace):
+        trace.mark("dequeued")
+        try:
+            result = KiteClient(self.account_id).place_order(
+                symbol=order.symbol,
+                quantity=order.quantity,
+                price=order.price if order.price is not None else order.tick_price,
+                transaction_type=order.transaction_type,
+                exchange=order.exchange,
+                trace=trace
+            )
+            order.order_id = result["order_id"]
+            order.status = "submitted"
+        except Exception as e:
+            order.error = str(e)
+            order.status = "failed"
+        if "kite_start" in trace.stamps:
+            order.trigger_to_submit_ms = round((trace.stamps["kite_start"] - trace.stamps["triggered"]) / 1e6, 3)
+        logger.info(f"Conditional order {order.order_ref} ({order.symbol} {order.condition} "
+                    f"{order.trigger_price} at {order.tick_price}): {order.status}")
+        self.finished.append(order)
+
+
+_engines: Dict[str, ConditionalOrderEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def conditional_engine_for(account_id: str) -> ConditionalOrderEngine:
+    engine = _engines.get(account_id)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(account_id)
+            if engine is None:
+                engine = _engines[account_id] = ConditionalOrderEngine(account_id)
+    return engine
+
+
+REGISTRY.callback(
+    "tradexr_conditional_orders_pending",
+    "Armed conditional orders per account.",
+    ("account",),
+    lambda: {(account,): len(engine.pending) for account, engine in list(_engines.items())},
+)
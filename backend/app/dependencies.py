@@ -0,0 +1,67 @@
+"""
+FastAPI dependencies for selecting the trading account of a request.
+
+Routes take `kite_client: KiteClient = Depends(get_kite_client)` instead of
+a module-level singleton, so the same route serves whichever account the
+`X-Account-Id` header names. The dependencies only touch in-memory state and
+stat() the vault, so they are async and never wait for a threadpool worker.
+
+`require_single_process` guards routes whose state lives in one worker's
+memory (alerts, conditional orders): with `FEED_SOCKET` set, requests are
+spread over several workers, so those routes are refused.
+"""
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
+from app.accounts import DEFAULT_ACCOUNT, validate_account_id
+from app.feed import FEED_SOCKET
+from app.kite_client import KiteClient
+from app.security.vault import CredentialVault
+from app.ticker_service import TickerService
+
+
+async def get_account_id(x_account_id: Optional[str] = Header(None)) -> str:
+    """Account named by the `X-Account-Id` header (default account if absent)."""
+    account_id = x_account_id or DEFAULT_ACCOUNT
+    try:
+        return validate_account_id(account_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def is_known_account(account_id: str) -> bool:
+    """Default account, an already-loaded account, or one with a vault file."""
+    return (
+        account_id == DEFAULT_ACCOUNT
+        or account_id in KiteClient._instances
+        or CredentialVault.exists(account_id)
+    )
+
+
+async def get_kite_client(account_id: str = Depends(get_account_id)) -> KiteClient:
+    """Client for an existing account; unknown accounts get 404."""
+    if not is_known_account(account_id):
+        raise HTTPException(status_code=404, detail=f"Unknown account: {account_id}")
+    client = KiteClient(account_id)
+    client.start_background_init()
+    return client
+
+
+async def get_or_create_kite_client(account_id: str = Depends(get_account_id)) -> KiteClient:
+    """Client for any valid account id - used by routes that register credentials."""
+    client = KiteClient(account_id)
+    client.start_background_init()
+    return client
+
+
+async def get_ticker_service(kite_client: KiteClient = Depends(get_kite_client)) -> TickerService:
+    """Ticker service of the selected account."""
+    return TickerService(kite_client.account_id)
+
+
+async def require_single_process():
+    """Refuse process-local features when workers share a feed (`FEED_SOCKET`)."""
+    if FEED_SOCKET is not None:
+        raise HTTPException(
+            status_code=501,
+            detail="Not available with FEED_SOCKET: this state is kept per worker; run a single worker",
+        )
@@ -0,0 +1,113 @@
+"""
+Compact market-depth store.
+
+Full-mode ticks carry a five-level book as nested dicts. `DepthStore` keeps
+the latest book per token as one row of a preallocated float64 array
+(2 sides x 5 levels x price/quantity/orders = 240 bytes per token) instead
+of holding on to the dicts, and computes per-client diffs by comparing the
+current row with the copy last sent to that client, so only changed levels
+go over the wire.
+
+Rows are written on the ticker thread and read on the event loop without a
+lock; a read racing a write can mix two consecutive books for one message,
+which the next diff corrects.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+LEVELS = 5
+SIDES = ("buy", "sell")
+_EMPTY_LEVEL = (0.0, 0.0, 0.0)
+
+
+def _side_rows(levels) -> list:
+    rows = [(level.get("price", 0.0), level.get("quantity", 0), level.get("orders", 0))
+            for level in levels[:LEVELS]]
+    if len(rows) < LEVELS:
+        rows.extend([_EMPTY_LEVEL] * (LEVELS - len(rows)))
+    return rows
+
+
+def _level(values) -> tuple:
+    price, quantity, orders = values.tolist()
+    return price, int(quantity), int(orders)
+
+
+def _levels(book: np.ndarray, side: int, levels=range(LEVELS)) -> List[list]:
+    return [[int(level), *_level(book[side, level])] for level in levels]
+
+
+class DepthStore:
+    """Latest depth per instrument token in a single growable array."""
+
+    def __init__(self, capacity: int = 256):
+        self._rows: Dict[int, int] = {}
+        self._books = np.zeros((capacity, len(SIDES), LEVELS, 3))
+        self._grow_lock = threading.Lock()
+
+    def _row(self, token: int) -> int:
+        row = self._rows.get(token)
+        if row is None:
+            with self._grow_lock:
+                row = self._rows.get(token)
+                if row is None:
+                    row = len(self._rows)
+                    if row == len(self._books):
+                        self._books = np.concatenate([self._books, np.zeros_like(self._books)])
+                    self._rows[token] = row
+        return row
+
+    def update(self, token: int, depth: dict):
+        """Store a tick's `depth` dict (ticker thread)."""
+        row = self._row(token)  # May grow (replace) the array, so look it up first
+        self._books[row] = (_side_rows(depth.get("buy", ())), _side_rows(depth.get("sell", ())))
+
+    def update_batch(self, tokens, books: np.ndarray):
+        """Store (n, side, level, field) books decoded by app.tick_parser (ticker thread)."""
+        rows = [self._row(token) for token in tokens.tolist()]
+        self._books[rows] = books
+
+    def __contains__(self, token: int) -> bool:
+        return token in self._rows
+
+    def book(self, token: int) -> Optional[np.ndarray]:
+        """Copy of a token's (side, level, field) array, or None."""
+        row = self._rows.get(token)
+        return None if row is None else self._books[row].copy()
+
+    def snapshot(self, token: int) -> Optional[dict]:
+        book = self.book(token)
+        if book is None:
+            return None
+        return {
+            side: [dict(zip(("price", "quantity", "orders"), _level(book[i, level])))
+                   for level in range(LEVELS)]
+            for i, side in enumerate(SIDES)
+        }
+
+    def diff(self, token: int, previous: Optional[np.ndarray]) -> Tuple[Optional[dict], Optional[np.ndarray]]:
+        """Changed levels since `previous` as `{side: [[level, price, qty, orders]]}`.
+
+        Returns (message or None if unchanged, current book to remember).
+        """
+        book = self.book(token)
+        if book is None:
+            return None, previous
+        message = {"instrument_token": token}
+        if previous is None:
+            message["snapshot"] = True
+            for i, side in enumerate(SIDES):
+                message[side] = _levels(book, i)
+            return message, book
+        changed = np.any(book != previous, axis=-1)  # (side, level)
+        if not changed.any():
+            return None, previous
+        for i, side in enumerate(SIDES):
+            levels = np.flatnonzero(changed[i])
+            if len(levels):
+                message[side] = _levels(book, i, levels)
+        return message, book
+
+
+depth_store = DepthStore()
@@ -0,0 +1,33 @@
+"""
+Supported ETFs with their portfolio classification.
+
+Mirrors `SUPPORTED_ETFS` in frontend/src/lib/config/etfs.ts; keep the two
+lists in sync. `asset_class` and `sector` drive the weights reported by
+`GET /portfolio/analytics`.
+"""
+from typing import Dict, Optional
+
+
+class ETF:
+    __slots__ = ("symbol", "name", "exchange", "asset_class", "sector")
+
+    def __init__(self, symbol: str, name: str, exchange: str, asset_class: str, sector: str):
+        self.symbol = symbol
+        self.name = name
+        self.exchange = exchange
+        self.asset_class = asset_class
+        self.sector = sector
+
+
+SUPPORTED_ETFS = (
+    ETF("SILVERCASE", "Silver ETF", "NSE", "commodity", "silver"),
+    ETF("GOLDCASE", "Gold ETF", "NSE", "commodity", "gold"),
+    ETF("NIFTYCASE", "Nifty 50 ETF", "NSE", "equity", "large_cap"),
+    ETF("TOP100CASE", "Top 100 ETF", "NSE", "equity", "large_cap"),
+    ETF("MID150CASE", "Midcap 150 ETF", "NSE", "equity", "mid_cap"),
+)
+_BY_SYMBOL: Dict[str, ETF] = {etf.symbol: etf for etf in SUPPORTED_ETFS}
+
+
+def get_etf(symbol: str) -> Optional[ETF]:
+    return _BY_SYMBOL.get(symbol)
@@ -0,0 +1,390 @@
+"""
+Shared upstream feed for multi-worker deployments.
+
+With `uvicorn --workers N` every worker would otherwise open its own
+KiteTicker connections and keep its own `last_ticks`. When `FEED_SOCKET` is
+set, the worker that wins an exclusive lock on `<FEED_SOCKET>.lock` owns the
+upstream connections and relays every tick batch and order update over a
+Unix domain socket; the other workers connect as followers, feed the
+relayed batches into their local TickerService pipeline (`last_ticks`,
+metrics, /ws/ticks fan-out) and forward start/subscribe/unsubscribe/stop
+requests to the owner. If the owner exits, a follower takes the lock and
+becomes the owner.
+
+A login may happen in any worker, so before starting a ticker for a
+follower the owner reloads that account's credentials and session from the
+vault. The owner reports each account's real upstream connection state
+(`status` frames, sent on connect/close and after every start request);
+followers answer `is_connected` from it.
+
+Frames are a 4-byte big-endian length followed by a JSON object. Tick
+datetimes travel as ISO strings and are restored on the follower side.
+Without `FEED_SOCKET` nothing here runs and each process talks to Kite
+directly, as before.
+"""
+import fcntl
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.accounts import validate_account_id
+from app.kite_client import KiteClient
+from app.models import OrderUpdate, Tick
+from app.observability.prometheus import REGISTRY
+from app.ticker_service import TickerService
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FEED_SOCKET = os.getenv("FEED_SOCKET") or None
+# Frames queued per follower before the slowest ones start losing batches
+MAX_PEER_BACKLOG = 1000
+RECONNECT_SECONDS = 1.0
+
+_HEADER = struct.Struct(">I")
+_TIME_FIELDS = ("timestamp", "last_trade_time", "exchange_timestamp",
+                "order_timestamp", "exchange_update_timestamp")
+
+feed_frames_dropped = REGISTRY.counter(
+    "tradexr_feed_frames_dropped_total",
+    "Feed frames dropped because a follower worker fell behind.",
+)
+
+
+def _encode(message: dict) -> bytes:
+    return _frame(json.dumps(message, default=_json_default, separators=(",", ":")).encode())
+
+
+def _frame(body: bytes) -> bytes:
+    return _HEADER.pack(len(body)) + body
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Tick):
+        return None  # Followers build their own from the relayed fields
+    return str(value)
+
+
+def _status(service: TickerService) -> dict:
+    return {"type": "status", "account": service.account_id, "connected": service.is_connected}
+
+
+def _restore_times(item: dict) -> dict:
+    for field in _TIME_FIELDS:
+        value = item.get(field)
+        if isinstance(value, str):
+            try:
+                item[field] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return item
+
+
+def _read_exact(conn: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = conn.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _read_frame(conn: socket.socket) -> Optional[dict]:
+    header = _read_exact(conn, _HEADER.size)
+    if header is None:
+        return None
+    body = _read_exact(conn, _HEADER.unpack(header)[0])
+    return None if body is None else json.loads(body)
+
+
+class _Peer:
+    """A follower connection on the owner side, with its own writer thread."""
+
+    def __init__(self, conn: socket.socket, publisher: "FeedPublisher"):
+        self.conn = conn
+        self.publisher = publisher
+        self.outbox: queue.Queue = queue.Queue(maxsize=MAX_PEER_BACKLOG)
+        self.closed = False
+        threading.Thread(target=self._write_loop, name="feed-peer-writer", daemon=True).start()
+        threading.Thread(target=self._read_loop, name="feed-peer-reader", daemon=True).start()
+
+    def send(self, frame: bytes):
+        try:
+            self.outbox.put_nowait(frame)
+        except queue.Full:
+            feed_frames_dropped.inc()
+
+    def _write_loop(self):
+        while not self.closed:
+            frame = self.outbox.get()
+            if frame is None:
+                break
+            try:
+                self.conn.sendall(frame)
+            except OSError:
+                break
+        self.close()
+
+    def _read_loop(self):
+        try:
+            while True:
+                message = _read_frame(self.conn)
+                if message is None:
+                    break
+                self.publisher.handle_request(message)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Feed follower connection error: {e}")
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.outbox.put_nowait(None)  # Wake the writer
+        except queue.Full:
+            pass
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        self.publisher.remove(self)
+
+
+class FeedPublisher:
+    """Owner side: runs the real tickers and relays their output to followers."""
+
+    remote = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self.peers: List[_Peer] = []
+        self._lock = threading.Lock()
+        self._attached = set()
+        if os.path.exists(path):
+            os.unlink(path)  # Stale socket from a previous owner; we hold the lock
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        os.chmod(path, 0o600)
+        self._server.listen()
+        threading.Thread(target=self._accept_loop, name="feed-accept", daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            peer = _Peer(conn, self)
+            with self._lock:
+                self.peers.append(peer)
+            # Prime the follower's connection state and last_ticks (restamped on arrival, they are not fresh)
+            for service in TickerService.instances():
+                peer.send(_encode(_status(service)))
+                if service.last_ticks:
+                    ticks = [{k: v for k, v in tick.items() if k not in ("_received_ns", "_model")}
+                             for tick in list(service.last_ticks.values())]
+                    peer.send(_encode({"type": "ticks", "account": service.account_id, "ticks": ticks}))
+
+    def remove(self, peer: _Peer):
+        with self._lock:
+            if peer in self.peers:
+                self.peers.remove(peer)
+
+    def _broadcast(self, message: dict):
+        if self.peers:
+            self._broadcast_frame(_encode(message))  # Encoded once for every follower
+
+    def _broadcast_frame(self, frame: bytes):
+        for peer in list(self.peers):
+            peer.send(frame)
+
+    def attach(self, service: TickerService):
+        """Relay a local ticker's batches to followers (idempotent)."""
+        if service.account_id in self._attached:
+            return
+        self._attached.add(service.account_id)
+        account_id = service.account_id
+        service.add_callback(
+            lambda ticks: self._broadcast({"type": "ticks", "account": account_id, "ticks": ticks})
+        )
+
+    def publish_order_update(self, service: TickerService, update: OrderUpdate):
+        if not self.peers:
+            return
+        # The update carries its JSON already; only the envelope is encoded here
+        body = f'{{"type":"order_update","account":{json.dumps(service.account_id)},"data":{update.json}}}'
+        self._broadcast_frame(_frame(body.encode()))
+
+    def publish_status(self, service: TickerService):
+        """Tell followers whether this account's upstream connections are up."""
+        self._broadcast(_status(service))
+
+    def handle_request(self, message: dict):
+        """Apply a follower's ticker request to this process's ticker."""
+        try:
+            service = TickerService(validate_account_id(message.get("account", "")))
+        except ValueError as e:
+            logger.warning(f"Ignoring feed request: {e}")
+            return
+        op = message.get("op")
+        if op == "start":
+            # The login may have happened in the follower; its session is in the vault
+            KiteClient(service.account_id).sync_from_vault()
+            if not service.start():
+                logger.warning(f"Could not start ticker for {service.account_id} on request of a follower")
+            self.publish_status(service)
+        elif op == "subscribe":
+            service.subscribe(message.get("tokens", []))
+        elif op == "unsubscribe":
+            service.unsubscribe(message.get("tokens", []))
+        elif op == "stop":
+            service.stop()
+
+
+class FeedFollower:
+    """Follower side: mirrors the owner's feed into local TickerServices."""
+
+    remote = True
+
+    def __init__(self, path: str, on_owner_lost):
+        self.path = path
+        self.connected = False
+        self._conn: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._on_owner_lost = on_owner_lost
+        self._started = set()
+        # account -> upstream connection state reported by the owner
+        self._owner_connected: Dict[str, bool] = {}
+        threading.Thread(target=self._run, name="feed-follower", daemon=True).start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.is_set():
+            try:
+                conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conn.connect(self.path)
+            except OSError:
+                if self._on_owner_lost():
+                    return  # Promoted to owner
+                stop.wait(RECONNECT_SECONDS)
+                continue
+            self._conn = conn
+            self.connected = True
+            logger.info(f"Following shared feed at {self.path}")
+            self._replay_requests()
+            try:
+                while True:
+                    message = _read_frame(conn)
+                    if message is None:
+                        break
+                    self._dispatch(message)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Shared feed connection error: {e}")
+            self.connected = False
+            self._conn = None
+            self._owner_connected.clear()
+            conn.close()
+            logger.info("Shared feed owner went away")
+            if self._on_owner_lost():
+                return
+
+    def _dispatch(self, message: dict):
+        service = TickerService(message.get("account"))
+        if message.get("type") == "ticks":
+            service._on_ticks(None, [_restore_times(tick) for tick in message["ticks"]])
+        elif message.get("type") == "order_update":
+            service._on_order_update(None, _restore_times(message["data"]))
+        elif message.get("type") == "status":
+            self._owner_connected[service.account_id] = bool(message.get("connected"))
+
+    def _send(self, message: dict) -> bool:
+        conn = self._conn
+        if conn is None:
+            return False
+        try:
+            with self._send_lock:
+                conn.sendall(_encode(message))
+            return True
+        except OSError:
+            return False
+
+    def _replay_requests(self):
+        """Re-send this worker's tickers and subscriptions to a (new) owner."""
+        for service in TickerService.instances():
+            if service.account_id in self._started:
+                self._send({"op": "start", "account": service.account_id})
+            if service.subscribed_tokens:
+                self._send({"op": "subscribe", "account": service.account_id,
+                            "tokens": list(service.subscribed_tokens)})
+
+    def is_connected(self, service: TickerService) -> bool:
+        return self.connected and self._owner_connected.get(service.account_id, False)
+
+    def start(self, service: TickerService) -> bool:
+        self._started.add(service.account_id)
+        return self._send({"op": "start", "account": service.account_id})
+
+    def subscribe(self, service: TickerService, tokens: list):
+        self._send({"op": "subscribe", "account": service.account_id, "tokens": tokens})
+
+    def unsubscribe(self, service: TickerService, tokens: list):
+        self._send({"op": "unsubscribe", "account": service.account_id, "tokens": tokens})
+
+    def stop(self, service: TickerService):
+        self._started.discard(service.account_id)
+        self._send({"op": "stop", "account": service.account_id})
+
+
+class SharedFeed:
+    """Decides and, on failover, changes this worker's role."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_file = open(f"{path}.lock", "a")
+        self._follower: Optional[FeedFollower] = None
+
+    def start(self):
+        if not self._try_own():
+            self._follower = FeedFollower(self.path, self._try_own)
+            TickerService.feed = self._follower
+            logger.info(f"Worker {os.getpid()} follows the shared feed")
+
+    def _try_own(self) -> bool:
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        was_following = self._follower
+        TickerService.feed = FeedPublisher(self.path)
+        logger.info(f"Worker {os.getpid()} owns the shared feed at {self.path}")
+        if was_following is not None:
+            # Take over the upstream connections this worker had asked for
+            for service in TickerService.instances():
+                if service.account_id in was_following._started or service.subscribed_tokens:
+                    service.start()
+        return True
+
+
+# Holds the lock file open (and so the ownership lock) for the process lifetime
+_shared_feed: Optional[SharedFeed] = None
+
+
+def start_shared_feed():
+    """Join the shared feed if `FEED_SOCKET` is configured (startup hook)."""
+    global _shared_feed
+    if FEED_SOCKET is None or _shared_feed is not None:
+        return
+    _shared_feed = SharedFeed(FEED_SOCKET)
+    _shared_feed.start()
@@ -0,0 +1,542 @@
+"""
+Server-side technical indicators (SMA, EMA, RSI, Bollinger bands, VWAP, ATR).
+
+Each indicator is seeded once from stored candles with NumPy and then kept
+current in O(1) per bar: `update()` commits a closed bar and `peek()` gives
+the value for the still-forming bar without changing state, so every tick
+can refresh the latest value cheaply.
+
+- `compute()` - full series for `/candles/{symbol}?indicators=ema:20,rsi:14`
+- `indicator_hub` - live streams over /ws/ticks, one per
+  (account, token, interval, indicator spec) however many of that
+  account's clients watch it
+
+Specs are `name[:param[:param]]`, comma separated: `sma:20`, `ema:20`,
+`rsi:14`, `bb:20:2` (period, std devs), `vwap`, `atr:14`.
+"""
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from app.cache import TTLCache
+
+MAX_INDICATORS = 10
+MAX_PERIOD = 500
+
+# Kite historical interval -> bar length in seconds
+INTERVAL_SECONDS = {
+    "minute": 60,
+    "3minute": 180,
+    "5minute": 300,
+    "10minute": 600,
+    "15minute": 900,
+    "30minute": 1800,
+    "60minute": 3600,
+    "day": 86400,
+}
+
+# Bar fields passed to update()/peek()
+OPEN, HIGH, LOW, CLOSE, VOLUME, DAY = range(6)
+
+
+class _Smoother:
+    """Recursive smoothing seeded with an n-bar SMA (EMA and Wilder's RMA)."""
+
+    def __init__(self, n: int, alpha: float):
+        self.n = n
+        self.alpha = alpha
+        self.value = None
+        self._seed_sum = 0.0
+        self._seen = 0
+
+    def seed(self, values: np.ndarray) -> np.ndarray:
+        out = np.full(len(values), np.nan)
+        head = values[:self.n]
+        self._seen = len(head)
+        self._seed_sum = float(head.sum())
+        if len(values) < self.n:
+            return out
+        value = self._seed_sum / self.n
+        out[self.n - 1] = value
+        alpha = self.alpha
+        # The recursion is inherently sequential; a list loop beats per-element numpy access
+        tail = values[self.n:].tolist()
+        for i, v in enumerate(tail, self.n):
+            value += alpha * (v - value)
+            out[i] = value
+        self.value = value
+        return out
+
+    def peek(self, v: float) -> Optional[float]:
+        if self.value is not None:
+            return self.value + self.alpha * (v - self.value)
+        if self._seen == self.n - 1:
+            return (self._seed_sum + v) / self.n
+        return None
+
+    def update(self, v: float) -> Optional[float]:
+        if self.value is not None:
+            self.value += self.alpha * (v - self.value)
+        else:
+            self._seen += 1
+            self._seed_sum += v
+            if self._seen == self.n:
+                self.value = self._seed_sum / self.n
+        return self.value
+
+
+class SMA:
+    def __init__(self, n: int = 20):
+        self.n = n
+        self.label = f"sma:{n}"
+        self._window = deque(maxlen=n)
+        self._sum = 0.0
+
+    def seed(self, o, h, l, c, v, days):
+        out = np.full(len(c), np.nan)
+        if len(c) >= self.n:
+            csum = np.cumsum(np.insert(c, 0, 0.0))
+            out[self.n - 1:] = (csum[self.n:] - csum[:-self.n]) / self.n
+        self._window.extend(c[-self.n:].tolist())
+        self._sum = float(sum(self._window))
+        return out
+
+    def peek(self, bar):
+        window = self._window
+        if len(window) < self.n - 1:
+            return None
+        dropped = window[0] if len(window) == self.n else 0.0
+        return (self._sum + bar[CLOSE] - dropped) / self.n
+
+    def update(self, bar):
+        window = self._window
+        if len(window) == self.n:
+            self._sum -= window[0]
+        window.append(bar[CLOSE])
+        self._sum += bar[CLOSE]
+        return self._sum / self.n if len(window) == self.n else None
+
+
+class EMA:
+    def __init__(self, n: int = 20):
+        self.label = f"ema:{n}"
+        self._smoother = _Smoother(n, 2.0 / (n + 1))
+
+    def seed(self, o, h, l, c, v, days):
+        return self._smoother.seed(c)
+
+    def peek(self, bar):
+        return self._smoother.peek(bar[CLOSE])
+
+    def update(self, bar):
+        return self._smoother.update(bar[CLOSE])
+
+
+class RSI:
+    """Wilder's RSI."""
+
+    def __init__(self, n: int = 14):
+        self.label = f"rsi:{n}"
+        self._gain = _Smoother(n, 1.0 / n)
+        self._loss = _Smoother(n, 1.0 / n)
+        self._prev_close = None
+
+    @staticmethod
+    def _rsi(gain, loss):
+        if gain is None or loss is None:
+            return None
+        return 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def seed(self, o, h, l, c, v, days):
+        out = np.full(len(c), np.nan)
+        if len(c) == 0:
+            return out
+        self._prev_close = float(c[-1])
+        change = np.diff(c)
+        gain = self._gain.seed(np.clip(change, 0, None))
+        loss = self._loss.seed(np.clip(-change, 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        out[1:] = np.where(loss == 0, np.where(np.isnan(gain), np.nan, 100.0), rsi)
+        return out
+
+    def peek(self, bar):
+        if self._prev_close is None:
+            return None
+        change = bar[CLOSE] - self._prev_close
+        return self._rsi(self._gain.peek(max(change, 0.0)), self._loss.peek(max(-change, 0.0)))
+
+    def update(self, bar):
+        if self._prev_close is None:
+            self._prev_close = bar[CLOSE]
+            return None
+        change = bar[CLOSE] - self._prev_close
+        self._prev_close = bar[CLOSE]
+        return self._rsi(self._gain.update(max(change, 0.0)), self._loss.update(max(-change, 0.0)))
+
+
+class Bollinger:
+    """Bollinger bands: SMA +/- k population standard deviations."""
+
+    def __init__(self, n: int = 20, k: float = 2.0):
+        self.n = n
+        self.k = k
+        self.label = f"bb:{n}:{k:g}"
+        self._window = deque(maxlen=n)
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def _bands(self, total, total_sq):
+        mean = total / self.n
+        std = max(total_sq / self.n - mean * mean, 0.0) ** 0.5
+        return {"upper": mean + self.k * std, "middle": mean, "lower": mean - self.k * std}
+
+    def seed(self, o, h, l, c, v, days):
+        out = {key: np.full(len(c), np.nan) for key in ("upper", "middle", "lower")}
+        if len(c) >= self.n:
+            windows = sliding_window_view(c, self.n)
+            mean = windows.mean(axis=1)
+            std = windows.std(axis=1)
+            out["middle"][self.n - 1:] = mean
+            out["upper"][self.n - 1:] = mean + self.k * std
+            out["lower"][self.n - 1:] = mean - self.k * std
+        tail = c[-self.n:]
+        self._window.extend(tail.tolist())
+        self._sum = float(tail.sum())
+        self._sumsq = float((tail * tail).sum())
+        return out
+
+    def peek(self, bar):
+        window = self._window
+        if len(window) < self.n - 1:
+            return None
+        close = bar[CLOSE]
+        dropped = window[0] if len(window) == self.n else 0.0
+        return self._bands(self._sum + close - dropped, self._sumsq + close * close - dropped * dropped)
+
+    def update(self, bar):
+        window = self._window
+        if len(window) == self.n:
+            self._sum -= window[0]
+            self._sumsq -= window[0] * window[0]
+        close = bar[CLOSE]
+        window.append(close)
+        self._sum += close
+        self._sumsq += close * close
+        return self._bands(self._sum, self._sumsq) if len(window) == self.n else None
+
+
+class VWAP:
+    """Session VWAP on typical price, reset at each trading day."""
+
+    def __init__(self):
+        self.label = "vwap"
+        self._day = None
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def seed(self, o, h, l, c, v, days):
+        out = np.full(len(c), np.nan)
+        if len(c) == 0:
+            return out
+        pv = (h + l + c) / 3.0 * v
+        cum_pv = np.cumsum(pv)
+        cum_v = np.cumsum(v)
+        # Subtract the running totals carried in from earlier sessions
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        session = np.repeat(starts, np.diff(np.r_[starts, len(c)]))
+        base_pv = np.where(session > 0, cum_pv[session - 1], 0.0)
+        base_v = np.where(session > 0, cum_v[session - 1], 0.0)
+        session_pv = cum_pv - base_pv
+        session_v = cum_v - base_v
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:] = np.where(session_v > 0, session_pv / session_v, np.nan)
+        self._day = days[-1]
+        self._pv = float(session_pv[-1])
+        self._volume = float(session_v[-1])
+        return out
+
+    def _totals(self, bar):
+        pv, volume = (self._pv, self._volume) if bar[DAY] == self._day else (0.0, 0.0)
+        typical = (bar[HIGH] + bar[LOW] + bar[CLOSE]) / 3.0
+        return pv + typical * bar[VOLUME], volume + bar[VOLUME]
+
+    def peek(self, bar):
+        pv, volume = self._totals(bar)
+        return pv / volume if volume else None
+
+    def update(self, bar):
+        self._pv, self._volume = self._totals(bar)
+        self._day = bar[DAY]
+        return self._pv / self._volume if self._volume else None
+
+
+class ATR:
+    """Wilder's average true range."""
+
+    def __init__(self, n: int = 14):
+        self.label = f"atr:{n}"
+        self._smoother = _Smoother(n, 1.0 / n)
+        self._prev_close = None
+
+    def _true_range(self, bar):
+        if self._prev_close is None:
+            return bar[HIGH] - bar[LOW]
+        return max(bar[HIGH] - bar[LOW], abs(bar[HIGH] - self._prev_close), abs(bar[LOW] - self._prev_close))
+
+    def seed(self, o, h, l, c, v, days):
+        if len(c) == 0:
+            return np.full(0, np.nan)
+        prev = np.r_[np.nan, c[:-1]]
+        ranges = np.vstack([h - l, np.abs(h - prev), np.abs(l - prev)])
+        tr = np.nanmax(ranges, axis=0)
+        self._prev_close = float(c[-1])
+        return self._smoother.seed(tr)
+
+    def peek(self, bar):
+        return self._smoother.peek(self._true_range(bar))
+
+    def update(self, bar):
+        tr = self._true_range(bar)
+        self._prev_close = bar[CLOSE]
+        return self._smoother.update(tr)
+
+
+# name -> (class, default params)
+INDICATORS = {
+    "sma": (SMA, (20,)),
+    "ema": (EMA, (20,)),
+    "rsi": (RSI, (14,)),
+    "bb": (Bollinger, (20, 2.0)),
+    "bollinger": (Bollinger, (20, 2.0)),
+    "vwap": (VWAP, ()),
+    "atr": (ATR, (14,)),
+}
+
+
+def parse_specs(spec: str) -> List[Tuple[str, tuple]]:
+    """Parse `ema:20,rsi:14` into [(name, params)]; raises ValueError."""
+    parsed = []
+    for item in filter(None, (part.strip().lower() for part in spec.split(","))):
+        name, *raw = item.split(":")
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        cls, defaults = INDICATORS[name]
+        if len(raw) > len(defaults):
+            raise ValueError(f"Too many parameters for {name}")
+        try:
+            params = tuple(type(d)(r) for d, r in zip(defaults, raw)) + defaults[len(raw):]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {item}")
+        if params and not 1 <= params[0] <= MAX_PERIOD:
+            raise ValueError(f"{name} period must be between 1 and {MAX_PERIOD}")
+        parsed.append(("bb" if name == "bollinger" else name, params))
+    if not parsed:
+        raise ValueError("No indicators requested")
+    if len(parsed) > MAX_INDICATORS:
+        raise ValueError(f"At most {MAX_INDICATORS} indicators per request")
+    return parsed
+
+
+def build(specs: List[Tuple[str, tuple]]) -> list:
+    return [INDICATORS[name][0](*params) for name, params in specs]
+
+
+def canonical(specs: List[Tuple[str, tuple]]) -> str:
+    """Stable spec string used in cache keys (defaults filled in)."""
+    return ",".join(indicator.label for indicator in build(specs))
+
+
+def _naive(dt):
+    """Kite candles carry +05:30 tzinfo, ticks are naive IST; compare as naive."""
+    return dt.replace(tzinfo=None) if isinstance(dt, datetime) and dt.tzinfo else dt
+
+
+def _candle_arrays(candles: List[dict]):
+    """(open, high, low, close, volume, day) arrays from Kite-style candles."""
+    o = np.fromiter((c["open"] for c in candles), float, len(candles))
+    h = np.fromiter((c["high"] for c in candles), float, len(candles))
+    l = np.fromiter((c["low"] for c in candles), float, len(candles))
+    c_ = np.fromiter((c["close"] for c in candles), float, len(candles))
+    v = np.fromiter((c["volume"] for c in candles), float, len(candles))
+    days = np.array([_day_of(c["date"]) for c in candles], dtype=object)
+    return o, h, l, c_, v, days
+
+
+def _day_of(value):
+    if isinstance(value, str):
+        return value[:10]
+    return _naive(value).date().isoformat()
+
+
+def _to_list(values: np.ndarray) -> list:
+    return [None if x != x else round(x, 4) for x in values.tolist()]
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        return _to_list(value)
+    return None if value is None else round(value, 4)
+
+
+def compute(candles: List[dict], specs: List[Tuple[str, tuple]]) -> Dict[str, object]:
+    """Full indicator series aligned with `candles` (None where undefined)."""
+    arrays = _candle_arrays(candles)
+    return {ind.label: _jsonable(ind.seed(*arrays)) for ind in build(specs)}
+
+
+def bucket_start(ts: datetime, interval: str) -> datetime:
+    """Start of the `interval` bar containing `ts` (bars align to the 09:15 open)."""
+    ts = _naive(ts)
+    seconds = INTERVAL_SECONDS[interval]
+    if seconds >= 86400:
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    anchor = ts.replace(hour=9, minute=15, second=0, microsecond=0)
+    offset = (ts - anchor).total_seconds() // seconds * seconds
+    return anchor + timedelta(seconds=offset)
+
+
+class IndicatorStream:
+    """Live indicators for one (token, interval, spec), fed by one account's ticks."""
+
+    def __init__(self, token: int, interval: str, specs: List[Tuple[str, tuple]], candles: List[dict],
+                 account_id: str):
+        self.account_id = account_id
+        self.token = token
+        self.interval = interval
+        self.indicators = build(specs)
+        self.spec = ",".join(ind.label for ind in self.indicators)
+        self._last_volume = None
+        # Kite returns the in-progress bar last; it becomes the forming bar
+        committed, forming = candles[:-1], candles[-1:]
+        arrays = _candle_arrays(committed)
+        for indicator in self.indicators:
+            indicator.seed(*arrays)
+        self._bar = None
+        self._bar_start = None
+        if forming:
+            f = forming[0]
+            self._bar_start = bucket_start(f["date"], interval) if isinstance(f["date"], datetime) else None
+            self._bar = [f["open"], f["high"], f["low"], f["close"], f["volume"], _day_of(f["date"])]
+
+    @property
+    def key(self):
+        return (self.account_id, self.token, self.interval, self.spec)
+
+    def on_tick(self, tick: dict) -> Optional[dict]:
+        """Fold one tick into the forming bar; returns the latest values."""
+        price = tick.get("last_price")
+        if price is None:
+            return None
+        ts = tick.get("exchange_timestamp") or tick.get("timestamp") or datetime.now()
+        start = bucket_start(ts, self.interval)
+        # volume_traded is cumulative for the day; bars get the increment
+        total = tick.get("volume_traded")
+        traded = 0
+        if total is not None:
+            if self._last_volume is not None and total >= self._last_volume:
+                traded = total - self._last_volume
+            self._last_volume = total
+
+        bar = self._bar
+        if bar is None or (self._bar_start is not None and start > self._bar_start):
+            if bar is not None:
+                for indicator in self.indicators:
+                    indicator.update(bar)
+            self._bar = [price, price, price, price, traded, start.date().isoformat()]
+            self._bar_start = start
+        else:
+            bar[HIGH] = max(bar[HIGH], price)
+            bar[LOW] = min(bar[LOW], price)
+            bar[CLOSE] = price
+            bar[VOLUME] += traded
+            if self._bar_start is None:
+                self._bar_start = start
+        return self.snapshot()
+
+    def snapshot(self) -> Optional[dict]:
+        if self._bar is None:
+            return None
+        return {
+            "instrument_token": self.token,
+            "interval": self.interval,
+            "indicators": self.spec,
+            "bar_start": self._bar_start.isoformat() if self._bar_start else None,
+            "close": self._bar[CLOSE],
+            "values": {ind.label: _jsonable(ind.peek(self._bar)) for ind in self.indicators},
+        }
+
+
+class IndicatorHub:
+    """Shared live streams and which /ws/ticks clients watch them.
+
+    Used only from the event loop, so it needs no locking.
+    """
+
+    def __init__(self):
+        self.streams: Dict[tuple, IndicatorStream] = {}
+        self.watchers: Dict[tuple, set] = {}
+        self._by_token: Dict[Tuple[str, int], List[IndicatorStream]] = {}
+
+    def get(self, key: tuple) -> Optional[IndicatorStream]:
+        return self.streams.get(key)
+
+    def add(self, stream: IndicatorStream, client) -> IndicatorStream:
+        """Register `client` on a stream (reusing an existing one for the key)."""
+        existing = self.streams.get(stream.key)
+        if existing is None:
+            existing = self.streams[stream.key] = stream
+            self._by_token.setdefault((stream.account_id, stream.token), []).append(stream)
+        self.watchers.setdefault(stream.key, set()).add(client)
+        return existing
+
+    def remove(self, client, key: Optional[tuple] = None):
+        """Drop a client from one stream, or from all of them."""
+        for stream_key in [key] if key else list(self.watchers):
+            watchers = self.watchers.get(stream_key)
+            if not watchers:
+                continue
+            watchers.discard(client)
+            if not watchers:
+                del self.watchers[stream_key]
+                stream = self.streams.pop(stream_key)
+                token_streams = self._by_token[(stream.account_id, stream.token)]
+                token_streams.remove(stream)
+                if not token_streams:
+                    del self._by_token[(stream.account_id, stream.token)]
+
+    def on_ticks(self, ticks: List[dict], account_id: str) -> List[Tuple[set, dict]]:
+        """Update `account_id`'s streams for these ticks; returns (watchers, payload) pairs."""
+        if not self._by_token:
+            return []
+        updates = {}
+        for tick in ticks:
+            for stream in self._by_token.get((account_id, tick.get("instrument_token")), ()):
+                payload = stream.on_tick(tick)
+                if payload is not None:
+                    updates[stream.key] = payload  # Latest per stream in this batch
+        return [(self.watchers.get(key, set()), payload) for key, payload in updates.items()]
+
+
+def default_days(interval: str) -> int:
+    """History to load so long periods are warmed up (e.g. ema:200)."""
+    return 365 if interval == "day" else 5
+
+
+def load_history(kite, instrument_token: int, interval: str, days: int) -> List[dict]:
+    """Historical candles for seeding a stream (blocking Kite call)."""
+    to_date = datetime.now()
+    return kite.historical_data(
+        instrument_token=instrument_token,
+        from_date=to_date - timedelta(days=days),
+        to_date=to_date,
+        interval=interval,
+    )
+
+
+indicator_hub = IndicatorHub()
+# Batch results for /candles, keyed by (token, interval, days, spec)
+indicator_cache = TTLCache("indicators", ttl=30.0, maxsize=256)
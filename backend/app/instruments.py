@@ -0,0 +1,111 @@
+"""
+Cached instrument metadata for local pre-trade checks.
+
+- Tick size, lot size and instrument token per `EXCHANGE:SYMBOL`, from
+  Kite's instrument master (`kite.instruments(exchange)`, one CSV dump per
+  exchange). Loaded in the background once a session is valid and again on
+  the first lookup after the IST date changes; lookups never wait for it.
+- Circuit limits per instrument, recorded whenever a full quote passes
+  through (`upper_circuit_limit`/`lower_circuit_limit`). Limits are set per
+  trading day, so entries from an earlier IST date are ignored.
+
+Both are account-independent and shared by every account.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+# Exchanges loaded as soon as a session is valid
+WARM_EXCHANGES = ("NSE",)
+
+
+def _today():
+    return datetime.now(IST).date()
+
+
+class InstrumentMeta:
+    __slots__ = ("instrument_token", "tick_size", "lot_size", "segment")
+
+    def __init__(self, instrument_token: int, tick_size: float, lot_size: int, segment: str):
+        self.instrument_token = instrument_token
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.segment = segment
+
+
+class InstrumentMaster:
+    """Instrument metadata per exchange, refreshed once per trading day."""
+
+    def __init__(self):
+        self._meta: Dict[str, InstrumentMeta] = {}
+        self._loaded: Dict[str, object] = {}  # exchange -> IST date loaded
+        self._loading = set()
+        self._lock = threading.Lock()
+        # `EXCHANGE:SYMBOL` -> (lower, upper, IST date)
+        self._circuits: Dict[str, Tuple[float, float, object]] = {}
+
+    def load(self, kite, exchange: str) -> int:
+        """Download one exchange's instrument dump (blocking)."""
+        rows = kite.instruments(exchange)
+        meta = {
+            f"{row['exchange']}:{row['tradingsymbol']}": InstrumentMeta(
+                int(row["instrument_token"]), float(row.get("tick_size") or 0.0),
+                int(row.get("lot_size") or 1), row.get("segment", "")
+            )
+            for row in rows
+        }
+        with self._lock:
+            self._meta.update(meta)
+            self._loaded[exchange] = _today()
+        logger.info(f"Instrument master loaded for {exchange}: {len(meta)} instruments")
+        return len(meta)
+
+    def refresh_async(self, kite, exchange: str):
+        """Load an exchange in a background thread unless current or in progress."""
+        with self._lock:
+            if self._loaded.get(exchange) == _today() or exchange in self._loading:
+                return
+            self._loading.add(exchange)
+
+        def run():
+            try:
+                self.load(kite, exchange)
+            except Exception as e:
+                logger.warning(f"Could not load instrument master for {exchange}: {e}")
+            finally:
+                with self._lock:
+                    self._loading.discard(exchange)
+
+        threading.Thread(target=run, name=f"instruments-{exchange}", daemon=True).start()
+
+    def get(self, exchange: str, symbol: str) -> Optional[InstrumentMeta]:
+        return self._meta.get(f"{exchange}:{symbol}")
+
+    def is_current(self, exchange: str) -> bool:
+        return self._loaded.get(exchange) == _today()
+
+    def record_circuit_limits(self, exchange: str, symbol: str, quote: dict):
+        lower = quote.get("lower_circuit_limit")
+        upper = quote.get("upper_circuit_limit")
+        if lower and upper:
+            self._circuits[f"{exchange}:{symbol}"] = (float(lower), float(upper), _today())
+
+    def circuit_limits(self, exchange: str, symbol: str) -> Optional[Tuple[float, float]]:
+        entry = self._circuits.get(f"{exchange}:{symbol}")
+        if entry is None or entry[2] != _today():
+            return None
+        return entry[0], entry[1]
+
+    def info(self) -> dict:
+        return {
+            "instruments": len(self._meta),
+            "exchanges": {exchange: str(day) for exchange, day in list(self._loaded.items())},
+            "circuit_limits": len(self._circuits),
+        }
+
+
+instrument_master = InstrumentMaster()
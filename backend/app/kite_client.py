@@ -1,7 +1,17 @@
+import asyncio
 import os
-from kiteconnect import KiteConnect
+import threading
+import time
 import logging
 from dotenv import load_dotenv
+from app.accounts import DEFAULT_ACCOUNT, validate_account_id
+from app.instruments import WARM_EXCHANGES, instrument_master
+from app.kite_http import InstrumentedKiteConnect
+from app.lanes import ORDER_LANE_WORKERS, order_lane
+from app.observability.metrics import cache_counters
+from app.observability.order_latency import order_latency
+from app.pretrade import check_order
+from app.rate_limiter import RateLimiter
 from app.security.vault import CredentialVault
 
 load_dotenv()
@@ -10,41 +20,149 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Kite allows 10 order requests/second per API key
+ORDER_RATE_LIMIT = 10
+# ...and about 3 historical data requests/second
+HISTORICAL_RATE_LIMIT = 3
+# Upper bound on legs of one basket in flight on the order lane, leaving
+# workers free for single orders queued behind it
+BASKET_MAX_CONCURRENCY = ORDER_LANE_WORKERS // 2
+# How long session-bound requests wait for background startup to finish
+SESSION_WAIT_SECONDS = 5.0
+# Idle connections to Kite are dropped after ~60s; refresh the order one sooner
+ORDER_KEEPALIVE_SECONDS = 30.0
+
+# Startup phases reported by the readiness endpoint
+PHASE_STARTING = "starting"
+PHASE_CREDENTIALS_LOADED = "credentials-loaded"
+PHASE_SESSION_VALID = "session-valid"
+PHASE_SESSION_INVALID = "session-invalid"
+
+_token_cache_hit, _token_cache_miss = cache_counters("instrument_token")
+
+# Instrument tokens are account-independent, so every account shares one cache
+_instrument_tokens = {}
+
 class KiteClient:
-    _instance = None
+    """Per-account Kite session; one instance per account id (registry singleton)."""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(KiteClient, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    def __new__(cls, account_id=DEFAULT_ACCOUNT):
+        instance = cls._instances.get(account_id)
+        if instance is None:
+            validate_account_id(account_id)
+            with cls._instances_lock:
+                instance = cls._instances.get(account_id)
+                if instance is None:
+                    instance = super(KiteClient, cls).__new__(cls)
+                    instance._initialize(account_id)
+                    cls._instances[account_id] = instance
+        return instance
 
-    def _initialize(self):
-        self.api_key = os.getenv("KITE_API_KEY")
-        self.api_secret = os.getenv("KITE_API_SECRET")
+    @classmethod
+    def accounts(cls):
+        """All account clients created in this process."""
+        return list(cls._instances.values())
+
+    def _initialize(self, account_id):
+        self.account_id = account_id
+        # Environment credentials only apply to the default account
+        is_default = account_id == DEFAULT_ACCOUNT
+        self.api_key = os.getenv("KITE_API_KEY") if is_default else None
+        self.api_secret = os.getenv("KITE_API_SECRET") if is_default else None
         self.access_token = None
         self.kite = None
-        self._token_cache = {}  # Cache for instrument tokens
+        self._token_cache = _instrument_tokens  # Shared instrument token cache
+        self.order_limiter = RateLimiter(ORDER_RATE_LIMIT)
+        self.historical_limiter = RateLimiter(HISTORICAL_RATE_LIMIT)
 
-        # Try env vars first, then fall back to vault
-        if not self.api_key or not self.api_secret:
-            try:
-                creds = CredentialVault.load()
-                self.api_key = creds["api_key"]
-                self.api_secret = creds["api_secret"]
-                logger.info("Credentials loaded from vault.")
-            except Exception:
-                logger.warning("No credentials found in environment or vault.")
-
-        if self.api_key and self.api_secret:
-            try:
-                self.kite = KiteConnect(api_key=self.api_key)
-                logger.info("KiteConnect initialized.")
+        # Vault decryption and session validation run in start_background_init()
+        self.phase = PHASE_STARTING
+        self._ready = threading.Event()
+        self._bootstrap_thread = None
+        self._bootstrap_lock = threading.Lock()
+        self._keepalive_thread = None
 
-                # Try to restore session from vault (auto-restore)
-                self._try_restore_session()
-            except Exception as e:
-                logger.error(f"Failed to initialize KiteConnect: {e}")
+    def start_background_init(self):
+        """Load credentials and validate the saved session off the startup path.
+
+        Safe to call more than once; only the first call starts the thread.
+        """
+        with self._bootstrap_lock:
+            if self._bootstrap_thread is None:
+                self._bootstrap_thread = threading.Thread(
+                    target=self._bootstrap, name=f"kite-bootstrap-{self.account_id}", daemon=True
+                )
+                self._bootstrap_thread.start()
+
+    def _bootstrap(self):
+        try:
+            # Try env vars first, then fall back to vault
+            if not self.api_key or not self.api_secret:
+                try:
+                    creds = CredentialVault.load(self.account_id)
+                    self.api_key = creds["api_key"]
+                    self.api_secret = creds["api_secret"]
+                    logger.info("Credentials loaded from vault.")
+                except Exception:
+                    logger.warning("No credentials found in environment or vault.")
+
+            if self.api_key and self.api_secret and self.kite is None:
+                try:
+                    self.kite = InstrumentedKiteConnect(api_key=self.api_key)
+                    logger.info("KiteConnect initialized.")
+                    self.phase = PHASE_CREDENTIALS_LOADED
+
+                    # Try to restore session from vault (auto-restore)
+                    self._try_restore_session()
+                except Exception as e:
+                    logger.error(f"Failed to initialize KiteConnect: {e}")
+        finally:
+            self._settle_phase()
+
+    def _settle_phase(self):
+        """Record the session outcome and release waiting requests."""
+        self.phase = PHASE_SESSION_VALID if self.is_session_active() else PHASE_SESSION_INVALID
+        self._ready.set()
+        if self.phase == PHASE_SESSION_VALID:
+            self._on_session_valid()
+
+    def _on_session_valid(self):
+        """Warm what the order path needs: instrument metadata and the order connection."""
+        for exchange in WARM_EXCHANGES:
+            instrument_master.refresh_async(self.kite, exchange)
+        with self._bootstrap_lock:
+            if self._keepalive_thread is None:
+                self._keepalive_thread = threading.Thread(
+                    target=self._order_keepalive, name=f"order-keepalive-{self.account_id}", daemon=True
+                )
+                self._keepalive_thread.start()
+
+    def _order_keepalive(self):
+        """Keep the order session's connection open while a session is active."""
+        while True:
+            if self.is_session_active():
+                try:
+                    self.kite.warm_order_connection()
+                except Exception as e:
+                    logger.debug(f"Order keep-alive failed: {e}")
+            time.sleep(ORDER_KEEPALIVE_SECONDS)
+
+    def wait_until_ready(self, timeout: float = SESSION_WAIT_SECONDS) -> bool:
+        """Block until background startup finishes (or `timeout` elapses)."""
+        return self._ready.wait(timeout)
+
+    def session_ready(self, timeout: float = SESSION_WAIT_SECONDS) -> bool:
+        """True if a session is active, waiting briefly while startup is in progress."""
+        if not self._ready.is_set():
+            self._ready.wait(timeout)
+        return self.is_session_active()
+
+    def readiness(self) -> dict:
+        """Startup phase for the readiness endpoint."""
+        return {"account_id": self.account_id, "phase": self.phase, "ready": self._ready.is_set()}
     
     def _try_restore_session(self):
         """Attempt to restore session from vault on startup."""
@@ -52,12 +170,12 @@ class KiteClient:
             return
         
         try:
-            saved_token = CredentialVault.load_session()
+            saved_token = CredentialVault.load_session(self.account_id)
             if saved_token:
                 self.access_token = saved_token
                 self.kite.set_access_token(self.access_token)
                 
-                # Validate token by making a lightweight API call
+                # Validate token by making a lightweight API call (network)
                 if self._validate_token():
                     logger.info("Session restored and validated from vault.")
                 else:
@@ -87,7 +205,7 @@ class KiteClient:
         """Clear an invalid/expired session token."""
         self.access_token = None
         try:
-            CredentialVault.delete_session()
+            CredentialVault.delete_session(self.account_id)
             logger.info("Cleared expired session from vault.")
         except Exception as e:
             logger.warning(f"Could not clear session file: {e}")
@@ -104,14 +222,14 @@ class KiteClient:
         self.api_secret = api_secret
 
         if creds_changed:
-            self._token_cache = {}
             self.access_token = None
+            self.phase = PHASE_SESSION_INVALID
             logger.info("Credentials changed — re-configuring KiteClient.")
         else:
             logger.info("Credentials unchanged — preserving existing session.")
 
         try:
-            self.kite = KiteConnect(api_key=self.api_key)
+            self.kite = InstrumentedKiteConnect(api_key=self.api_key)
             if not creds_changed and self.access_token:
                 self.kite.set_access_token(self.access_token)
             logger.info("KiteConnect re-initialized.")
@@ -126,6 +244,7 @@ class KiteClient:
 
     def login(self, request_token):
         """Exchanges request_token for access_token."""
+        self.wait_until_ready()
         if not self.kite:
             raise Exception("Kite client not initialized")
         
@@ -136,12 +255,14 @@ class KiteClient:
             
             # Persist session token to vault for auto-restore
             try:
-                CredentialVault.save_session(self.access_token)
+                CredentialVault.save_session(self.access_token, self.account_id)
                 logger.info("Session token saved to vault.")
             except Exception as ve:
                 logger.warning(f"Could not save session to vault: {ve}")
             
+            self.phase = PHASE_SESSION_VALID
             logger.info("Kite session established successfully.")
+            self._on_session_valid()
             return {"status": "success", "data": data}
         except Exception as e:
             logger.error(f"Error logging in to Kite: {e}")
@@ -150,6 +271,7 @@ class KiteClient:
     def logout(self):
         """Clears session and removes persisted token."""
         self.access_token = None
+        self.phase = PHASE_SESSION_INVALID
         if self.kite:
             try:
                 self.kite.invalidate_access_token(self.access_token)
@@ -158,7 +280,7 @@ class KiteClient:
         
         # Clear persisted session
         try:
-            CredentialVault.delete_session()
+            CredentialVault.delete_session(self.account_id)
             logger.info("Session cleared from vault.")
         except Exception as e:
             logger.warning(f"Could not clear session from vault: {e}")
@@ -175,14 +297,16 @@ class KiteClient:
             return False
         
         try:
-            saved_token = CredentialVault.load_session()
+            saved_token = CredentialVault.load_session(self.account_id)
             if saved_token:
                 self.access_token = saved_token
                 self.kite.set_access_token(self.access_token)
                 
                 # Validate the restored token
                 if self._validate_token():
+                    self.phase = PHASE_SESSION_VALID
                     logger.info("Session manually restored and validated from vault.")
+                    self._on_session_valid()
                     return True
                 else:
                     logger.warning("Stored session token is expired during manual restore.")
@@ -192,6 +316,35 @@ class KiteClient:
             logger.warning(f"Could not restore session: {e}")
         return False
 
+    def sync_from_vault(self) -> bool:
+        """Adopt credentials and a session saved to the vault by another worker.
+
+        The shared-feed owner (app/feed.py) holds the ticker connections, but
+        the login that created the session may have happened in a follower.
+        Returns whether a session is active afterwards.
+        """
+        try:
+            creds = CredentialVault.load(self.account_id)
+        except Exception:
+            creds = None
+        if creds and (creds["api_key"], creds["api_secret"]) != (self.api_key, self.api_secret):
+            self.api_key, self.api_secret = creds["api_key"], creds["api_secret"]
+            self.kite = None
+            self.access_token = None
+        if self.kite is None and self.api_key:
+            self.kite = InstrumentedKiteConnect(api_key=self.api_key)
+        try:
+            saved_token = CredentialVault.load_session(self.account_id)
+        except Exception:
+            saved_token = None
+        if saved_token and saved_token != self.access_token:
+            self.restore_session_from_vault()
+        return self.is_session_active()
+
+    def cached_instrument_token(self, symbol, exchange="NSE"):
+        """Instrument token if already known, without any API call."""
+        return self._token_cache.get(f"{exchange}:{symbol}")
+
     def get_instrument_token(self, symbol, exchange="NSE"):
         """Fetches and caches instrument token for a symbol."""
         if not self.kite:
@@ -201,7 +354,9 @@ class KiteClient:
         
         # Check cache first
         if instrument in self._token_cache:
+            _token_cache_hit.inc()
             return self._token_cache[instrument]
+        _token_cache_miss.inc()
             
         try:
             # Fetch from LTP API (lightweight)
@@ -218,17 +373,35 @@ class KiteClient:
             logger.error(f"Error fetching token for {symbol}: {e}")
             raise e
 
-    def place_order(self, symbol, quantity, price, transaction_type, exchange="NSE"):
-        """Places an order."""
-        if not self.kite or not self.access_token:
+    def place_order(self, symbol, quantity, price, transaction_type, exchange="NSE", trace=None):
+        """Places an order.
+
+        The order is validated locally first (app/pretrade.py): off-tick
+        prices are aligned to the tick grid, and orders that would be
+        rejected raise PreTradeRejected without using order rate budget.
+
+        `trace` is an optional `OrderTrace`; Kite call start/end are stamped
+        on it and the trace is completed with the order_id or error.
+        """
+        if not self.session_ready():
+            if trace:
+                order_latency.complete(trace, error="session not active")
             raise Exception("Kite session not active. Please login first.")
 
         try:
             # Determine transaction type
             trans_type = self.kite.TRANSACTION_TYPE_BUY if transaction_type.upper() == "BUY" else self.kite.TRANSACTION_TYPE_SELL
             
-            # Round price to tick size (0.01 for most instruments)
-            rounded_price = round(price, 2)
+            # Tick size, lot size and circuit band from cached metadata
+            checked = check_order(symbol, exchange, transaction_type, quantity, price)
+            if not instrument_master.is_current(exchange):
+                instrument_master.refresh_async(self.kite, exchange)
+
+            # Stay inside Kite's per-key order rate budget
+            self.order_limiter.acquire()
+
+            if trace:
+                trace.mark("kite_start")
             
             # Simple Limit Order Logic for now
             order_id = self.kite.place_order(
@@ -239,20 +412,127 @@ class KiteClient:
                 quantity=quantity,
                 product=self.kite.PRODUCT_CNC,  # CNC for delivery/cash & carry
                 order_type=self.kite.ORDER_TYPE_LIMIT,
-                price=rounded_price,
+                price=checked.price,
                 validity=self.kite.VALIDITY_DAY
             )
+
+            if trace:
+                order_latency.complete(trace, order_id=order_id)
             
             logger.info(f"Order placed successfully. ID: {order_id}")
-            return {"status": "success", "order_id": order_id}
+            result = {"status": "success", "order_id": order_id}
+            if checked.adjustments:
+                result["price"] = checked.price
+                result["adjustments"] = [a.to_dict() for a in checked.adjustments]
+            return result
 
         except Exception as e:
+            if trace:
+                order_latency.complete(trace, error=str(e))
             logger.error(f"Error placing order: {e}")
             raise e
 
+    def cancel_order(self, order_id, variety=None):
+        """Cancels an open order."""
+        if not self.session_ready():
+            raise Exception("Kite session not active. Please login first.")
+
+        try:
+            self.order_limiter.acquire()
+            self.kite.cancel_order(
+                variety=variety or self.kite.VARIETY_REGULAR,
+                order_id=order_id
+            )
+            logger.info(f"Order cancelled. ID: {order_id}")
+            return {"status": "cancelled", "order_id": order_id}
+        except Exception as e:
+            logger.error(f"Error cancelling order {order_id}: {e}")
+            raise e
+
+    def modify_order(self, order_id, quantity=None, price=None, variety=None):
+        """Changes the quantity and/or price of an open order."""
+        if not self.session_ready():
+            raise Exception("Kite session not active. Please login first.")
+
+        try:
+            self.order_limiter.acquire()
+            self.kite.modify_order(
+                variety=variety or self.kite.VARIETY_REGULAR,
+                order_id=order_id,
+                quantity=quantity,
+                price=price
+            )
+            logger.info(f"Order modified. ID: {order_id}")
+            return {"status": "modified", "order_id": order_id}
+        except Exception as e:
+            logger.error(f"Error modifying order {order_id}: {e}")
+            raise e
+
+    async def place_basket(self, legs, all_or_cancel=False):
+        """Places several orders concurrently and reports per-leg results.
+
+        Each leg is a dict with the `place_order` arguments. Legs are queued
+        on the order lane, at most BASKET_MAX_CONCURRENCY at a time, and share
+        the order rate limiter, so a basket never exceeds Kite's order budget
+        or holds every lane worker. Called from the event loop; nothing waits
+        on a worker thread. With `all_or_cancel`, the first failure stops legs
+        that have not started yet and cancels those already placed.
+        """
+        if not await order_lane.run(self.session_ready):
+            raise Exception("Kite session not active. Please login first.")
+
+        abort = threading.Event()
+
+        def place_leg(leg, trace):
+            trace.mark("dequeued")
+            if all_or_cancel and abort.is_set():
+                return {"status": "skipped", "error": "Basket aborted after a failed leg"}
+            try:
+                response = self.place_order(**leg, trace=trace)
+                return {"status": "success", "order_id": response["order_id"]}
+            except Exception as e:
+                abort.set()
+                return {"status": "error", "error": str(e)}
+
+        window = asyncio.Semaphore(BASKET_MAX_CONCURRENCY)
+
+        async def run_leg(leg):
+            trace = order_latency.start(leg["symbol"])
+            async with window:
+                return await order_lane.run(place_leg, leg, trace)
+
+        outcomes = await asyncio.gather(*(run_leg(leg) for leg in legs))
+        results = [
+            {"index": index, "symbol": leg["symbol"], **result}
+            for index, (leg, result) in enumerate(zip(legs, outcomes))
+        ]
+
+        failed = any(r["status"] == "error" for r in results)
+
+        if all_or_cancel and failed:
+            placed = [r for r in results if r["status"] == "success"]
+            cancels = await asyncio.gather(
+                *(order_lane.run(self.cancel_order, r["order_id"]) for r in placed),
+                return_exceptions=True
+            )
+            for result, cancel in zip(placed, cancels):
+                if isinstance(cancel, Exception):
+                    result["cancel_error"] = str(cancel)
+                else:
+                    result["status"] = "cancelled"
+            return {"status": "cancelled", "results": results}
+
+        if not failed:
+            status = "success"
+        elif any(r["status"] == "success" for r in results):
+            status = "partial"
+        else:
+            status = "failed"
+        return {"status": status, "results": results}
+
     def get_orders(self):
         """Fetches all orders for the day."""
-        if not self.kite or not self.access_token:
+        if not self.session_ready():
             raise Exception("Kite session not active")
         
         try:
@@ -264,7 +544,7 @@ class KiteClient:
 
     def get_positions(self):
         """Fetches current positions."""
-        if not self.kite or not self.access_token:
+        if not self.session_ready():
              raise Exception("Kite session not active")
         
         try:
@@ -275,7 +555,7 @@ class KiteClient:
 
     def get_holdings(self):
         """Fetches portfolio holdings (long-term investments)."""
-        if not self.kite or not self.access_token:
+        if not self.session_ready():
             raise Exception("Kite session not active")
         
         try:
@@ -286,7 +566,7 @@ class KiteClient:
 
     def get_margins(self):
         """Fetches available margins."""
-        if not self.kite or not self.access_token:
+        if not self.session_ready():
             raise Exception("Kite session not active")
 
         try:
@@ -318,7 +598,7 @@ class KiteClient:
 
     def get_order_status(self, order_id):
         """Fetches order status and history."""
-        if not self.kite or not self.access_token:
+        if not self.session_ready():
             raise Exception("Kite session not active")
         
         try:
@@ -0,0 +1,178 @@
+"""
+Instrumented KiteConnect transport.
+
+Every Kite REST call - whether made through `KiteClient` methods or directly
+via `kite_client.kite.*` in route modules - ends up in
+`KiteConnect._request`. Overriding that single method gives per endpoint
+class call counts, latency and error codes without touching call sites.
+
+The same hook bounds each call: per endpoint class timeouts, a circuit
+breaker per class (see app/circuit_breaker.py) and jittered retries of
+idempotent (GET) reads on transient errors. Orders are never retried.
+
+Order calls use their own `requests.Session` (`order_session`), so they
+never wait for a pooled connection held by a slow historical or portfolio
+call; `warm_order_connection` opens/refreshes its TLS connection ahead of
+the first order and keeps it from idling out.
+"""
+import logging
+import random
+import threading
+import time
+import requests
+from kiteconnect import KiteConnect
+from app.circuit_breaker import CircuitOpenError, breaker_for, is_transient
+from app.observability.metrics import kite_errors, kite_request_duration, kite_requests, kite_retries
+
+# Kite route-name prefix -> endpoint class (longest prefix wins)
+ENDPOINT_CLASSES = {
+    "order.margins": "margins",
+    "order": "orders",
+    "orders": "orders",
+    "trades": "orders",
+    "gtt": "orders",
+    "market.historical": "historical",
+    "market.quote": "quote",
+    "market.instruments": "instruments",
+    "market.margins": "margins",
+    "portfolio": "portfolio",
+    "user.margins": "portfolio",
+    "user.profile": "session",
+    "api.token": "session",
+    "mf": "mutual_funds",
+}
+
+# Request timeout (seconds) per endpoint class; others keep KiteConnect's 7s
+ENDPOINT_TIMEOUTS = {
+    "quote": 2.0,
+    "margins": 3.0,
+    "portfolio": 3.0,
+    "session": 5.0,
+    "historical": 5.0,
+    "instruments": 15.0,
+}
+# Connections kept open to the order endpoint (one per order lane worker)
+ORDER_POOL_SIZE = 4
+MAX_READ_RETRIES = 2
+RETRY_BASE_SECONDS = 0.1
+RETRY_CAP_SECONDS = 0.5
+
+logger = logging.getLogger(__name__)
+
+_PREFIXES = sorted(ENDPOINT_CLASSES, key=len, reverse=True)
+_route_classes = {}
+
+
+def endpoint_class(route: str) -> str:
+    """Map a KiteConnect route name (e.g. `market.quote.ltp`) to its class."""
+    cached = _route_classes.get(route)
+    if cached is None:
+        cached = "other"
+        for prefix in _PREFIXES:
+            if route == prefix or route.startswith(prefix + "."):
+                cached = ENDPOINT_CLASSES[prefix]
+                break
+        _route_classes[route] = cached
+    return cached
+
+
+def _error_code(error: Exception) -> str:
+    code = getattr(error, "code", None)
+    return str(code) if code else type(error).__name__
+
+
+# Timeout and HTTP session overrides for the call running on this thread
+_call = threading.local()
+
+
+class InstrumentedKiteConnect(KiteConnect):
+    """KiteConnect that records metrics for every REST call."""
+
+    # KiteConnect reads self.timeout on every request; a per-thread override
+    # gives each call its endpoint class timeout without racing other threads
+    @property
+    def timeout(self):
+        return getattr(_call, "timeout", None) or self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+
+    # Same per-thread trick for the HTTP session: order calls use order_session
+    @property
+    def reqsession(self):
+        return getattr(_call, "session", None) or self._reqsession
+
+    @reqsession.setter
+    def reqsession(self, value):
+        self._reqsession = value
+
+    @property
+    def order_session(self) -> requests.Session:
+        session = self.__dict__.get("_order_session")
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=ORDER_POOL_SIZE
+            ))
+            session = self.__dict__.setdefault("_order_session", session)
+        return session
+
+    def warm_order_connection(self) -> bool:
+        """Open (or keep alive) the order session's connection to Kite.
+
+        Any response will do - the point is the established TLS connection
+        left in the pool for the next order.
+        """
+        try:
+            self.order_session.head(self.root, timeout=ENDPOINT_TIMEOUTS["session"],
+                                    verify=not self.disable_ssl, proxies=self.proxies)
+            return True
+        except Exception as e:
+            logger.debug(f"Order connection warm-up failed: {e}")
+            return False
+
+    def _request(self, route, method, *args, **kwargs):
+        endpoint = endpoint_class(route)
+        breaker = breaker_for(endpoint)
+        retries = MAX_READ_RETRIES if method == "GET" else 0
+        _call.timeout = ENDPOINT_TIMEOUTS.get(endpoint)
+        _call.session = self.order_session if endpoint == "orders" else None
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    breaker.before_call()
+                except CircuitOpenError:
+                    kite_requests.labels(endpoint, "rejected").inc()
+                    raise
+                try:
+                    result = self._timed_request(endpoint, route, method, *args, **kwargs)
+                except Exception as e:
+                    if not is_transient(e):
+                        breaker.record_success()  # Upstream answered
+                        raise
+                    breaker.record_failure()
+                    if attempt == retries:
+                        raise
+                    kite_retries.labels(endpoint).inc()
+                    # Full jitter so parallel callers don't retry in lockstep
+                    time.sleep(random.uniform(0, min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)))
+                    continue
+                breaker.record_success()
+                return result
+        finally:
+            _call.timeout = None
+            _call.session = None
+
+    def _timed_request(self, endpoint, route, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = super()._request(route, method, *args, **kwargs)
+        except Exception as e:
+            kite_requests.labels(endpoint, "error").inc()
+            kite_errors.labels(endpoint, _error_code(e)).inc()
+            raise
+        finally:
+            kite_request_duration.labels(endpoint).observe(time.perf_counter() - start)
+        kite_requests.labels(endpoint, "ok").inc()
+        return result
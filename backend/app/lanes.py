@@ -0,0 +1,111 @@
+"""
+Isolated execution lanes for blocking Kite calls.
+
+Sync FastAPI routes all share anyio's default threadpool, so a burst of slow
+`historical_data` or portfolio calls can leave an order waiting for a free
+worker. Each lane is a size-limited executor of its own:
+
+- `order_lane`        order placement, modification and cancellation
+- `market_data_lane`  quotes, LTPs, depth, candles and stored history
+- `portfolio_lane`    holdings, positions, margins and order book reads
+
+A full lane queues its own work without touching the others. Time spent
+queued before a worker picks a task up is recorded per lane
+(`tradexr_lane_queue_seconds`, `/metrics/lanes`).
+
+Route handlers opt in with `@on_lane(lane)` under the router decorator; the
+handler keeps its sync body and signature, FastAPI sees an async endpoint.
+Orders additionally use a dedicated keep-alive HTTP session (see
+`InstrumentedKiteConnect.order_session`).
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+from app.observability.histogram import LatencyHistogram
+from app.observability.metrics import lane_queue_seconds
+from app.observability.prometheus import REGISTRY
+
+ORDER_LANE_WORKERS = 4
+MARKET_DATA_LANE_WORKERS = 8
+PORTFOLIO_LANE_WORKERS = 4
+
+
+class Lane:
+    """A named executor that records how long tasks wait for a worker."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"lane-{name}")
+        self.queue_time = LatencyHistogram()
+        self.queued = 0
+        self.active = 0
+        self._queue_metric = lane_queue_seconds.labels(name)
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        submitted = time.perf_counter_ns()
+        with self._lock:
+            self.queued += 1
+
+        def run():
+            waited = time.perf_counter_ns() - submitted
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+            self.queue_time.record_ns(waited)
+            self._queue_metric.observe(waited / 1e9)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        return self.executor.submit(run)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking call on this lane from the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def info(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "active": self.active,
+            "queued": self.queued,
+            "queue_time": self.queue_time.summary(),
+        }
+
+
+order_lane = Lane("orders", ORDER_LANE_WORKERS)
+market_data_lane = Lane("market_data", MARKET_DATA_LANE_WORKERS)
+portfolio_lane = Lane("portfolio", PORTFOLIO_LANE_WORKERS)
+LANES: Dict[str, Lane] = {lane.name: lane for lane in (order_lane, market_data_lane, portfolio_lane)}
+
+
+def on_lane(lane: Lane):
+    """Run a sync route handler on `lane` instead of the shared threadpool."""
+    def decorate(handler):
+        @functools.wraps(handler)  # FastAPI reads the wrapped signature
+        async def endpoint(*args, **kwargs):
+            return await lane.run(handler, *args, **kwargs)
+        return endpoint
+    return decorate
+
+
+def lane_status() -> dict:
+    return {name: lane.info() for name, lane in LANES.items()}
+
+
+REGISTRY.callback(
+    "tradexr_lane_tasks",
+    "Tasks per execution lane by state (active/queued).",
+    ("lane", "state"),
+    lambda: {
+        key: value
+        for name, lane in LANES.items()
+        for key, value in (((name, "active"), lane.active), ((name, "queued"), lane.queued))
+    },
+)
@@ -10,11 +10,22 @@ The backend serves as a bridge between the TradeXR frontend and the
 Zerodha Kite Connect API, handling authentication, order placement,
 and real-time market data streaming.
 """
-from fastapi import FastAPI
+import hmac
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 import os
-from app.routes import orders, config, quote, websocket, vault, session
+from app.accounts import DEFAULT_ACCOUNT
+from app.admission import AdmissionMiddleware
+from app.feed import start_shared_feed
+from app.kite_client import KiteClient
+from app.prefetch import prefetch_scheduler
+from app.security.vault import CredentialVault
+from app.observability.metrics import http_request_duration
+from app.observability.profiler import profiler_manager
+from app.routes import orders, config, quote, websocket, vault, session, metrics, admin, history, alerts
 
 # Load environment variables from .env file
 load_dotenv()
@@ -26,6 +37,9 @@ app = FastAPI(
     version="0.1.0"
 )
 
+# Per route class concurrency limits; added before CORS so CORS wraps its 503s
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS to allow frontend origins
 # In production, replace with specific allowed origins
 app.add_middleware(
@@ -36,6 +50,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency per route template (not per concrete path)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        http_request_duration.labels(request.method, path, status).observe(
+            time.perf_counter() - start
+        )
+
+if profiler_manager.enabled:
+    # Only installed when ADMIN_TOKEN is set, so it costs nothing otherwise
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """Sample all threads for the duration of requests sent with `X-Profile`."""
+        token = request.headers.get("x-profile")
+        if not token or not hmac.compare_digest(token, profiler_manager.admin_token):
+            return await call_next(request)
+
+        profiler = profiler_manager.start_request_profile(f"{request.method} {request.url.path}")
+        if profiler is None:
+            return await call_next(request)
+        try:
+            response = await call_next(request)
+        finally:
+            profiler_manager.finish_request_profile(profiler)
+        response.headers["X-Profile-Id"] = profiler.profile_id
+        return response
+
 # Register API routers
 app.include_router(orders.router)   # Kite order management
 app.include_router(config.router)   # API configuration
@@ -43,9 +92,32 @@ app.include_router(quote.router)    # Market data quotes
 app.include_router(websocket.router) # Real-time tick streaming
 app.include_router(vault.router)    # Encrypted credential storage
 app.include_router(session.router)  # Session management
+app.include_router(metrics.router)  # Latency metrics
+app.include_router(admin.router)    # Profiling and diagnostics
+app.include_router(history.router)  # Historical backfill
+app.include_router(alerts.router)   # Price alerts
+
+
+@app.on_event("startup")
+def start_background_init():
+    """Load credentials and validate sessions without delaying startup."""
+    start_shared_feed()
+    for account_id in {DEFAULT_ACCOUNT, *CredentialVault.list_accounts()}:
+        KiteClient(account_id).start_background_init()
+    prefetch_scheduler.start()
 
 
 @app.get("/")
 def read_root():
     """Health check endpoint - returns server status."""
     return {"status": "ok", "message": "TradeXR Backend Running"}
+
+
+@app.get("/ready")
+def readiness():
+    """Readiness probe - 503 until credential/session startup has finished.
+
+    phase: starting | credentials-loaded | session-valid | session-invalid
+    """
+    state = KiteClient().readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
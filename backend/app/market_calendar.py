@@ -0,0 +1,115 @@
+"""
+NSE trading calendar.
+
+The equity session runs 09:15-15:30 IST on weekdays that are not exchange
+holidays. Kite does not publish the holiday list, so it comes from
+`NSE_HOLIDAYS` (comma-separated ISO dates from the exchange's yearly
+circular); without it every weekday is a trading day.
+
+`cache_ttl` stretches cache lifetimes for instruments on NSE hours while
+prices are settled: from SETTLE_TIME (after the 15:30-15:40 closing price
+and 15:40-16:00 post-close sessions) until the next pre-open at PRE_OPEN,
+so off-hours traffic is served from cache. Between the close and the
+settle point and during the pre-open (which moves the indicative price)
+entries keep their normal TTLs. MCX and currency instruments keep their
+normal TTLs (their sessions run later).
+"""
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+# Pre-open call auction (09:00-09:15) and the end of the post-close session
+PRE_OPEN = time(9, 0)
+SETTLE_TIME = time(16, 0)
+# Exchanges that follow the NSE equity session
+CALENDAR_EXCHANGES = ("NSE", "BSE", "NFO", "BFO")
+
+
+def _parse_holidays(value: str) -> Set[date]:
+    holidays = set()
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            holidays.add(date.fromisoformat(item))
+        except ValueError:
+            logger.warning(f"Ignoring invalid NSE_HOLIDAYS date {item!r}")
+    return holidays
+
+
+HOLIDAYS = _parse_holidays(os.getenv("NSE_HOLIDAYS") or "")
+
+
+def now_ist() -> datetime:
+    return datetime.now(IST)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in HOLIDAYS
+
+
+def session_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Open and close of `day`'s session (whether or not it is a trading day)."""
+    return (datetime.combine(day, SESSION_OPEN, IST), datetime.combine(day, SESSION_CLOSE, IST))
+
+
+def is_open(now: Optional[datetime] = None) -> bool:
+    now = now or now_ist()
+    if not is_trading_day(now.date()):
+        return False
+    open_at, close_at = session_bounds(now.date())
+    return open_at <= now < close_at
+
+
+def next_open(now: Optional[datetime] = None) -> datetime:
+    """Start of the next session that has not opened yet."""
+    now = now or now_ist()
+    day = now.date()
+    if is_trading_day(day) and now < session_bounds(day)[0]:
+        return session_bounds(day)[0]
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return session_bounds(day)[0]
+
+
+def seconds_until_open(now: Optional[datetime] = None) -> float:
+    now = now or now_ist()
+    return (next_open(now) - now).total_seconds()
+
+
+def is_settled(now: Optional[datetime] = None) -> bool:
+    """Whether prices are final until the next pre-open (after SETTLE_TIME or before PRE_OPEN)."""
+    now = now or now_ist()
+    day = now.date()
+    if not is_trading_day(day):
+        return True
+    return now < datetime.combine(day, PRE_OPEN, IST) or now >= datetime.combine(day, SETTLE_TIME, IST)
+
+
+def cache_ttl(exchange: str, ttl: float) -> float:
+    """`ttl` from the pre-open to the settle point; until the next pre-open while NSE-hours prices are settled."""
+    if exchange not in CALENDAR_EXCHANGES:
+        return ttl
+    now = now_ist()
+    if not is_settled(now):
+        return ttl
+    pre_open = datetime.combine(next_open(now).date(), PRE_OPEN, IST)
+    return max(ttl, (pre_open - now).total_seconds())
+
+
+def status() -> dict:
+    now = now_ist()
+    return {
+        "open": is_open(now),
+        "trading_day": is_trading_day(now.date()),
+        "next_open": next_open(now).isoformat(),
+        "holidays_configured": len(HOLIDAYS),
+    }
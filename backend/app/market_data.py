@@ -0,0 +1,65 @@
+"""
+Cache-filling market data fetches shared by the routes and the prefetch
+scheduler.
+
+- `build_quote`  a `Quote` model from Kite's quote, recording its circuit
+                 limits for the pre-trade checks
+- `warm_quotes`  full quotes for many instruments in one call into the
+                 quote/LTP caches
+- `load_candles` candles of the last N days from the candle cache or Kite
+
+Entries are stored with `cache_ttl`, so closed-market data lives until the
+next pre-open (app/market_calendar.py).
+"""
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from app.backfill import fetch_range
+from app.cache import candle_cache, quote_cache
+from app.instruments import instrument_master
+from app.kite_client import KiteClient
+from app.market_calendar import cache_ttl
+from app.models import CandleSeries, Quote
+
+
+def build_quote(symbol: str, exchange: str, quote: dict) -> Quote:
+    instrument_master.record_circuit_limits(exchange, symbol, quote)
+    return Quote(symbol, exchange, quote)
+
+
+def warm_quotes(kite: KiteClient, instruments: List[Tuple[str, str]]) -> int:
+    """Fetch full quotes for (exchange, symbol) pairs in one call into the quote/LTP caches."""
+    names = [f"{exchange}:{symbol}" for exchange, symbol in instruments]
+    data = kite.kite.quote(names)
+    warmed = 0
+    for (exchange, symbol), name in zip(instruments, names):
+        quote = data.get(name)
+        if quote is None:
+            continue
+        result = build_quote(symbol, exchange, quote)
+        ttl = cache_ttl(exchange, quote_cache.ttl)
+        quote_cache.set(("quote", exchange, symbol), result, ttl)
+        quote_cache.set(("ltp", exchange, symbol), {"symbol": symbol, "exchange": exchange, "ltp": result.ltp}, ttl)
+        warmed += 1
+    return warmed
+
+
+def load_candles(kite: KiteClient, symbol: str, exchange: str, interval: str, days: int) -> CandleSeries:
+    """Candles of the last `days` days, from the candle cache or Kite (raises on failure)."""
+    cache_key = (exchange, symbol, interval, days)
+    result = candle_cache.get(cache_key)
+    if result is not None:
+        return result
+    
+    # Get instrument token (cached)
+    instrument_token = kite.get_instrument_token(symbol, exchange)
+    
+    # Calculate date range
+    to_date = datetime.now()
+    from_date = to_date - timedelta(days=days)
+    
+    # Fetch historical data (split into parallel requests past Kite's per-call range)
+    data = fetch_range(kite, instrument_token, interval, from_date, to_date)
+    
+    result = CandleSeries.from_kite(symbol, exchange, interval, data)
+    candle_cache.set(cache_key, result, cache_ttl(exchange, candle_cache.ttl))
+    return result
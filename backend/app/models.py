@@ -0,0 +1,207 @@
+"""
+Slotted market data models with precomputed wire forms.
+
+Ticks, quotes, candle series and order updates used to travel as dicts that
+were re-keyed and re-serialized by every consumer: once per WebSocket
+client, once per REST request. These models are built once, keep their
+fields in `__slots__` (no per-instance dict) and carry their serialized
+form, so every consumer shares the same object and the same bytes:
+
+- Tick          /ws/ticks form of a tick, built by TickerService at ingest
+                and kept in its replay buffer; `json` is spliced into
+                each client's message. Field values are shared with the
+                Kite tick, not copied. The JSON is encoded on first use
+                (fan-out or snapshot, on the event loop), so the ticker
+                thread never encodes and unwatched ticks never are
+- Quote         /quote/{symbol} response; cache hits send `body` as is
+- CandleSeries  candles in one CANDLE_DTYPE array plus the /candles
+                response `body`
+- OrderUpdate   the order postback fields the backend reads; `json` is
+                relayed to shared-feed followers
+
+Models are never mutated after construction, apart from filling in a
+Tick's JSON. `to_dict()` builds a fresh dict where one is still needed
+(stale responses, indicator input).
+"""
+import json
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from app.backfill import CANDLE_DTYPE, IST, epoch_seconds
+
+# Compact encoding, as Starlette's JSONResponse writes it
+dumps = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Tick:
+    __slots__ = ("instrument_token", "symbol", "last_price", "change", "volume", "ohlc", "timestamp",
+                 "seq", "_json")
+
+    def __init__(self, instrument_token: int, symbol: str, last_price: float, change: float, volume: int,
+                 ohlc: dict, timestamp, seq: Optional[int]):
+        self.instrument_token = instrument_token
+        self.symbol = symbol
+        self.last_price = last_price
+        self.change = change
+        self.volume = volume
+        self.ohlc = ohlc
+        self.timestamp = timestamp
+        self.seq = seq
+        self._json = None
+
+    @property
+    def json(self) -> str:
+        # Encoded once; a race on first use only encodes it twice
+        json = self._json
+        if json is None:
+            json = self._json = dumps(self.to_dict())
+        return json
+
+    @classmethod
+    def from_kite(cls, tick: dict) -> "Tick":
+        return cls(
+            tick.get("instrument_token"),
+            tick.get("tradingsymbol", ""),
+            tick.get("last_price"),
+            tick.get("change", 0),
+            tick.get("volume", 0),
+            tick.get("ohlc", {}),
+            tick.get("timestamp", ""),
+            tick.get("_seq"),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "instrument_token": self.instrument_token,
+            "symbol": self.symbol,
+            "last_price": self.last_price,
+            "change": self.change,
+            "volume": self.volume,
+            "ohlc": self.ohlc,
+            "timestamp": str(self.timestamp),
+            "seq": self.seq,
+        }
+
+
+class Quote:
+    __slots__ = ("symbol", "exchange", "ltp", "open", "high", "low", "close", "change", "change_percent",
+                 "volume", "upper_circuit", "lower_circuit", "body")
+
+    def __init__(self, symbol: str, exchange: str, quote: dict):
+        ohlc = quote.get("ohlc", {})
+        previous_close = ohlc.get("close", 0)
+        last_price = quote.get("last_price", 0)
+        # Prefer net_change from Kite, else calculate from LTP and previous close
+        net_change = quote.get("net_change", 0)
+        if net_change == 0 and previous_close > 0 and last_price > 0:
+            net_change = last_price - previous_close
+
+        self.symbol = symbol
+        self.exchange = exchange
+        self.ltp = last_price
+        self.open = ohlc.get("open", 0)
+        self.high = ohlc.get("high", 0)
+        self.low = ohlc.get("low", 0)
+        self.close = previous_close
+        self.change = net_change
+        self.change_percent = (net_change / previous_close) * 100 if previous_close > 0 else 0
+        self.volume = quote.get("volume", 0)
+        self.upper_circuit = quote.get("upper_circuit_limit", 0)
+        self.lower_circuit = quote.get("lower_circuit_limit", 0)
+        self.body = dumps(self.to_dict()).encode()
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "ltp": self.ltp,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "change": self.change,
+            "change_percent": self.change_percent,
+            "volume": self.volume,
+            "upper_circuit": self.upper_circuit,
+            "lower_circuit": self.lower_circuit,
+        }
+
+
+def format_candle(i: int, candle: dict) -> dict:
+    """Wire form of one Kite candle (also used when streaming)."""
+    return {
+        "index": i,
+        "date": candle["date"].isoformat() if hasattr(candle["date"], 'isoformat') else str(candle["date"]),
+        "open": candle["open"],
+        "high": candle["high"],
+        "low": candle["low"],
+        "close": candle["close"],
+        "volume": candle["volume"]
+    }
+
+
+class CandleSeries:
+    __slots__ = ("symbol", "exchange", "interval", "rows", "body")
+
+    def __init__(self, symbol: str, exchange: str, interval: str, rows: np.ndarray, body: bytes):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.interval = interval
+        self.rows = rows
+        self.body = body
+
+    @classmethod
+    def from_kite(cls, symbol: str, exchange: str, interval: str, candles: List[dict]) -> "CandleSeries":
+        rows = np.empty(len(candles), dtype=CANDLE_DTYPE)
+        rows["date"] = [epoch_seconds(c["date"]) for c in candles]
+        for field in ("open", "high", "low", "close", "volume"):
+            rows[field] = [c[field] for c in candles]
+        # The candle dicts only live while the body is encoded
+        body = dumps({"symbol": symbol, "exchange": exchange, "interval": interval,
+                      "candles": [format_candle(i, c) for i, c in enumerate(candles)]})
+        return cls(symbol, exchange, interval, rows, body.encode())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candles(self) -> List[dict]:
+        """Wire-form candle dicts, rebuilt from the array."""
+        return [
+            {"index": i, "date": datetime.fromtimestamp(ts, IST).isoformat(), "open": o, "high": h,
+             "low": l, "close": c, "volume": int(v)}
+            for i, (ts, o, h, l, c, v) in enumerate(self.rows.tolist())
+        ]
+
+    def to_dict(self) -> dict:
+        return {"symbol": self.symbol, "exchange": self.exchange, "interval": self.interval,
+                "candles": self.candles()}
+
+
+class OrderUpdate:
+    __slots__ = ("order_id", "status", "status_message", "tradingsymbol", "exchange", "instrument_token",
+                 "transaction_type", "order_type", "product", "quantity", "filled_quantity", "price",
+                 "average_price", "order_timestamp", "json")
+
+    def __init__(self, data: dict):
+        self.order_id = str(data.get("order_id") or "")
+        self.status = data.get("status")
+        self.status_message = data.get("status_message")
+        self.tradingsymbol = data.get("tradingsymbol")
+        self.exchange = data.get("exchange")
+        self.instrument_token = data.get("instrument_token")
+        self.transaction_type = data.get("transaction_type")
+        self.order_type = data.get("order_type")
+        self.product = data.get("product")
+        self.quantity = data.get("quantity")
+        self.filled_quantity = data.get("filled_quantity")
+        self.price = data.get("price")
+        self.average_price = data.get("average_price")
+        self.order_timestamp = _isoformat(data.get("order_timestamp"))
+        self.json = dumps(self.to_dict())
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__[:-1]}
@@ -0,0 +1,152 @@
+"""
+HDR-style latency histogram.
+
+Values are recorded in microseconds into log-linear buckets: exact below
+128us, then 64 linear sub-buckets per power of two (~1.5% relative error).
+Recording is O(1) with a fixed memory footprint regardless of sample count,
+so histograms can stay on hot paths for the lifetime of the process.
+
+`RollingLatencyHistogram` keeps the same buckets per time slot and reports
+over the last `window` seconds only.
+"""
+import threading
+import time
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS          # 128 exact buckets
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1          # 64 sub-buckets per octave
+MAX_SHIFT = 30                                   # ~2^37us ≈ 38 hours
+BUCKET_COUNT = SUB_BUCKET_COUNT + MAX_SHIFT * SUB_BUCKET_HALF
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < SUB_BUCKET_COUNT:
+        return value_us if value_us > 0 else 0
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    if shift > MAX_SHIFT:
+        return BUCKET_COUNT - 1
+    mantissa = value_us >> shift
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (mantissa - SUB_BUCKET_HALF)
+
+
+def _bucket_upper(index: int) -> int:
+    """Highest microsecond value that maps to `index`."""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    offset = index - SUB_BUCKET_COUNT
+    shift = offset // SUB_BUCKET_HALF + 1
+    mantissa = offset % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * BUCKET_COUNT
+            self.count = 0
+            self.total_us = 0
+            self.min_us = None
+            self.max_us = 0
+
+    def record_ns(self, duration_ns: int):
+        """Record a duration measured with `time.monotonic_ns()`/`perf_counter_ns()`."""
+        self.record_us(duration_ns // 1000)
+
+    def record_us(self, value_us: int):
+        value_us = max(0, int(value_us))
+        index = _bucket_index(value_us)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_us += value_us
+            if self.min_us is None or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples to this one."""
+        with other._lock:
+            counts = list(other._counts)
+            count, total, low, high = other.count, other.total_us, other.min_us, other.max_us
+        if not count:
+            return
+        with self._lock:
+            self._counts = [a + b for a, b in zip(self._counts, counts)]
+            self.count += count
+            self.total_us += total
+            self.min_us = low if self.min_us is None else min(self.min_us, low)
+            self.max_us = max(self.max_us, high)
+
+    def percentile_us(self, percentile: float) -> int:
+        """Value (in microseconds) at or below which `percentile`% of samples fall."""
+        with self._lock:
+            if self.count == 0:
+                return 0
+            target = max(1, int(round(self.count * percentile / 100.0)))
+            seen = 0
+            for index, n in enumerate(self._counts):
+                seen += n
+                if seen >= target:
+                    return min(_bucket_upper(index), self.max_us)
+            return self.max_us
+
+    def summary(self) -> dict:
+        """Millisecond summary suitable for JSON endpoints."""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min_ms": self.min_us / 1000,
+            "mean_ms": round(self.total_us / self.count / 1000, 3),
+            "p50_ms": self.percentile_us(50) / 1000,
+            "p90_ms": self.percentile_us(90) / 1000,
+            "p95_ms": self.percentile_us(95) / 1000,
+            "p99_ms": self.percentile_us(99) / 1000,
+            "p999_ms": self.percentile_us(99.9) / 1000,
+            "max_ms": self.max_us / 1000,
+        }
+
+
+class RollingLatencyHistogram:
+    """Latency histogram over a sliding window of `slots` equal time slots."""
+
+    def __init__(self, window: float = 60.0, slots: int = 6):
+        self.slot_seconds = window / slots
+        self._slots = [LatencyHistogram() for _ in range(slots)]
+        self._epochs = [0] * slots
+        self._lock = threading.Lock()
+
+    def _slot(self) -> LatencyHistogram:
+        epoch = int(time.monotonic() / self.slot_seconds)
+        index = epoch % len(self._slots)
+        if self._epochs[index] != epoch:
+            with self._lock:
+                if self._epochs[index] != epoch:
+                    self._slots[index].reset()
+                    self._epochs[index] = epoch
+        return self._slots[index]
+
+    def record_ns(self, duration_ns: int):
+        self._slot().record_ns(duration_ns)
+
+    def record_us(self, value_us: int):
+        self._slot().record_us(value_us)
+
+    def snapshot(self) -> LatencyHistogram:
+        """Samples of the current window merged into one histogram."""
+        oldest = int(time.monotonic() / self.slot_seconds) - len(self._slots) + 1
+        merged = LatencyHistogram()
+        for epoch, histogram in zip(list(self._epochs), self._slots):
+            if epoch >= oldest:
+                merged.merge(histogram)
+        return merged
+
+    def summary(self) -> dict:
+        return self.snapshot().summary()
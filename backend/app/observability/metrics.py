@@ -0,0 +1,134 @@
+"""
+Process-wide metric definitions exported at `/metrics`.
+
+Modules import the families they update from here so every metric name
+lives in one place. Families backed by live state (WebSocket clients,
+per-token tick counts) are registered by their owning module as
+callback families.
+"""
+from app.observability.order_latency import order_latency
+from app.observability.prometheus import REGISTRY
+
+# HTTP routes
+http_request_duration = REGISTRY.histogram(
+    "tradexr_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+
+# Upstream Kite REST calls
+kite_requests = REGISTRY.counter(
+    "tradexr_kite_requests_total",
+    "Kite REST calls by endpoint class and outcome.",
+    ("endpoint", "outcome"),
+)
+kite_request_duration = REGISTRY.histogram(
+    "tradexr_kite_request_duration_seconds",
+    "Kite REST call latency by endpoint class.",
+    ("endpoint",),
+)
+kite_errors = REGISTRY.counter(
+    "tradexr_kite_errors_total",
+    "Kite REST errors by endpoint class and error code.",
+    ("endpoint", "code"),
+)
+kite_retries = REGISTRY.counter(
+    "tradexr_kite_retries_total",
+    "Retried idempotent Kite reads by endpoint class.",
+    ("endpoint",),
+)
+
+# Admission control (app/admission.py)
+admission_rejected = REGISTRY.counter(
+    "tradexr_admission_rejected_total",
+    "Requests shed with 503 by admission control, per route class.",
+    ("route_class",),
+)
+
+# Execution lanes (app/lanes.py)
+lane_queue_seconds = REGISTRY.histogram(
+    "tradexr_lane_queue_seconds",
+    "Time tasks waited for a worker, per execution lane.",
+    ("lane",),
+)
+
+# Market data ticks
+ticks_received = REGISTRY.counter(
+    "tradexr_ticks_received_total",
+    "Ticks received from KiteTicker.",
+)
+tick_batches = REGISTRY.counter(
+    "tradexr_tick_batches_total",
+    "Tick batches (on_ticks callbacks) received from KiteTicker.",
+)
+
+# WebSocket fan-out
+ws_messages_sent = REGISTRY.counter(
+    "tradexr_ws_messages_sent_total",
+    "Messages written to /ws/ticks clients.",
+)
+ws_ticks_conflated = REGISTRY.counter(
+    "tradexr_ws_ticks_conflated_total",
+    "Ticks replaced by a newer tick for the same token before being sent.",
+)
+ws_ticks_dropped = REGISTRY.counter(
+    "tradexr_ws_ticks_dropped_total",
+    "Ticks dropped because a client's outbound queue was full or closed.",
+)
+tick_latency_seconds = REGISTRY.histogram(
+    "tradexr_tick_latency_seconds",
+    "Tick path latency by stage (see app/observability/tick_latency.py).",
+    ("stage",),
+)
+
+# Price alerts
+alerts_triggered = REGISTRY.counter(
+    "tradexr_alerts_triggered_total",
+    "Price alerts fired by ticks.",
+)
+
+# Caches
+cache_requests = REGISTRY.counter(
+    "tradexr_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ("cache", "result"),
+)
+
+
+def cache_counters(name: str):
+    """Return (hit, miss) counter children for a named cache."""
+    return cache_requests.labels(name, "hit"), cache_requests.labels(name, "miss")
+
+
+def _cache_hit_ratio():
+    totals = {}
+    for (cache, result), value in cache_requests.series():
+        hits, lookups = totals.get(cache, (0.0, 0.0))
+        totals[cache] = (hits + (value if result == "hit" else 0), lookups + value)
+    return {(cache,): hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+
+
+REGISTRY.callback(
+    "tradexr_cache_hit_ratio",
+    "Cache hit ratio since process start.",
+    ("cache",),
+    _cache_hit_ratio,
+)
+
+
+def _order_latency_quantiles():
+    result = {}
+    for stage, hist in order_latency.histograms.items():
+        if hist.count == 0:
+            continue
+        for quantile in (50, 90, 99):
+            result[(stage, str(quantile / 100))] = hist.percentile_us(quantile) / 1e6
+    return result
+
+
+REGISTRY.callback(
+    "tradexr_order_latency_seconds",
+    "Order hot-path latency quantiles by stage (see /metrics/orders).",
+    ("stage", "quantile"),
+    _order_latency_quantiles,
+)
@@ -0,0 +1,148 @@
+"""
+End-to-end order latency tracing.
+
+Each order carries an `OrderTrace` stamped with `time.monotonic_ns()` at:
+
+- triggered     tick that armed a conditional order arrived (those only)
+- received      route handler picked up the request (event loop)
+- dequeued      worker thread started executing the order
+- kite_start    just before the Kite place_order HTTP call
+- kite_end      Kite returned an order_id (or raised)
+- first_update  first order-update event for that order_id from KiteTicker
+
+Intervals between stages feed `LatencyHistogram`s; the most recent traces
+are kept in a bounded buffer for debugging via `GET /metrics/orders`.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from app.models import OrderUpdate
+from app.observability.histogram import LatencyHistogram
+
+STAGES = ("triggered", "received", "dequeued", "kite_start", "kite_end", "first_update")
+
+# Histogram name -> (from stage, to stage)
+INTERVALS = {
+    "queue": ("received", "dequeued"),
+    "pre_submit": ("dequeued", "kite_start"),
+    "broker": ("kite_start", "kite_end"),
+    "ack": ("kite_end", "first_update"),
+    "submit_total": ("received", "kite_end"),
+    "end_to_end": ("received", "first_update"),
+    "trigger_to_submit": ("triggered", "kite_start"),
+}
+
+MAX_RECENT_TRACES = 200
+MAX_PENDING_UPDATES = 1000
+
+
+class OrderTrace:
+    """Monotonic timestamps for a single order's journey."""
+
+    __slots__ = ("trace_id", "symbol", "order_id", "error", "stamps")
+
+    def __init__(self, trace_id: int, symbol: str):
+        self.trace_id = trace_id
+        self.symbol = symbol
+        self.order_id = None
+        self.error = None
+        self.stamps = {"received": time.monotonic_ns()}
+
+    def mark(self, stage: str, at_ns: Optional[int] = None):
+        self.stamps[stage] = at_ns if at_ns is not None else time.monotonic_ns()
+
+    def to_dict(self) -> dict:
+        start = self.stamps.get("triggered", self.stamps["received"])
+        return {
+            "trace_id": self.trace_id,
+            "symbol": self.symbol,
+            "order_id": self.order_id,
+            "error": self.error,
+            "stages_ms": {
+                stage: round((self.stamps[stage] - start) / 1e6, 3)
+                for stage in STAGES if stage in self.stamps
+            },
+        }
+
+
+class OrderLatencyTracker:
+    """Collects order traces and per-interval latency histograms."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.histograms = {name: LatencyHistogram() for name in INTERVALS}
+        self._recent = deque(maxlen=MAX_RECENT_TRACES)
+        # order_id -> trace waiting for its first order-update event
+        self._awaiting_update: OrderedDict = OrderedDict()
+        # order_id -> timestamp for updates that beat the HTTP response back
+        self._early_updates: OrderedDict = OrderedDict()
+
+    def start(self, symbol: str) -> OrderTrace:
+        """Create a trace stamped with the request receipt time."""
+        return OrderTrace(next(self._ids), symbol)
+
+    def complete(self, trace: OrderTrace, order_id=None, error=None):
+        """Close the submit half of a trace once Kite has responded."""
+        trace.order_id = order_id
+        trace.error = error
+        if "kite_end" not in trace.stamps:
+            trace.mark("kite_end")
+
+        early = None
+        with self._lock:
+            self._recent.append(trace)
+            if order_id is not None:
+                early = self._early_updates.pop(str(order_id), None)
+                if early is not None:
+                    trace.mark("first_update", early)
+                else:
+                    self._awaiting_update[str(order_id)] = trace
+                    while len(self._awaiting_update) > MAX_PENDING_UPDATES:
+                        self._awaiting_update.popitem(last=False)
+
+        # Without an update yet, ack/end_to_end are recorded by on_order_update
+        self._record(trace, exclude=() if early is not None else ("ack", "end_to_end"))
+
+    def on_order_update(self, order: OrderUpdate):
+        """Stamp the first order-update event seen for a traced order."""
+        now = time.monotonic_ns()
+        order_id = order.order_id
+        if not order_id:
+            return
+
+        with self._lock:
+            trace = self._awaiting_update.pop(order_id, None)
+            if trace is None:
+                if order_id not in self._early_updates:
+                    self._early_updates[order_id] = now
+                    while len(self._early_updates) > MAX_PENDING_UPDATES:
+                        self._early_updates.popitem(last=False)
+                return
+
+        trace.mark("first_update", now)
+        self._record(trace, only=("ack", "end_to_end"))
+
+    def _record(self, trace: OrderTrace, only=None, exclude=()):
+        for name, (start, end) in INTERVALS.items():
+            if (only is not None and name not in only) or name in exclude:
+                continue
+            if start in trace.stamps and end in trace.stamps:
+                self.histograms[name].record_ns(trace.stamps[end] - trace.stamps[start])
+
+    def snapshot(self, traces: int = 20) -> dict:
+        with self._lock:
+            recent = list(self._recent)[-traces:] if traces > 0 else []
+            awaiting = len(self._awaiting_update)
+        return {
+            "stages": {name: hist.summary() for name, hist in self.histograms.items()},
+            "awaiting_update": awaiting,
+            "recent": [trace.to_dict() for trace in reversed(recent)],
+        }
+
+
+# Process-wide tracker
+order_latency = OrderLatencyTracker()
@@ -0,0 +1,162 @@
+"""
+On-demand sampling profiler for live diagnosis.
+
+A daemon thread periodically snapshots every thread's stack via
+`sys._current_frames()` and aggregates them in collapsed-stack format
+(`thread;outer;...;inner count`), which flamegraph.pl, speedscope and
+inferno read directly. Nothing runs until a session is started, and
+sessions are capped in length and rate, so it is safe to keep installed.
+
+Profiling is only available when `ADMIN_TOKEN` is set in the environment;
+the token guards the admin endpoints and the per-request `X-Profile` header.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_HZ = 100
+MAX_HZ = 1000
+MAX_SECONDS = 300
+MAX_STORED_PROFILES = 20
+# Concurrent per-request profiles allowed (each adds a sampler thread)
+MAX_REQUEST_PROFILES = 2
+
+_THREAD_PREFIX = "profiler-"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples all thread stacks at a fixed rate until stopped or expired."""
+
+    def __init__(self, profile_id: str, hz: int = DEFAULT_HZ, seconds: float = 30, label: str = ""):
+        self.profile_id = profile_id
+        self.label = label
+        self.interval = 1.0 / max(1, min(hz, MAX_HZ))
+        self.seconds = max(0.1, min(seconds, MAX_SECONDS))
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"{_THREAD_PREFIX}{profile_id}", daemon=True
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        deadline = time.monotonic() + self.seconds
+        names = {}
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                thread_name = names.get(ident, str(ident))
+                if thread_name.startswith(_THREAD_PREFIX):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(thread_name)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text, one `stack count` line per unique stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def info(self) -> dict:
+        return {
+            "profile_id": self.profile_id,
+            "label": self.label,
+            "running": self.running,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+            "hz": round(1.0 / self.interval),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+
+class ProfilerManager:
+    """Owns the admin profiling session and recent profile results."""
+
+    def __init__(self):
+        self.admin_token = os.getenv("ADMIN_TOKEN") or None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active: Optional[SamplingProfiler] = None
+        self._request_profiles = 0
+        self.profiles: OrderedDict = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.admin_token is not None
+
+    def _new(self, hz, seconds, label) -> SamplingProfiler:
+        profiler = SamplingProfiler(f"{int(time.time())}-{next(self._ids)}", hz, seconds, label)
+        self.profiles[profiler.profile_id] = profiler
+        while len(self.profiles) > MAX_STORED_PROFILES:
+            self.profiles.popitem(last=False)
+        return profiler
+
+    def start_session(self, seconds: float, hz: int = DEFAULT_HZ) -> SamplingProfiler:
+        """Start the admin session; fails if one is already running."""
+        with self._lock:
+            if self._active is not None and self._active.running:
+                raise RuntimeError(f"Profile {self._active.profile_id} is already running")
+            self._active = self._new(hz, seconds, "session")
+            self._active.start()
+            return self._active
+
+    def stop_session(self) -> Optional[SamplingProfiler]:
+        with self._lock:
+            profiler, self._active = self._active, None
+        if profiler is not None:
+            profiler.stop()
+        return profiler
+
+    def start_request_profile(self, label: str) -> Optional[SamplingProfiler]:
+        """Start a sampler for one request, or None if the cap is reached."""
+        with self._lock:
+            if self._request_profiles >= MAX_REQUEST_PROFILES:
+                return None
+            self._request_profiles += 1
+            profiler = self._new(MAX_HZ, MAX_SECONDS, label)
+        profiler.start()
+        return profiler
+
+    def finish_request_profile(self, profiler: SamplingProfiler):
+        profiler.stop()
+        with self._lock:
+            self._request_profiles -= 1
+
+    def get(self, profile_id: str) -> Optional[SamplingProfiler]:
+        return self.profiles.get(profile_id)
+
+
+profiler_manager = ProfilerManager()
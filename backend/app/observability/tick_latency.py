@@ -0,0 +1,71 @@
+"""
+Tick-to-client latency tracing.
+
+Every tick is stamped with `time.monotonic_ns()` when its batch arrives from
+KiteTicker (`_received_ns`; a relayed tick keeps the owner's stamp, the
+clock is shared by all processes on the host). Along the way to the
+browser the batch is measured at:
+
+- exchange_to_receive  exchange timestamp to receipt (wall clock, 1 s resolution)
+- receive_to_process   receipt to formatted and queued for clients (event loop)
+- process_to_write     queued to written on a client's socket
+- receive_to_write     receipt to written on a client's socket
+
+Write stages are measured per message from the oldest tick it carries, so
+conflation shows up as latency rather than hiding it. Clients that opt in
+with `{"action": "latency_echo", "enabled": true}` get a `sent_us` field on
+tick messages and echo it back (`{"action": "echo", "sent_us": ...}`) to
+measure round-trip time.
+
+Percentiles cover the last WINDOW_SECONDS, per stage and per client, via
+`GET /metrics/ticks`.
+"""
+import time
+import weakref
+from datetime import datetime
+
+from app.observability.histogram import RollingLatencyHistogram
+from app.observability.metrics import tick_latency_seconds
+
+STAGES = ("exchange_to_receive", "receive_to_process", "process_to_write", "receive_to_write")
+WINDOW_SECONDS = 60
+# Echoes older than this are ignored (stale or forged)
+MAX_ECHO_AGE_US = 60_000_000
+
+
+class TickLatencyTracker:
+    def __init__(self, window: float = WINDOW_SECONDS):
+        self.window = window
+        self.stages = {stage: RollingLatencyHistogram(window) for stage in STAGES}
+        self._metrics = {stage: tick_latency_seconds.labels(stage) for stage in STAGES}
+        self._clients = weakref.WeakSet()
+
+    def received(self, ticks):
+        """Stamp a batch on receipt (ticker thread)."""
+        now = time.monotonic_ns()
+        for tick in ticks:
+            tick.setdefault("_received_ns", now)
+        exchange_ts = ticks[0].get("exchange_timestamp") if ticks else None
+        if isinstance(exchange_ts, datetime):
+            lag_ns = int((time.time() - exchange_ts.timestamp()) * 1e9)
+            if lag_ns >= 0:
+                self.record("exchange_to_receive", lag_ns)
+
+    def record(self, stage: str, duration_ns: int):
+        self.stages[stage].record_ns(duration_ns)
+        self._metrics[stage].observe(duration_ns / 1e9)
+
+    def add_client(self, client):
+        """Track a client exposing `latency_info()` for the snapshot."""
+        self._clients.add(client)
+
+    def snapshot(self) -> dict:
+        return {
+            "window_seconds": self.window,
+            "stages": {stage: hist.summary() for stage, hist in self.stages.items()},
+            "clients": [client.latency_info() for client in list(self._clients)],
+        }
+
+
+# Process-wide tracker
+tick_latency = TickLatencyTracker()
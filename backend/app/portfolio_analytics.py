@@ -0,0 +1,104 @@
+"""
+Portfolio analytics computed from Kite holdings and positions.
+
+`compute_analytics` turns the raw holdings and net positions into a compact
+summary: totals, per-holding allocation, sector and asset-class weights,
+concentration and realised/unrealised P&L. Per-instrument arithmetic runs
+on NumPy arrays (one pass for all holdings), so the cost stays flat as
+the portfolio grows.
+
+Holdings are classified through app/etfs.py; anything else is reported as
+`other`. Weights are fractions of current holdings value.
+"""
+from typing import Dict, List
+import numpy as np
+from app.etfs import get_etf
+
+UNCLASSIFIED = "other"
+
+
+def _column(rows: List[dict], field: str) -> np.ndarray:
+    return np.fromiter((row.get(field) or 0.0 for row in rows), dtype=np.float64, count=len(rows))
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def _group_weights(labels: List[str], weights: np.ndarray) -> Dict[str, float]:
+    if not labels:
+        return {}
+    names, index = np.unique(np.array(labels), return_inverse=True)
+    sums = np.bincount(index, weights=weights, minlength=len(names))
+    order = np.argsort(-sums)
+    return {str(names[i]): round(float(sums[i]), 4) for i in order}
+
+
+def compute_analytics(holdings: List[dict], positions: dict) -> dict:
+    """Summary of holdings (allocation, P&L, weights) and net positions (P&L)."""
+    quantity = _column(holdings, "quantity") + _column(holdings, "t1_quantity")
+    average = _column(holdings, "average_price")
+    last = _column(holdings, "last_price")
+    close = _column(holdings, "close_price")
+
+    invested = quantity * average
+    value = quantity * last
+    unrealised = value - invested
+    # No close price (new listing) means no day change rather than a full-value jump
+    day_change = np.where(close > 0, quantity * (last - close), 0.0)
+    total_value = float(value.sum())
+    weights = value / total_value if total_value else np.zeros_like(value)
+
+    etfs = [get_etf(h.get("tradingsymbol", "")) for h in holdings]
+    asset_classes = [etf.asset_class if etf else UNCLASSIFIED for etf in etfs]
+    sectors = [etf.sector if etf else UNCLASSIFIED for etf in etfs]
+
+    allocation = []
+    for i in np.argsort(-weights):
+        allocation.append({
+            "symbol": holdings[i].get("tradingsymbol"),
+            "exchange": holdings[i].get("exchange"),
+            "quantity": int(quantity[i]),
+            "value": round(float(value[i]), 2),
+            "weight": round(float(weights[i]), 4),
+            "unrealised_pnl": round(float(unrealised[i]), 2),
+            "unrealised_pnl_pct": round(_ratio(float(unrealised[i]), float(invested[i])) * 100, 2),
+            "day_change": round(float(day_change[i]), 2),
+            "asset_class": asset_classes[i],
+            "sector": sectors[i],
+        })
+
+    sorted_weights = np.sort(weights)[::-1]
+    hhi = float(np.square(weights).sum())
+
+    net = positions.get("net", []) if positions else []
+    positions_realised = float(_column(net, "realised").sum())
+    positions_unrealised = float(_column(net, "unrealised").sum())
+
+    total_invested = float(invested.sum())
+    holdings_unrealised = float(unrealised.sum())
+    total_day_change = float(day_change.sum())
+    return {
+        "totals": {
+            "invested": round(total_invested, 2),
+            "current_value": round(total_value, 2),
+            "unrealised_pnl": round(holdings_unrealised + positions_unrealised, 2),
+            "realised_pnl": round(positions_realised, 2),
+            "holdings_unrealised_pnl": round(holdings_unrealised, 2),
+            "holdings_unrealised_pnl_pct": round(_ratio(holdings_unrealised, total_invested) * 100, 2),
+            "positions_unrealised_pnl": round(positions_unrealised, 2),
+            "day_change": round(total_day_change, 2),
+            "day_change_pct": round(_ratio(total_day_change, total_value - total_day_change) * 100, 2),
+        },
+        "allocation": allocation,
+        "asset_classes": _group_weights(asset_classes, weights),
+        "sectors": _group_weights(sectors, weights),
+        "concentration": {
+            "holdings": len(holdings),
+            "open_positions": sum(1 for p in net if p.get("quantity")),
+            "top_weight": round(float(sorted_weights[:1].sum()), 4),
+            "top3_weight": round(float(sorted_weights[:3].sum()), 4),
+            "hhi": round(hhi, 4),
+            "effective_holdings": round(1 / hhi, 2) if hhi else 0.0,
+        },
+    }
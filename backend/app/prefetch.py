@@ -0,0 +1,171 @@
+"""
+Market-hours-aware cache warm-up.
+
+At market open every client asks for the same ETF quotes and candles at
+once, all cold misses against rate-limited Kite endpoints. The prefetch
+scheduler does that work ahead of them, with the default account's session,
+on the NSE calendar (app/market_calendar.py):
+
+- PREFETCH_LEAD_MINUTES before the open, again at the open (pre-open
+  quotes are still yesterday's) and every PREFETCH_INTERVAL seconds during
+  the session, it loads the instrument master, fetches quotes for the
+  watchlist in one call and candles for each PREFETCH_CANDLES spec into the
+  shared caches, and starts the ticker with the watchlist subscribed so
+  LTPs come from ticks.
+- After the close it does nothing until the next session's lead time;
+  settled cache entries already live until the next pre-open.
+
+The watchlist is `PREFETCH_WATCHLIST` (`EXCHANGE:SYMBOL,...`, default the
+supported ETFs; `off` disables the scheduler). Each worker warms its own
+caches.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from app import market_calendar
+from app.accounts import DEFAULT_ACCOUNT
+from app.etfs import SUPPORTED_ETFS
+from app.instruments import instrument_master
+from app.kite_client import KiteClient
+from app.market_data import load_candles, warm_quotes
+from app.ticker_service import TickerService
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_LEAD_MINUTES = int(os.getenv("PREFETCH_LEAD_MINUTES") or 15)
+PREFETCH_INTERVAL = int(os.getenv("PREFETCH_INTERVAL") or 300)
+# interval:days pairs, matching what the charts request
+PREFETCH_CANDLES = os.getenv("PREFETCH_CANDLES") or "minute:1"
+# Retry delay while there is no valid session
+RETRY_SECONDS = 60
+# Longest sleep before re-checking the schedule
+MAX_SLEEP_SECONDS = 3600
+
+
+def _parse_watchlist(value: Optional[str]) -> List[Tuple[str, str]]:
+    if value is None:
+        return [(etf.exchange, etf.symbol) for etf in SUPPORTED_ETFS]
+    if value.strip().lower() == "off":
+        return []
+    watchlist = []
+    for item in value.split(","):
+        exchange, _, symbol = item.strip().partition(":")
+        if exchange and symbol:
+            watchlist.append((exchange.upper(), symbol.upper()))
+        elif item.strip():
+            logger.warning(f"Ignoring invalid PREFETCH_WATCHLIST entry {item!r}")
+    return watchlist
+
+
+def _parse_candles(value: str) -> List[Tuple[str, int]]:
+    specs = []
+    for item in value.split(","):
+        interval, _, days = item.strip().partition(":")
+        try:
+            specs.append((interval, int(days or 1)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid PREFETCH_CANDLES entry {item!r}")
+    return specs
+
+
+class PrefetchScheduler:
+    def __init__(self, watchlist: List[Tuple[str, str]], candles: List[Tuple[str, int]],
+                 account_id: str = DEFAULT_ACCOUNT):
+        self.watchlist = watchlist
+        self.candles = candles
+        self.account_id = account_id
+        self.last_run: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if not self.watchlist or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+        self._thread.start()
+        logger.info(f"Prefetch scheduler watching {len(self.watchlist)} instrument(s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def next_run(self, now: datetime) -> datetime:
+        """When the next warm-up is due (`now` if overdue)."""
+        last = self.last_run
+        if market_calendar.is_open(now):
+            open_at, close_at = market_calendar.session_bounds(now.date())
+            due = now if last is None or last < open_at else last + timedelta(seconds=PREFETCH_INTERVAL)
+            if due < close_at:
+                return max(due, now)
+        # Closed (or the session's last refresh is done): next session's lead time, then its open
+        open_at = market_calendar.next_open(now)
+        lead_at = open_at - timedelta(minutes=PREFETCH_LEAD_MINUTES)
+        if now < lead_at:
+            return lead_at
+        return now if last is None or last < lead_at else open_at
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = market_calendar.now_ist()
+            wait = (self.next_run(now) - now).total_seconds()
+            if wait > 0:
+                self._stop.wait(min(wait, MAX_SLEEP_SECONDS))
+                continue
+            if not self.run_once():
+                self._stop.wait(RETRY_SECONDS)
+
+    def run_once(self) -> bool:
+        """Warm instruments, quotes, candles and the ticker; False without a session."""
+        kite = KiteClient(self.account_id)
+        if not kite.session_ready():
+            logger.debug("Prefetch skipped: Kite session not active")
+            return False
+        errors = []
+        for exchange in {exchange for exchange, _ in self.watchlist}:
+            instrument_master.refresh_async(kite.kite, exchange)
+        try:
+            warm_quotes(kite, self.watchlist)
+        except Exception as e:
+            errors.append(f"quotes: {e}")
+        tokens = []
+        for exchange, symbol in self.watchlist:
+            try:
+                tokens.append(kite.get_instrument_token(symbol, exchange))
+                for interval, days in self.candles:
+                    load_candles(kite, symbol, exchange, interval, days)
+            except Exception as e:
+                errors.append(f"{exchange}:{symbol}: {e}")
+        ticker = TickerService(self.account_id)
+        if tokens:
+            ticker.subscribe(tokens)
+        if not ticker.is_connected:
+            ticker.start()
+
+        self.last_run = market_calendar.now_ist()
+        self.last_error = "; ".join(errors) or None
+        self.runs += 1
+        if errors:
+            logger.warning(f"Prefetch finished with errors: {self.last_error}")
+        return True
+
+    def status(self) -> dict:
+        now = market_calendar.now_ist()
+        return {
+            "enabled": bool(self.watchlist),
+            "watchlist": [f"{exchange}:{symbol}" for exchange, symbol in self.watchlist],
+            "candles": [f"{interval}:{days}" for interval, days in self.candles],
+            "runs": self.runs,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "next_run": self.next_run(now).isoformat() if self.watchlist else None,
+            "last_error": self.last_error,
+            "market": market_calendar.status(),
+        }
+
+
+prefetch_scheduler = PrefetchScheduler(
+    _parse_watchlist(os.getenv("PREFETCH_WATCHLIST") or None),
+    _parse_candles(PREFETCH_CANDLES),
+)
@@ -0,0 +1,148 @@
+"""
+Local pre-trade validation.
+
+Orders are checked against cached instrument metadata (app/instruments.py)
+before they use order rate budget or a broker round trip:
+
+- transaction type, positive quantity and price
+- quantity is a multiple of the instrument's lot size
+- price is on the instrument's tick grid; off-grid prices are moved to the
+  nearest tick on the passive side (down for BUY, up for SELL) when
+  normalizing, rejected otherwise
+- price lies inside today's circuit band
+
+Checks whose data is not cached yet (instrument master still loading, no
+quote seen today) are skipped and listed in `unchecked`; they never block.
+Everything is dict lookups and arithmetic, so a check costs microseconds.
+"""
+import math
+from typing import List
+from app.instruments import instrument_master
+
+# Price tick assumed until the instrument master is loaded
+DEFAULT_TICK_SIZE = 0.01
+# Tolerance for float prices that are on the tick grid
+_EPSILON = 1e-6
+
+
+class Reason:
+    __slots__ = ("code", "field", "message")
+
+    def __init__(self, code: str, field: str, message: str):
+        self.code = code
+        self.field = field
+        self.message = message
+
+    def to_dict(self) -> dict:
+        return {"code": self.code, "field": self.field, "message": self.message}
+
+
+class ValidationResult:
+    def __init__(self, symbol: str, exchange: str, quantity: int, price: float):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.quantity = quantity
+        self.price = price
+        self.reasons: List[Reason] = []
+        self.adjustments: List[Reason] = []
+        self.unchecked: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.reasons
+
+    def reject(self, code: str, field: str, message: str):
+        self.reasons.append(Reason(code, field, message))
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "symbol": self.symbol,
+            "exchange": self.exchange,
+            "quantity": self.quantity,
+            "price": self.price,
+            "reasons": [reason.to_dict() for reason in self.reasons],
+            "adjustments": [reason.to_dict() for reason in self.adjustments],
+            "unchecked": self.unchecked,
+        }
+
+
+class PreTradeRejected(Exception):
+    """Raised by `KiteClient.place_order` for orders that fail validation."""
+
+    code = 400
+
+    def __init__(self, result: ValidationResult):
+        super().__init__("; ".join(reason.message for reason in result.reasons))
+        self.result = result
+
+
+def _round_to_tick(price: float, tick: float, transaction_type: str) -> float:
+    ticks = price / tick
+    nearest = round(ticks)
+    if abs(ticks - nearest) < _EPSILON:
+        steps = nearest
+    else:
+        steps = math.floor(ticks) if transaction_type == "BUY" else math.ceil(ticks)
+    # Round away float noise using the tick's own precision
+    decimals = max(0, -math.floor(math.log10(tick))) + 2
+    return round(steps * tick, decimals)
+
+
+def validate_order(symbol: str, exchange: str, transaction_type: str, quantity: int, price: float,
+                   normalize: bool = True) -> ValidationResult:
+    """Check (and with `normalize`, tick-align) an order's price and quantity."""
+    result = ValidationResult(symbol, exchange, quantity, price)
+    side = (transaction_type or "").upper()
+    if side not in ("BUY", "SELL"):
+        result.reject("invalid_transaction_type", "transaction_type", "transaction_type must be BUY or SELL")
+    if not isinstance(quantity, int) or quantity <= 0:
+        result.reject("invalid_quantity", "quantity", "quantity must be a positive integer")
+    if not price or price <= 0 or math.isnan(price):
+        result.reject("invalid_price", "price", "price must be positive")
+    if result.reasons:
+        return result
+
+    meta = instrument_master.get(exchange, symbol)
+    if meta is None:
+        if instrument_master.is_current(exchange):
+            result.reject("unknown_instrument", "symbol", f"{exchange}:{symbol} is not in the instrument master")
+            return result
+        result.unchecked.append("lot_size")
+        tick = DEFAULT_TICK_SIZE
+    else:
+        tick = meta.tick_size or DEFAULT_TICK_SIZE
+        if meta.lot_size > 1 and quantity % meta.lot_size:
+            result.reject("lot_size", "quantity",
+                          f"quantity {quantity} is not a multiple of the lot size {meta.lot_size}")
+
+    aligned = _round_to_tick(price, tick, side)
+    if abs(aligned - price) > _EPSILON:
+        if normalize:
+            result.adjustments.append(Reason(
+                "tick_size", "price", f"price {price} moved to {aligned} (tick size {tick})"
+            ))
+            result.price = aligned
+        else:
+            result.reject("tick_size", "price", f"price {price} is not a multiple of the tick size {tick}")
+    elif aligned != price:
+        result.price = aligned  # Same tick, tidier float
+
+    limits = instrument_master.circuit_limits(exchange, symbol)
+    if limits is None:
+        result.unchecked.append("circuit_limits")
+    else:
+        lower, upper = limits
+        if not lower <= result.price <= upper:
+            result.reject("circuit_limit", "price",
+                          f"price {result.price} is outside today's circuit band {lower}-{upper}")
+    return result
+
+
+def check_order(symbol: str, exchange: str, transaction_type: str, quantity: int, price: float,
+                normalize: bool = True) -> ValidationResult:
+    """`validate_order`, raising PreTradeRejected for orders that must not be sent."""
+    result = validate_order(symbol, exchange, transaction_type, quantity, price, normalize)
+    if not result.ok:
+        raise PreTradeRejected(result)
+    return result
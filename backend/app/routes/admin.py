@@ -0,0 +1,80 @@
+"""
+Admin endpoints for live diagnosis.
+
+All routes require the `X-Admin-Token` header to match the `ADMIN_TOKEN`
+environment variable; without `ADMIN_TOKEN` they are disabled (404).
+
+- Sampling profiler sessions - /admin/profile/*
+- Tick-path callback timing - /admin/ticker/timing (account from `X-Account-Id`)
+"""
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.observability.profiler import DEFAULT_HZ, MAX_HZ, MAX_SECONDS, profiler_manager
+from app.dependencies import get_ticker_service
+from app.ticker_service import TickerService
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests unless admin endpoints are enabled and authorised."""
+    if not profiler_manager.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, profiler_manager.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile/start")
+def start_profile(
+    seconds: float = Query(30, gt=0, le=MAX_SECONDS),
+    hz: int = Query(DEFAULT_HZ, ge=1, le=MAX_HZ),
+):
+    """Start sampling all threads for `seconds` (stops automatically)."""
+    try:
+        profiler = profiler_manager.start_session(seconds, hz)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiler.info()
+
+
+@router.post("/profile/stop")
+def stop_profile():
+    """Stop the running session early."""
+    profiler = profiler_manager.stop_session()
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="No profile session running")
+    return profiler.info()
+
+
+@router.get("/profile")
+def list_profiles():
+    """Recent session and per-request profiles, newest last."""
+    return {"profiles": [p.info() for p in profiler_manager.profiles.values()]}
+
+
+@router.get("/profile/{profile_id}", response_class=PlainTextResponse)
+def download_profile(profile_id: str):
+    """Download collapsed stacks (flamegraph.pl / speedscope compatible)."""
+    profiler = profiler_manager.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+    )
+
+
+@router.post("/ticker/timing")
+def set_ticker_timing(enabled: bool = True, ticker_service: TickerService = Depends(get_ticker_service)):
+    """Toggle per-callback timing on the account's TickerService tick path."""
+    ticker_service.set_callback_timing(enabled)
+    return ticker_service.get_callback_timings()
+
+
+@router.get("/ticker/timing")
+def get_ticker_timing(ticker_service: TickerService = Depends(get_ticker_service)):
+    """Time spent in each of the account's tick callbacks while timing mode is on."""
+    return ticker_service.get_callback_timings()
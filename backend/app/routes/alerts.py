@@ -0,0 +1,67 @@
+"""
+Price alert endpoints.
+
+- Create an alert - POST /api/alerts
+- Active and recently fired alerts - GET /api/alerts
+- Cancel an alert - DELETE /api/alerts/{alert_id}
+
+Alerts are evaluated on every tick (see app/alerts.py); fired alerts are
+pushed to the account's /ws/ticks clients as `{"type": "alert"}` messages.
+Alerts live in one worker's memory, so these routes answer 501 when
+workers share a feed (`FEED_SOCKET`).
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from app.alerts import alert_engine_for
+from app.dependencies import get_kite_client, require_single_process
+from app.kite_client import KiteClient
+
+router = APIRouter(prefix="/api/alerts", tags=["alerts"], dependencies=[Depends(require_single_process)])
+
+
+class AlertRequest(BaseModel):
+    symbol: str
+    exchange: str = "NSE"
+    condition: str  # above | below | cross
+    price: float
+    note: Optional[str] = None
+
+
+@router.post("", status_code=201)
+def create_alert(request: AlertRequest, kite_client: KiteClient = Depends(get_kite_client)):
+    """Register a price alert; its instrument is subscribed on the ticker."""
+    instrument_token = kite_client.cached_instrument_token(request.symbol, request.exchange)
+    if instrument_token is None:
+        if not kite_client.session_ready():
+            raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
+        try:
+            instrument_token = kite_client.get_instrument_token(request.symbol, request.exchange)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    engine = alert_engine_for(kite_client.account_id)
+    try:
+        alert = engine.add(request.symbol, request.exchange, instrument_token,
+                           request.condition, request.price, request.note)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not engine.ticker.is_connected:
+        engine.ticker.start()
+    return alert.info()
+
+
+@router.get("")
+def list_alerts(kite_client: KiteClient = Depends(get_kite_client)):
+    """Active alerts and the most recently fired ones (oldest first)."""
+    engine = alert_engine_for(kite_client.account_id)
+    return {"active": engine.active(), "triggered": list(engine.triggered)}
+
+
+@router.delete("/{alert_id}")
+def delete_alert(alert_id: str, kite_client: KiteClient = Depends(get_kite_client)):
+    """Cancel an active alert."""
+    alert = alert_engine_for(kite_client.account_id).remove(alert_id)
+    if alert is None:
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    return {"success": True, "alert_id": alert_id}
@@ -1,16 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.dependencies import get_or_create_kite_client
 from app.kite_client import KiteClient
 
 router = APIRouter()
-kite_client = KiteClient()
 
 class ConfigRequest(BaseModel):
     api_key: str
     api_secret: str
 
 @router.post("/config")
-def configure_kite(config: ConfigRequest):
+def configure_kite(config: ConfigRequest, kite_client: KiteClient = Depends(get_or_create_kite_client)):
     """
     Configures the Kite client with provided API credentials.
     """
@@ -0,0 +1,101 @@
+"""
+Historical data backfill endpoints.
+
+- Start a backfill - POST /api/history/backfill
+- Backfill progress - GET /api/history/backfill[/{job_id}]
+- Stored candles - GET /api/history/{symbol}
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from app.backfill import MAX_DAYS_PER_REQUEST, backfill_manager, history_store
+from app.dependencies import get_kite_client
+from app.kite_client import KiteClient
+from app.lanes import market_data_lane, on_lane
+
+router = APIRouter(prefix="/api/history", tags=["history"])
+
+
+class BackfillRequest(BaseModel):
+    symbol: str
+    exchange: str = "NSE"
+    interval: str = "minute"
+    days: Optional[int] = None # Lookback from now; ignored if from_date is set
+    from_date: Optional[datetime] = None
+    to_date: Optional[datetime] = None
+
+
+@router.post("/backfill", status_code=202)
+def start_backfill(request: BackfillRequest, kite_client: KiteClient = Depends(get_kite_client)):
+    """Fetch and store a long candle range in the background."""
+    if not kite_client.session_ready():
+        raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
+    
+    to_date = request.to_date or datetime.now()
+    if request.from_date is not None:
+        from_date = request.from_date
+    elif request.days:
+        from_date = to_date - timedelta(days=request.days)
+    else:
+        raise HTTPException(status_code=400, detail="Provide from_date or days")
+    
+    try:
+        instrument_token = kite_client.get_instrument_token(request.symbol, request.exchange)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    try:
+        job = backfill_manager.start(kite_client, request.symbol, request.exchange, instrument_token,
+                                     request.interval, from_date, to_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.info()
+
+
+@router.get("/backfill")
+def list_backfills(kite_client: KiteClient = Depends(get_kite_client)):
+    """The account's recent backfill jobs, oldest first."""
+    return {"jobs": [job.info() for job in backfill_manager.for_account(kite_client.account_id)]}
+
+
+@router.get("/backfill/{job_id}")
+def get_backfill(job_id: str, kite_client: KiteClient = Depends(get_kite_client)):
+    """Progress of one of the account's backfill jobs."""
+    job = backfill_manager.get(job_id, kite_client.account_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Backfill {job_id} not found")
+    return job.info()
+
+
+@router.get("/{symbol}")
+@on_lane(market_data_lane)
+def get_stored_history(
+    symbol: str,
+    exchange: str = "NSE",
+    interval: str = "minute",
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    kite_client: KiteClient = Depends(get_kite_client),
+):
+    """Candles stored by earlier backfills (no Kite call beyond the token lookup)."""
+    if interval not in MAX_DAYS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Unsupported interval: {interval}")
+    
+    instrument_token = kite_client.cached_instrument_token(symbol, exchange)
+    if instrument_token is None:
+        if not kite_client.session_ready():
+            raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
+        try:
+            instrument_token = kite_client.get_instrument_token(symbol, exchange)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    
+    candles = history_store.load(instrument_token, interval, from_date, to_date)
+    return {
+        "symbol": symbol,
+        "exchange": exchange,
+        "interval": interval,
+        "coverage": history_store.coverage(instrument_token, interval),
+        "candles": candles
+    }
@@ -0,0 +1,59 @@
+"""
+Metrics endpoints for latency instrumentation.
+
+- Prometheus text exposition - /metrics
+- Order latency histograms and recent traces - /metrics/orders
+- Execution lane load and queue times - /metrics/lanes
+- Admission control limits and load - /metrics/admission
+- Tick-to-client latency per stage and per client - /metrics/ticks
+- Prefetch schedule and market calendar - /metrics/prefetch
+"""
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+from app.admission import admission
+from app.lanes import lane_status
+from app.observability.order_latency import order_latency
+from app.observability.prometheus import REGISTRY
+from app.observability.tick_latency import tick_latency
+from app.prefetch import prefetch_scheduler
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """All process metrics in Prometheus text format."""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get("/orders")
+def order_metrics(traces: int = Query(20, ge=0, le=200)):
+    """Order hot-path latency histograms (ms) plus the most recent traces."""
+    return order_latency.snapshot(traces=traces)
+
+
+@router.get("/lanes")
+def lane_metrics():
+    """Workers, in-flight and queued tasks, and queue-time histogram (ms) per lane."""
+    return lane_status()
+
+
+@router.get("/admission")
+def admission_metrics():
+    """Concurrency limits, queue timeouts and current load per route class."""
+    return admission.status()
+
+
+@router.get("/ticks")
+def tick_metrics():
+    """Rolling tick latency percentiles (ms) per stage and per /ws/ticks client."""
+    return tick_latency.snapshot()
+
+
+@router.get("/prefetch")
+def prefetch_metrics():
+    """Cache warm-up watchlist, last/next run and NSE session state."""
+    return prefetch_scheduler.status()
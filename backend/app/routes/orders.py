@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.conditional_orders import conditional_engine_for
+from app.dependencies import get_kite_client, require_single_process
 from app.kite_client import KiteClient
+from app.lanes import on_lane, order_lane, portfolio_lane
+from app.observability.order_latency import order_latency
+from app.pretrade import PreTradeRejected, check_order, validate_order
 
 router = APIRouter(prefix="/api/kite", tags=["kite"])
-kite_client = KiteClient()
 
 class LoginRequest(BaseModel):
     request_token: str
@@ -14,50 +19,128 @@ class OrderRequest(BaseModel):
     price: float
     transaction_type: str # BUY or SELL
 
+class ModifyOrderRequest(BaseModel):
+    quantity: Optional[int] = None
+    price: Optional[float] = None
+
+class BasketRequest(BaseModel):
+    legs: List[OrderRequest]
+    all_or_cancel: bool = False # Cancel placed legs if any leg fails
+
+class ConditionalOrderRequest(BaseModel):
+    symbol: str
+    exchange: str = "NSE"
+    condition: str # above | below | cross
+    trigger_price: float
+    quantity: int
+    transaction_type: str # BUY or SELL
+    price: Optional[float] = None # LIMIT price; defaults to the triggering tick's price
+
+# Upper bound on legs accepted in one basket request
+MAX_BASKET_LEGS = 20
+
 @router.get("/login-url")
-def get_login_url():
+def get_login_url(kite_client: KiteClient = Depends(get_kite_client)):
     """Get the Kite Connect login URL for OAuth."""
+    kite_client.wait_until_ready()
     if not kite_client.kite:
         raise HTTPException(status_code=500, detail="Kite client not initialized")
     return {"login_url": kite_client.kite.login_url()}
 
 @router.post("/login")
-def login(data: LoginRequest):
+def login(data: LoginRequest, kite_client: KiteClient = Depends(get_kite_client)):
     try:
         response = kite_client.login(data.request_token)
         return response
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def _place_traced_order(kite_client: KiteClient, order: OrderRequest, trace):
+    """Order-lane half of /order; stamps when a lane worker picks it up."""
+    trace.mark("dequeued")
+    return kite_client.place_order(
+        symbol=order.symbol,
+        quantity=order.quantity,
+        price=order.price,
+        transaction_type=order.transaction_type,
+        trace=trace
+    )
+
 @router.post("/order")
-def place_order(order: OrderRequest):
+async def place_order(order: OrderRequest, kite_client: KiteClient = Depends(get_kite_client)):
+    # Stamp receipt on the event loop, before waiting for an order-lane worker
+    trace = order_latency.start(order.symbol)
     try:
-        response = kite_client.place_order(
-            symbol=order.symbol,
-            quantity=order.quantity,
-            price=order.price,
-            transaction_type=order.transaction_type
+        return await order_lane.run(_place_traced_order, kite_client, order, trace)
+    except PreTradeRejected as e:
+        raise HTTPException(status_code=400, detail=e.result.to_dict())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/order/validate")
+def validate_order_request(order: OrderRequest, exchange: str = "NSE"):
+    """Run the local pre-trade checks without placing the order."""
+    return validate_order(order.symbol, exchange, order.transaction_type, order.quantity, order.price).to_dict()
+
+@router.put("/order/{order_id}")
+@on_lane(order_lane)
+def modify_order(order_id: str, changes: ModifyOrderRequest, kite_client: KiteClient = Depends(get_kite_client)):
+    """Change the quantity and/or price of an open order."""
+    if changes.quantity is None and changes.price is None:
+        raise HTTPException(status_code=400, detail="Provide quantity and/or price")
+    try:
+        return kite_client.modify_order(order_id, quantity=changes.quantity, price=changes.price)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/order/{order_id}")
+@on_lane(order_lane)
+def cancel_order(order_id: str, kite_client: KiteClient = Depends(get_kite_client)):
+    """Cancel an open order."""
+    try:
+        return kite_client.cancel_order(order_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/orders/basket")
+async def place_basket(basket: BasketRequest, kite_client: KiteClient = Depends(get_kite_client)):
+    """Place several orders concurrently, returning per-leg order_id or error.
+
+    Runs on the event loop; each leg (not the whole basket) takes an
+    order-lane worker.
+    """
+    if not basket.legs:
+        raise HTTPException(status_code=400, detail="Basket must contain at least one leg")
+    if len(basket.legs) > MAX_BASKET_LEGS:
+        raise HTTPException(status_code=400, detail=f"Basket cannot exceed {MAX_BASKET_LEGS} legs")
+
+    try:
+        return await kite_client.place_basket(
+            [leg.dict() for leg in basket.legs],
+            all_or_cancel=basket.all_or_cancel
         )
-        return response
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/positions")
-def get_positions():
+@on_lane(portfolio_lane)
+def get_positions(kite_client: KiteClient = Depends(get_kite_client)):
     try:
         return kite_client.get_positions()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/margins")
-def get_margins():
+@on_lane(portfolio_lane)
+def get_margins(kite_client: KiteClient = Depends(get_kite_client)):
     try:
         return kite_client.get_margins()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/order/{order_id}")
-def get_order_status(order_id: str):
+@on_lane(portfolio_lane)
+def get_order_status(order_id: str, kite_client: KiteClient = Depends(get_kite_client)):
     """Get order status by order_id"""
     try:
         return kite_client.get_order_status(order_id)
@@ -65,10 +148,50 @@ def get_order_status(order_id: str):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/orders")
-def get_orders():
+@on_lane(portfolio_lane)
+def get_orders(kite_client: KiteClient = Depends(get_kite_client)):
     """Get all orders for the day"""
     try:
         return kite_client.get_orders()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/conditional-orders", status_code=201, dependencies=[Depends(require_single_process)])
+def create_conditional_order(order: ConditionalOrderRequest, kite_client: KiteClient = Depends(get_kite_client)):
+    """Arm an order that is placed server-side once its trigger price is met."""
+    if not kite_client.session_ready():
+        raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
+    try:
+        instrument_token = kite_client.get_instrument_token(order.symbol, order.exchange)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    price = order.price
+    if price is not None:
+        # An explicit LIMIT price is known now, so reject it before arming rather than at the trigger
+        try:
+            price = check_order(order.symbol, order.exchange, order.transaction_type, order.quantity, price).price
+        except PreTradeRejected as e:
+            raise HTTPException(status_code=400, detail=e.result.to_dict())
+
+    engine = conditional_engine_for(kite_client.account_id)
+    try:
+        armed = engine.add(order.symbol, order.exchange, instrument_token, order.condition,
+                           order.trigger_price, order.transaction_type, order.quantity, price)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not engine.ticker.is_connected:
+        engine.ticker.start()
+    return armed.info()
+
+@router.get("/conditional-orders", dependencies=[Depends(require_single_process)])
+def list_conditional_orders(kite_client: KiteClient = Depends(get_kite_client)):
+    """Armed conditional orders and recently triggered ones (with order_id or error)."""
+    return conditional_engine_for(kite_client.account_id).orders()
+
+@router.delete("/conditional-orders/{order_ref}", dependencies=[Depends(require_single_process)])
+def cancel_conditional_order(order_ref: str, kite_client: KiteClient = Depends(get_kite_client)):
+    """Disarm a conditional order that has not triggered yet."""
+    order = conditional_engine_for(kite_client.account_id).cancel(order_ref)
+    if order is None:
+        raise HTTPException(status_code=404, detail=f"No pending conditional order {order_ref}")
+    return {"success": True, "order_ref": order_ref}
@@ -5,189 +5,360 @@ Provides endpoints for:
 - LTP (Last Traded Price) - /ltp/{symbol}
 - Full Quote (OHLC, volume) - /quote/{symbol}
 - Historical Candles - /candles/{symbol}
+- Market Depth - /depth/{symbol}
 - Portfolio Holdings - /portfolio/holdings
 - Positions - /portfolio/positions
 - Margins - /portfolio/margins
+- Portfolio analytics (allocation, weights, P&L) - /portfolio/analytics
+
+Market data responses are account-independent and cached in the shared
+quote/candle caches; portfolio endpoints always hit the selected account.
+Analytics are cached per account for a few seconds and dropped whenever an
+order update arrives for that account.
+LTPs of instruments streaming on the ticker (or the shared feed) are served
+from the last tick without a REST call.
+
+When Kite is failing (circuit open, timeouts, 5xx) these routes answer from
+the last good response, marked `"stale": true` with its `"age"` in seconds.
+
+Once the NSE session has settled, quotes and candles of NSE-hours
+instruments are cached until the next pre-open (app/market_calendar.py).
+Quotes and candles are fetched through app/market_data.py, which the
+prefetch scheduler uses to fill the same caches.
+
+Quotes and candle sets are cached as `Quote` / `CandleSeries` models
+(app/models.py) holding their serialized response, so cache hits write the
+stored bytes without rebuilding or re-encoding anything.
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from app.backfill import MAX_DAYS_PER_REQUEST, history_store, iter_range
+from app.cache import analytics_cache, candle_cache, portfolio_cache, quote_cache
+from app.circuit_breaker import CircuitOpenError, is_transient
+from app.depth import depth_store
+from app.dependencies import get_kite_client
+from app.indicators import canonical, compute, indicator_cache, parse_specs
 from app.kite_client import KiteClient
+from app.lanes import market_data_lane, on_lane, portfolio_lane
+from app.market_calendar import cache_ttl
+from app.market_data import build_quote, load_candles
+from app.models import dumps, format_candle
+from app.portfolio_analytics import compute_analytics
+from app.ticker_service import TickerService
 
 router = APIRouter()
 
+
+def _serve_stale(cache, cache_key, error: Exception) -> dict:
+    """Last good response marked stale if Kite is unavailable, else re-raise as HTTP."""
+    if isinstance(error, CircuitOpenError) or is_transient(error):
+        stale = cache.get_stale(cache_key)
+        if stale is not None:
+            value, age = stale
+            if isinstance(value, (Quote, CandleSeries)):
+                value = value.to_dict()
+            return {**value, "stale": True, "age": round(age, 3)}
+    if isinstance(error, CircuitOpenError):
+        raise HTTPException(status_code=503, detail=str(error),
+                            headers={"Retry-After": str(math.ceil(error.retry_after))})
+    raise HTTPException(status_code=500, detail=str(error))
+
+
 @router.get("/ltp/{symbol}")
-def get_ltp(symbol: str, exchange: str = "MCX"):
+@on_lane(market_data_lane)
+def get_ltp(symbol: str, exchange: str = "MCX", kite: KiteClient = Depends(get_kite_client)):
     """Fetches Last Traded Price for a symbol."""
-    kite = KiteClient()
-    
-    if not kite.kite or not kite.access_token:
+    if not kite.session_ready():
         raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
     
+    # Streaming instruments already have a current price in the tick feed
+    token = kite.cached_instrument_token(symbol, exchange)
+    tick = TickerService(kite.account_id).live_tick(token) if token else None
+    if tick is not None:
+        return {"symbol": symbol, "exchange": exchange, "ltp": tick["last_price"]}
+    
+    cache_key = ("ltp", exchange, symbol)
+    cached = quote_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         instrument = f"{exchange}:{symbol}"
         data = kite.kite.ltp([instrument])
         
         if instrument in data:
-            return {
+            result = {
                 "symbol": symbol,
                 "exchange": exchange,
                 "ltp": data[instrument]["last_price"]
             }
+            quote_cache.set(cache_key, result, cache_ttl(exchange, quote_cache.ttl))
+            return result
         else:
             raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return _serve_stale(quote_cache, cache_key, e)
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
 
 @router.get("/quote/{symbol}")
-def get_quote(symbol: str, exchange: str = "MCX"):
+@on_lane(market_data_lane)
+def get_quote(symbol: str, exchange: str = "MCX", kite: KiteClient = Depends(get_kite_client)):
     """Fetches full quote for a symbol including OHLC, volume etc."""
-    kite = KiteClient()
-    
-    if not kite.kite or not kite.access_token:
+    if not kite.session_ready():
         raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
     
+    cache_key = ("quote", exchange, symbol)
+    cached = quote_cache.get(cache_key)
+    if cached is not None:
+        return _json_response(cached.body)
+    
     try:
         instrument = f"{exchange}:{symbol}"
         data = kite.kite.quote([instrument])
         
         if instrument in data:
-            quote = data[instrument]
-            
-            # Get OHLC data
-            ohlc = quote.get("ohlc", {})
-            previous_close = ohlc.get("close", 0)
-            last_price = quote.get("last_price", 0)
-            
-            # Calculate change - prefer net_change from Kite, else calculate from LTP and previous close
-            net_change = quote.get("net_change", 0)
-            if net_change == 0 and previous_close > 0 and last_price > 0:
-                # Calculate change from last price and previous close
-                net_change = last_price - previous_close
-            
-            # Calculate change percent
-            if previous_close > 0:
-                change_percent = (net_change / previous_close) * 100
-            else:
-                change_percent = 0
-            
-            return {
-                "symbol": symbol,
-                "exchange": exchange,
-                "ltp": last_price,
-                "open": ohlc.get("open", 0),
-                "high": ohlc.get("high", 0),
-                "low": ohlc.get("low", 0),
-                "close": previous_close,
-                "change": net_change,
-                "change_percent": change_percent,
-                "volume": quote.get("volume", 0),
-                "upper_circuit": quote.get("upper_circuit_limit", 0),
-                "lower_circuit": quote.get("lower_circuit_limit", 0)
-            }
+            result = build_quote(symbol, exchange, data[instrument])
+            quote_cache.set(cache_key, result, cache_ttl(exchange, quote_cache.ttl))
+            return _json_response(result.body)
         else:
             raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return _serve_stale(quote_cache, cache_key, e)
+
+# Candles serialised per write when streaming
+STREAM_BATCH = 500
+
+
+def _stream_candles(header: dict, candles, fmt: str):
+    """Serialise candles in batches; memory stays flat for any range.
+
+    Errors after the first byte can't change the status code, so they are
+    reported in-band (an `error` line, or an `error` field in JSON mode).
+    """
+    ndjson = fmt == "ndjson"
+    yield json.dumps(header) + "\n" if ndjson else json.dumps(header)[:-1] + ', "candles": ['
+    batch = []
+    index = 0
+    error = None
+    try:
+        for candle in candles:
+            line = json.dumps(format_candle(index, candle))
+            batch.append(line if ndjson or index == 0 else "," + line)
+            index += 1
+            if len(batch) >= STREAM_BATCH:
+                yield "\n".join(batch) + "\n" if ndjson else "".join(batch)
+                batch = []
+    except Exception as e:
+        error = str(e)
+    if batch:
+        yield "\n".join(batch) + "\n" if ndjson else "".join(batch)
+    if ndjson:
+        if error is not None:
+            yield json.dumps({"error": error}) + "\n"
+    else:
+        yield "]" + (f", \"error\": {json.dumps(error)}" if error is not None else "") + "}"
+
 
 @router.get("/candles/{symbol}")
-def get_candles(symbol: str, exchange: str = "NSE", interval: str = "5minute", days: int = 1):
-    """Fetches historical OHLC candle data for a symbol."""
-    from datetime import datetime, timedelta
-    
-    kite = KiteClient()
-    
-    if not kite.kite or not kite.access_token:
+@on_lane(market_data_lane)
+def get_candles(
+    symbol: str,
+    exchange: str = "NSE",
+    interval: str = "5minute",
+    days: int = 1,
+    indicators: Optional[str] = None,
+    stream: bool = False,
+    fmt: str = Query("ndjson", alias="format"),
+    source: str = "upstream",
+    kite: KiteClient = Depends(get_kite_client),
+):
+    """Fetches historical OHLC candle data for a symbol.
+
+    `indicators=ema:20,rsi:14` adds server-computed indicator series
+    aligned with the candles (see app/indicators.py).
+
+    `stream=true` sends candles as they are read instead of building the
+    whole document: `format=ndjson` (a header line, then one candle per
+    line) or `format=json` (the usual shape, chunked). `source=store`
+    reads candles saved by /api/history/backfill instead of Kite.
+    """
+    if not kite.session_ready():
         raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
     
-    try:
-        # Get instrument token (cached)
-        instrument_token = kite.get_instrument_token(symbol, exchange)
-        
-        # Calculate date range
+    if stream:
+        if indicators:
+            raise HTTPException(status_code=400, detail="indicators are not supported with stream=true")
+        if fmt not in ("ndjson", "json") or source not in ("upstream", "store"):
+            raise HTTPException(status_code=400, detail="format must be ndjson|json and source upstream|store")
+        # Checked up front: once streaming has started an error can only be reported in-band
+        if interval not in MAX_DAYS_PER_REQUEST:
+            raise HTTPException(status_code=400, detail=f"Unsupported interval: {interval}")
+        try:
+            instrument_token = kite.get_instrument_token(symbol, exchange)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=str(e))
         to_date = datetime.now()
         from_date = to_date - timedelta(days=days)
-        
-        # Fetch historical data
-        data = kite.kite.historical_data(
-            instrument_token=instrument_token,
-            from_date=from_date,
-            to_date=to_date,
-            interval=interval
+        if source == "store":
+            candles = history_store.iter_load(instrument_token, interval, from_date, to_date)
+        else:
+            candles = iter_range(kite, instrument_token, interval, from_date, to_date)
+        header = {"symbol": symbol, "exchange": exchange, "interval": interval}
+        return StreamingResponse(
+            _stream_candles(header, candles, fmt),
+            media_type="application/x-ndjson" if fmt == "ndjson" else "application/json"
         )
-        
-        # Format candles
-        candles = []
-        for i, candle in enumerate(data):
-            candles.append({
-                "index": i,
-                "date": candle["date"].isoformat() if hasattr(candle["date"], 'isoformat') else str(candle["date"]),
-                "open": candle["open"],
-                "high": candle["high"],
-                "low": candle["low"],
-                "close": candle["close"],
-                "volume": candle["volume"]
-            })
-        
-        return {
-            "symbol": symbol,
-            "exchange": exchange,
-            "interval": interval,
-            "candles": candles
-        }
-            
+    
+    specs = None
+    if indicators:
+        try:
+            specs = parse_specs(indicators)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        series = load_candles(kite, symbol, exchange, interval, days)
+    except Exception as e:
+        result = _serve_stale(candle_cache, (exchange, symbol, interval, days), e)
+        if specs is not None:
+            result["indicators"] = compute(result["candles"], specs)
+        return result
+    
+    if specs is None:
+        return _json_response(series.body)
+    
+    # Cached (serialized) per (token, interval, params) and tied to this exact candle set
+    token = kite.cached_instrument_token(symbol, exchange)
+    indicator_key = (token or f"{exchange}:{symbol}", interval, days, canonical(specs))
+    entry = indicator_cache.get(indicator_key)
+    if entry is None or entry[0] is not series:
+        entry = (series, dumps(compute(series.candles(), specs)).encode())
+        indicator_cache.set(indicator_key, entry)
+    return _json_response(series.body[:-1] + b',"indicators":' + entry[1] + b"}")
+
+@router.get("/depth/{symbol}")
+@on_lane(market_data_lane)
+def get_depth(symbol: str, exchange: str = "NSE", kite: KiteClient = Depends(get_kite_client)):
+    """Five-level market depth.
+
+    Served from the tick-fed depth store while the instrument streams in
+    full mode; otherwise fetched once from the quote API.
+    """
+    if not kite.session_ready():
+        raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
+    
+    token = kite.cached_instrument_token(symbol, exchange)
+    if token is not None and TickerService(kite.account_id).live_tick(token) is not None:
+        depth = depth_store.snapshot(token)
+        if depth is not None:
+            return {"symbol": symbol, "exchange": exchange, "source": "ticks", "depth": depth}
+    
+    try:
+        instrument = f"{exchange}:{symbol}"
+        data = kite.kite.quote([instrument])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if instrument not in data:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+    return {"symbol": symbol, "exchange": exchange, "source": "quote", "depth": data[instrument].get("depth", {})}
 
 @router.get("/portfolio/holdings")
-def get_holdings():
+@on_lane(portfolio_lane)
+def get_holdings(kite: KiteClient = Depends(get_kite_client)):
     """Fetches portfolio holdings (long-term investments)."""
-    kite = KiteClient()
-    
-    if not kite.kite or not kite.access_token:
+    if not kite.session_ready():
         raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
     
+    cache_key = (kite.account_id, "holdings")
     try:
         holdings = kite.get_holdings()
-        return {"status": "success", "count": len(holdings), "holdings": holdings}
+        result = {"status": "success", "count": len(holdings), "holdings": holdings}
+        portfolio_cache.set(cache_key, result)
+        return result
     except Exception as e:
         print(f"DEBUG: get_holdings error: {e}") 
         error_msg = str(e).lower()
         if "token" in error_msg or "session" in error_msg or "auth" in error_msg or "login" in error_msg:
              raise HTTPException(status_code=401, detail="Session expired. Please login again.")
-        raise HTTPException(status_code=500, detail=str(e))
+        return _serve_stale(portfolio_cache, cache_key, e)
 
 @router.get("/portfolio/positions")
-def get_positions():
+@on_lane(portfolio_lane)
+def get_positions(kite: KiteClient = Depends(get_kite_client)):
     """Fetches current day positions."""
-    kite = KiteClient()
-    
-    if not kite.kite or not kite.access_token:
+    if not kite.session_ready():
         raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
     
+    cache_key = (kite.account_id, "positions")
     try:
         positions = kite.get_positions()
-        return {"status": "success", "positions": positions}
+        result = {"status": "success", "positions": positions}
+        portfolio_cache.set(cache_key, result)
+        return result
     except Exception as e:
         error_msg = str(e).lower()
         if "token" in error_msg or "session" in error_msg or "auth" in error_msg or "login" in error_msg:
              raise HTTPException(status_code=401, detail="Session expired. Please login again.")
-        raise HTTPException(status_code=500, detail=str(e))
+        return _serve_stale(portfolio_cache, cache_key, e)
 
 @router.get("/portfolio/margins")
-def get_margins():
+@on_lane(portfolio_lane)
+def get_margins(kite: KiteClient = Depends(get_kite_client)):
     """Fetches account margins."""
-    kite = KiteClient()
-    
-    if not kite.kite or not kite.access_token:
+    if not kite.session_ready():
         raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
     
+    cache_key = (kite.account_id, "margins")
     try:
         margins = kite.get_margins()
-        return {"status": "success", "margins": margins}
+        result = {"status": "success", "margins": margins}
+        portfolio_cache.set(cache_key, result)
+        return result
     except Exception as e:
         error_msg = str(e).lower()
         if "token" in error_msg or "session" in error_msg or "auth" in error_msg or "login" in error_msg:
              raise HTTPException(status_code=401, detail="Session expired. Please login again.")
-        raise HTTPException(status_code=500, detail=str(e))
+        return _serve_stale(portfolio_cache, cache_key, e)
+
+
+@router.get("/portfolio/analytics")
+@on_lane(portfolio_lane)
+def get_portfolio_analytics(kite: KiteClient = Depends(get_kite_client)):
+    """Allocation, sector/asset-class weights, concentration and P&L of the account."""
+    if not kite.session_ready():
+        raise HTTPException(status_code=401, detail="Kite session not active. Please login first.")
+
+    cached = analytics_cache.get(kite.account_id)
+    if cached is not None:
+        return cached
+
+    cache_key = (kite.account_id, "analytics")
+    # An order update while fetching invalidates the entry; don't cache the pre-fill result then
+    generation = analytics_cache.generation(kite.account_id)
+    try:
+        holdings = kite.get_holdings()
+        positions = kite.get_positions()
+        result = {"status": "success", "as_of": time.time(), **compute_analytics(holdings, positions)}
+        analytics_cache.set(kite.account_id, result, generation=generation)
+        portfolio_cache.set(cache_key, result)
+        return result
+    except Exception as e:
+        error_msg = str(e).lower()
+        if "token" in error_msg or "session" in error_msg or "auth" in error_msg or "login" in error_msg:
+             raise HTTPException(status_code=401, detail="Session expired. Please login again.")
+        return _serve_stale(portfolio_cache, cache_key, e)
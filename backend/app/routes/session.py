@@ -1,15 +1,15 @@
 """API endpoints for session management"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.dependencies import get_kite_client
 from app.kite_client import KiteClient
 from app.security.vault import CredentialVault
 
 router = APIRouter(prefix="/api/session", tags=["session"])
 
-kite_client = KiteClient()
-
 
 @router.get("/status")
-async def session_status():
+async def session_status(kite_client: KiteClient = Depends(get_kite_client)):
     """Check session status with full state for frontend UI."""
     api_key_preview = ""
     if kite_client.api_key:
@@ -17,16 +17,19 @@ async def session_status():
 
     return {
         "active": kite_client.is_session_active(),
-        "has_saved_session": CredentialVault.session_exists(),
-        "has_credentials": CredentialVault.exists(),
+        "has_saved_session": CredentialVault.session_exists(kite_client.account_id),
+        "has_credentials": CredentialVault.exists(kite_client.account_id),
         "configured": kite_client.is_configured(),
         "api_key_preview": api_key_preview,
+        "phase": kite_client.phase,
     }
 
 
 @router.get("/login-url")
-async def login_url():
+async def login_url(kite_client: KiteClient = Depends(get_kite_client)):
     """Return the Zerodha OAuth login URL (keeps api_key server-side)."""
+    # Credentials may still be loading from the vault; wait briefly as /api/kite/login-url does
+    await run_in_threadpool(kite_client.wait_until_ready)
     if not kite_client.is_configured():
         raise HTTPException(400, "Kite client not configured. Save credentials first.")
 
@@ -35,7 +38,7 @@ async def login_url():
 
 
 @router.post("/restore")
-async def restore_session():
+async def restore_session(kite_client: KiteClient = Depends(get_kite_client)):
     """Attempt to restore session from vault."""
     if kite_client.is_session_active():
         return {"status": "already_active", "message": "Session is already active"}
@@ -48,7 +51,21 @@ async def restore_session():
 
 
 @router.delete("/logout")
-async def logout():
+async def logout(kite_client: KiteClient = Depends(get_kite_client)):
     """Clear current session and remove persisted token."""
     result = kite_client.logout()
     return result
+
+
+@router.get("/accounts")
+async def list_accounts():
+    """Accounts known to this process (loaded or with a vault file) and their phase."""
+    loaded = {client.account_id: client for client in KiteClient.accounts()}
+    account_ids = sorted(set(loaded) | set(CredentialVault.list_accounts()))
+    return {
+        "accounts": [
+            loaded[account_id].readiness() if account_id in loaded
+            else {"account_id": account_id, "phase": "not-loaded", "ready": False}
+            for account_id in account_ids
+        ]
+    }
@@ -1,13 +1,16 @@
-"""API endpoints for encrypted credential vault"""
-from fastapi import APIRouter, HTTPException
+"""API endpoints for encrypted credential vault.
+
+Vault calls derive keys (PBKDF2) and touch the keyring and disk, so these
+routes are plain `def` and run in the threadpool, off the event loop.
+"""
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.dependencies import get_account_id, get_or_create_kite_client
 from app.security.vault import CredentialVault
 from app.kite_client import KiteClient
 
 router = APIRouter(prefix="/api/vault", tags=["vault"])
 
-kite_client = KiteClient()
-
 
 class SaveRequest(BaseModel):
     api_key: str
@@ -15,14 +18,14 @@ class SaveRequest(BaseModel):
 
 
 @router.get("/status")
-async def vault_status():
+def vault_status(account_id: str = Depends(get_account_id)):
     """Check vault status and return preview info for UI display."""
-    exists = CredentialVault.exists()
+    exists = CredentialVault.exists(account_id)
     api_key_preview = ""
 
     if exists:
         try:
-            creds = CredentialVault.load()
+            creds = CredentialVault.load(account_id)
             api_key_preview = creds["api_key"][-4:]
         except Exception:
             pass
@@ -31,7 +34,7 @@ async def vault_status():
 
 
 @router.post("/save")
-async def save_credentials(req: SaveRequest):
+def save_credentials(req: SaveRequest, kite_client: KiteClient = Depends(get_or_create_kite_client)):
     """Save encrypted credentials to vault and configure backend."""
 
     # Validate API key format
@@ -43,7 +46,7 @@ async def save_credentials(req: SaveRequest):
         raise HTTPException(400, "Invalid API secret")
 
     try:
-        CredentialVault.save(req.api_key, req.api_secret)
+        CredentialVault.save(req.api_key, req.api_secret, kite_client.account_id)
 
         # Auto-configure the backend so it's immediately ready
         kite_client.configure(req.api_key, req.api_secret)
@@ -54,10 +57,10 @@ async def save_credentials(req: SaveRequest):
 
 
 @router.delete("/reset")
-async def reset_vault():
+def reset_vault(account_id: str = Depends(get_account_id)):
     """Delete vault file (no password verification needed)."""
-    if not CredentialVault.exists():
+    if not CredentialVault.exists(account_id):
         raise HTTPException(404, "No vault found")
 
-    CredentialVault.delete()
+    CredentialVault.delete(account_id)
     return {"status": "deleted", "message": "Vault reset successfully"}
@@ -1,57 +1,392 @@
 """
 WebSocket routes for real-time streaming to frontend clients.
+
+Ticks arrive on the KiteTicker thread with their `Tick` model (built once
+by TickerService, carrying its JSON), are handed to the event loop and
+queued per client; each client's message is spliced from those strings. Each client's queue holds
+at most one pending tick per instrument token (newer ticks replace older
+unsent ones), so a slow client gets conflated prices instead of an
+ever-growing backlog.
+
+Every tick carries its per-token sequence number (`seq`). Subscribing sends
+a `snapshot` message straight away: the last tick of each token, or, for
+tokens listed in `since_seq` (`{token: last seq seen}`), every buffered tick
+after that sequence, so a reconnecting client resumes without gaps. Tokens
+whose history has left the replay buffer are listed in `gaps` and get only
+their latest tick. Snapshots may overlap live ticks; clients drop ticks
+whose `seq` is not newer than the last one they saw for that token.
+
+Clients can also subscribe to market depth (`subscribe_depth`); each depth
+message carries only the levels that changed since that client's previous
+one (the first is a full snapshot).
+
+Clients can also watch live indicators (`subscribe_indicators`); streams
+are shared per (account, token, interval, spec) and conflated per client
+like ticks.
+
+Price alerts fired by the account's alert engine (app/alerts.py) are pushed
+to all of that account's clients as `alert` messages; unlike ticks they are
+never conflated.
+
+Tick latency is traced from receipt to socket write per client
+(app/observability/tick_latency.py); clients may opt in to echoing a
+timestamp back (`latency_echo`) to measure round-trip time.
+
+Each account has its own ticker (`?account=<id>` on /ws/ticks, or the
+`X-Account-Id` header on the REST routes); all tickers feed the same
+fan-out pipeline, but ticks, depth and indicators only reach clients of the
+account whose ticker produced them (each ticker numbers its own `seq`).
 """
 import asyncio
+import itertools
 import json
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
-from app.ticker_service import ticker_service
+import time
+from functools import partial
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.accounts import DEFAULT_ACCOUNT, validate_account_id
+from app.alerts import alert_engine_for
+from app.dependencies import get_ticker_service, is_known_account
+from app.depth import depth_store
+from app.indicators import (
+    INTERVAL_SECONDS, IndicatorStream, canonical, default_days, indicator_hub, load_history, parse_specs,
+)
 from app.kite_client import KiteClient
+from app.lanes import market_data_lane
+from app.models import Tick, dumps
+from app.ticker_service import TickerService
+from app.observability.histogram import RollingLatencyHistogram
+from app.observability.metrics import ws_messages_sent, ws_ticks_conflated, ws_ticks_dropped
+from app.observability.prometheus import REGISTRY
+from app.observability.tick_latency import MAX_ECHO_AGE_US, tick_latency
 
 router = APIRouter()
 
+# Upper bound on distinct tokens waiting in one client's outbound queue
+MAX_PENDING_TICKS = 5000
+
+_client_ids = itertools.count(1)
+
+
+class ClientConnection:
+    """A /ws/ticks client with a conflating outbound tick queue."""
+
+    def __init__(self, websocket: WebSocket, account_id: str = DEFAULT_ACCOUNT):
+        self.websocket = websocket
+        self.account_id = account_id
+        self.pending: Dict[int, Tick] = {}
+        self.pending_alerts: List[dict] = []
+        self.pending_snapshots: List[str] = []
+        # (token, interval, spec) -> latest indicator values
+        self.pending_indicators: Dict[tuple, dict] = {}
+        # Depth channel: watched tokens, tokens with unsent changes, last sent books
+        self.depth_tokens: Set[int] = set()
+        self.depth_dirty: Set[int] = set()
+        self.depth_sent: Dict[int, object] = {}
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.client_id = next(_client_ids)
+        # Receipt / processing stamps of the oldest tick batch in `pending`
+        self.pending_received_ns = None
+        self.pending_processed_ns = None
+        self.latency_echo = False
+        self.write_latency = RollingLatencyHistogram(tick_latency.window)
+        self.rtt = RollingLatencyHistogram(tick_latency.window)
+        tick_latency.add_client(self)
+
+    def enqueue(self, ticks: List[Tick], received_ns: Optional[int] = None, processed_ns: Optional[int] = None):
+        """Queue ticks (shared with every other client); called on the event loop."""
+        if self.closed:
+            ws_ticks_dropped.inc(len(ticks))
+            return
+        pending = self.pending
+        if not pending:
+            self.pending_received_ns = received_ns
+            self.pending_processed_ns = processed_ns
+        for tick in ticks:
+            token = tick.instrument_token
+            if token in pending:
+                ws_ticks_conflated.inc()
+            elif len(pending) >= MAX_PENDING_TICKS:
+                ws_ticks_dropped.inc()
+                continue
+            pending[token] = tick
+        self.wakeup.set()
+
+    def enqueue_indicators(self, key: tuple, values: dict):
+        """Queue the latest values of one indicator stream (conflated)."""
+        if not self.closed:
+            self.pending_indicators[key] = values
+            self.wakeup.set()
+
+    def enqueue_snapshot(self, snapshot: str):
+        """Queue a snapshot/replay message; sent ahead of pending ticks."""
+        if not self.closed:
+            self.pending_snapshots.append(snapshot)
+            self.wakeup.set()
+
+    def enqueue_alerts(self, alerts: List[dict]):
+        if not self.closed:
+            self.pending_alerts.extend(alerts)
+            self.wakeup.set()
+
+    def mark_depth(self, tokens):
+        """Flag watched tokens whose book changed (diffed at send time)."""
+        changed = self.depth_tokens.intersection(tokens)
+        if changed and not self.closed:
+            self.depth_dirty |= changed
+            self.wakeup.set()
+
+    def _depth_diffs(self) -> List[dict]:
+        dirty, self.depth_dirty = self.depth_dirty, set()
+        messages = []
+        for token in dirty:
+            if token not in self.depth_tokens:
+                continue
+            message, book = depth_store.diff(token, self.depth_sent.get(token))
+            if message is not None:
+                messages.append(message)
+                self.depth_sent[token] = book
+        return messages
+
+    async def send_loop(self):
+        """Drain the queue, sending everything pending as one message."""
+        while not self.closed:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            if self.pending_snapshots:
+                snapshots, self.pending_snapshots = self.pending_snapshots, []
+                try:
+                    for snapshot in snapshots:
+                        await self.websocket.send_text(snapshot)
+                        ws_messages_sent.inc()
+                except Exception:
+                    self.close()
+            if self.pending_alerts:
+                alerts, self.pending_alerts = self.pending_alerts, []
+                try:
+                    await self.websocket.send_text(json.dumps({"type": "alert", "data": alerts}))
+                    ws_messages_sent.inc()
+                except Exception:
+                    self.close()
+            if self.depth_dirty:
+                depth = self._depth_diffs()
+                if depth:
+                    try:
+                        await self.websocket.send_text(json.dumps({"type": "depth", "data": depth}))
+                        ws_messages_sent.inc()
+                    except Exception:
+                        self.close()
+            if self.pending_indicators:
+                indicators, self.pending_indicators = self.pending_indicators, {}
+                try:
+                    await self.websocket.send_text(
+                        json.dumps({"type": "indicators", "data": list(indicators.values())})
+                    )
+                    ws_messages_sent.inc()
+                except Exception:
+                    self.close()
+            if not self.pending:
+                continue
+            batch, self.pending = self.pending, {}
+            received_ns, processed_ns = self.pending_received_ns, self.pending_processed_ns
+            if self.latency_echo:
+                message = _tick_message("ticks", batch.values(), sent_us=time.monotonic_ns() // 1000)
+            else:
+                message = _tick_message("ticks", batch.values())
+            try:
+                await self.websocket.send_text(message)
+                ws_messages_sent.inc()
+            except Exception:
+                ws_ticks_dropped.inc(len(batch))
+                self.close()
+                continue
+            if received_ns is not None:
+                written_ns = time.monotonic_ns()
+                self.write_latency.record_ns(written_ns - received_ns)
+                tick_latency.record("receive_to_write", written_ns - received_ns)
+                if processed_ns is not None:
+                    tick_latency.record("process_to_write", written_ns - processed_ns)
+
+    def record_echo(self, sent_us):
+        """Record the round trip of a tick message echoed back by the client."""
+        if not isinstance(sent_us, int):
+            return
+        elapsed_us = time.monotonic_ns() // 1000 - sent_us
+        if 0 <= elapsed_us <= MAX_ECHO_AGE_US:
+            self.rtt.record_us(elapsed_us)
+
+    def latency_info(self) -> dict:
+        return {
+            "client_id": self.client_id,
+            "account_id": self.account_id,
+            "pending_ticks": len(self.pending),
+            "latency_echo": self.latency_echo,
+            "receive_to_write": self.write_latency.summary(),
+            "rtt": self.rtt.summary(),
+        }
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+
+
 # Store active WebSocket connections
-active_connections: List[WebSocket] = []
+active_connections: List[ClientConnection] = []
 
+_loop: Optional[asyncio.AbstractEventLoop] = None
+# Ticker services whose callbacks already feed broadcast_ticks
+_pumped_tickers = set()
 
-async def broadcast_ticks(ticks):
-    """Broadcast tick data to all connected WebSocket clients."""
-    if not active_connections:
+
+def _tick_message(kind: str, ticks: Iterable[Tick], **fields) -> str:
+    """`{"type": kind, "data": [...], **fields}` spliced from the ticks' JSON."""
+    extra = "".join(f',"{name}":{dumps(value)}' for name, value in fields.items())
+    return f'{{"type":"{kind}","data":[{",".join(tick.json for tick in ticks)}]{extra}}}'
+
+
+def _snapshot(ticker_service: TickerService, tokens: List[int], since_seq: Optional[dict]) -> Tuple[List[Tick], List[int]]:
+    """Snapshot (or, with `since_seq`, replay) ticks and gap tokens for newly subscribed tokens."""
+    since_seq = since_seq or {}
+    data, gaps = [], []
+    for token in tokens:
+        since = since_seq.get(str(token))
+        if since is None:
+            tick = ticker_service.get_last_tick_model(token)
+            if tick is not None:
+                data.append(tick)
+            continue
+        ticks, complete = ticker_service.ticks_since(token, int(since))
+        data.extend(ticks)
+        if not complete:
+            gaps.append(token)
+    return data, gaps
+
+
+def broadcast_ticks(account_id: str, ticks):
+    """Queue one account's tick data for that account's WebSocket clients (event loop)."""
+    connections = [c for c in active_connections if c.account_id == account_id]
+    if not connections:
         return
-    
-    # Format ticks for frontend
-    formatted_ticks = []
-    for tick in ticks:
-        formatted_ticks.append({
-            "instrument_token": tick.get("instrument_token"),
-            "symbol": tick.get("tradingsymbol", ""),
-            "last_price": tick.get("last_price"),
-            "change": tick.get("change", 0),
-            "volume": tick.get("volume", 0),
-            "ohlc": tick.get("ohlc", {}),
-            "timestamp": str(tick.get("timestamp", ""))
-        })
-    
-    message = json.dumps({"type": "ticks", "data": formatted_ticks})
-    
-    # Send to all connected clients
-    for connection in active_connections.copy():
-        try:
-            await connection.send_text(message)
-        except Exception:
-            active_connections.remove(connection)
+
+    # Models (and their JSON) are shared by all clients; relayed duplicates have none yet
+    received_ns = ticks[0].get("_received_ns") if ticks else None
+    models = [tick.get("_model") or Tick.from_kite(tick) for tick in ticks]
+    processed_ns = time.monotonic_ns()
+    for connection in connections:
+        connection.enqueue(models, received_ns, processed_ns)
+    if received_ns is not None:
+        tick_latency.record("receive_to_process", processed_ns - received_ns)
+
+    depth_clients = [c for c in connections if c.depth_tokens]
+    if depth_clients:
+        depth_tokens = {tick["instrument_token"] for tick in ticks if "depth" in tick}
+        if depth_tokens:
+            for connection in depth_clients:
+                connection.mark_depth(depth_tokens)
+
+    # Indicator streams: computed once per stream, then queued per watcher
+    for watchers, values in indicator_hub.on_ticks(ticks, account_id):
+        key = (values["instrument_token"], values["interval"], values["indicators"])
+        for connection in watchers:
+            connection.enqueue_indicators(key, values)
+
+
+async def _subscribe_indicators(client: ClientConnection, ticker_service: TickerService, message: dict):
+    """Attach a client to a shared indicator stream, seeding it if new."""
+    token = int(message["token"])
+    interval = message.get("interval", "5minute")
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    specs = parse_specs(message.get("indicators", ""))
+    key = (ticker_service.account_id, token, interval, canonical(specs))
+
+    stream = indicator_hub.get(key)
+    if stream is None:
+        kite = KiteClient(ticker_service.account_id)
+        if not await run_in_threadpool(kite.session_ready):
+            raise ValueError("Kite session not active")
+        days = int(message.get("days") or default_days(interval))
+        candles = await market_data_lane.run(load_history, kite.kite, token, interval, days)
+        stream = IndicatorStream(token, interval, specs, candles, ticker_service.account_id)
+    stream = indicator_hub.add(stream, client)
+    ticker_service.subscribe([token])
+    return stream
+
+
+def broadcast_alerts(alerts: List[dict]):
+    """Queue fired alerts for their account's clients (event loop)."""
+    account_id = alerts[0]["account_id"]
+    for connection in active_connections:
+        if connection.account_id == account_id:
+            connection.enqueue_alerts(alerts)
+
+
+def _on_alerts(alerts: List[dict]):
+    """Alert engine listener (ticker thread) - hop onto the event loop."""
+    if _loop is not None and active_connections:
+        _loop.call_soon_threadsafe(broadcast_alerts, alerts)
+
+
+def _on_ticker_ticks(account_id: str, ticks):
+    """TickerService callback (ticker thread) - hop onto the event loop."""
+    if _loop is not None and active_connections:
+        _loop.call_soon_threadsafe(broadcast_ticks, account_id, ticks)
+
+
+def _ensure_tick_pump(ticker: TickerService):
+    """Bind a ticker's callback to the running event loop once."""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.get_running_loop()
+    if ticker.account_id not in _pumped_tickers:
+        _pumped_tickers.add(ticker.account_id)
+        ticker.add_callback(partial(_on_ticker_ticks, ticker.account_id))
+        alert_engine_for(ticker.account_id).add_listener(_on_alerts)
+
+
+REGISTRY.callback(
+    "tradexr_ws_clients",
+    "Connected /ws/ticks clients.",
+    (),
+    lambda: {(): len(active_connections)},
+)
+REGISTRY.callback(
+    "tradexr_ws_queue_depth",
+    "Pending ticks across /ws/ticks outbound queues (total and largest).",
+    ("stat",),
+    lambda: {
+        ("total",): sum(len(c.pending) for c in active_connections),
+        ("max",): max((len(c.pending) for c in active_connections), default=0),
+    },
+)
 
 
 @router.websocket("/ws/ticks")
 async def websocket_ticks(websocket: WebSocket):
     """WebSocket endpoint for real-time tick data."""
+    account_id = websocket.query_params.get("account") or DEFAULT_ACCOUNT
+    try:
+        known = is_known_account(validate_account_id(account_id))
+    except ValueError:
+        known = False
+    if not known:
+        await websocket.close(code=1008)  # Policy violation: unknown account
+        return
+    KiteClient(account_id).start_background_init()
+    ticker_service = TickerService(account_id)
+
     await websocket.accept()
-    active_connections.append(websocket)
+    _ensure_tick_pump(ticker_service)
+    client = ClientConnection(websocket, account_id)
+    active_connections.append(client)
+    sender = asyncio.create_task(client.send_loop())
     
     try:
         # Start ticker if not already running
         if not ticker_service.is_connected:
-            ticker_service.start()
+            await run_in_threadpool(ticker_service.start)
         
         # Send connection confirmation
         await websocket.send_json({
@@ -77,6 +412,13 @@ async def websocket_ticks(websocket: WebSocket):
                         "type": "subscribed",
                         "tokens": tokens
                     })
+                    try:
+                        snapshot, gaps = _snapshot(ticker_service, [int(t) for t in tokens], message.get("since_seq"))
+                    except (AttributeError, TypeError, ValueError) as e:
+                        await websocket.send_json({"type": "error", "message": f"Invalid since_seq: {e}"})
+                        continue
+                    if snapshot or gaps:
+                        client.enqueue_snapshot(_tick_message("snapshot", snapshot, gaps=gaps))
                     
                 elif message.get("action") == "unsubscribe":
                     tokens = message.get("tokens", [])
@@ -85,44 +427,98 @@ async def websocket_ticks(websocket: WebSocket):
                         "type": "unsubscribed",
                         "tokens": tokens
                     })
+
+                elif message.get("action") == "subscribe_depth":
+                    tokens = [int(t) for t in message.get("tokens", [])]
+                    client.depth_tokens.update(tokens)
+                    ticker_service.subscribe(tokens)
+                    # Start each newly watched token from a full snapshot
+                    for token in tokens:
+                        client.depth_sent.pop(token, None)
+                    client.mark_depth(tokens)
+                    await websocket.send_json({"type": "depth_subscribed", "tokens": tokens})
+
+                elif message.get("action") == "unsubscribe_depth":
+                    tokens = [int(t) for t in message.get("tokens", [])]
+                    client.depth_tokens.difference_update(tokens)
+                    for token in tokens:
+                        client.depth_sent.pop(token, None)
+                    await websocket.send_json({"type": "depth_unsubscribed", "tokens": tokens})
+
+                elif message.get("action") == "subscribe_indicators":
+                    # {"token": 408065, "interval": "5minute", "indicators": "ema:20,rsi:14"}
+                    try:
+                        stream = await _subscribe_indicators(client, ticker_service, message)
+                    except (KeyError, ValueError) as e:
+                        await websocket.send_json({"type": "error", "message": str(e)})
+                        continue
+                    except Exception as e:
+                        await websocket.send_json({"type": "error", "message": f"Could not load history: {e}"})
+                        continue
+                    snapshot = stream.snapshot()
+                    await websocket.send_json({
+                        "type": "indicators",
+                        "data": [snapshot] if snapshot else []
+                    })
+
+                elif message.get("action") == "latency_echo":
+                    client.latency_echo = bool(message.get("enabled", True))
+
+                elif message.get("action") == "echo":
+                    client.record_echo(message.get("sent_us"))
+
+                elif message.get("action") == "unsubscribe_indicators":
+                    try:
+                        key = (client.account_id, int(message["token"]), message.get("interval", "5minute"),
+                               canonical(parse_specs(message.get("indicators", ""))))
+                    except (KeyError, ValueError) as e:
+                        await websocket.send_json({"type": "error", "message": str(e)})
+                        continue
+                    indicator_hub.remove(client, key)
                     
             except asyncio.TimeoutError:
                 # Send ping to keep connection alive
                 await websocket.send_json({"type": "ping"})
                 
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
-    except Exception as e:
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        pass
+    except Exception:
+        pass
+    finally:
+        client.close()
+        indicator_hub.remove(client)
+        sender.cancel()
+        if client in active_connections:
+            active_connections.remove(client)
 
 
 @router.get("/ticker/status")
-async def ticker_status():
+async def ticker_status(ticker_service: TickerService = Depends(get_ticker_service)):
     """Get ticker connection status."""
     return {
         "connected": ticker_service.is_connected,
         "subscribed_tokens": list(ticker_service.subscribed_tokens),
+        "shards": ticker_service.shard_status(),
         "active_websockets": len(active_connections)
     }
 
 
 @router.post("/ticker/start")
-async def start_ticker():
+async def start_ticker(ticker_service: TickerService = Depends(get_ticker_service)):
     """Start the ticker service."""
-    success = ticker_service.start()
+    success = await run_in_threadpool(ticker_service.start)
     return {"success": success, "connected": ticker_service.is_connected}
 
 
 @router.post("/ticker/stop")
-async def stop_ticker():
+async def stop_ticker(ticker_service: TickerService = Depends(get_ticker_service)):
     """Stop the ticker service."""
     ticker_service.stop()
     return {"success": True, "connected": False}
 
 
 @router.post("/ticker/subscribe")
-async def subscribe_tokens(tokens: List[int]):
+async def subscribe_tokens(tokens: List[int], ticker_service: TickerService = Depends(get_ticker_service)):
     """Subscribe to instrument tokens."""
     ticker_service.subscribe(tokens)
     return {
@@ -8,11 +8,21 @@ using the BYOK (Bring Your Own Key) model:
 - Encrypts credentials with Fernet (AES-128-CBC + HMAC)
 - Stores encrypted data in .vault file with restricted permissions (0600)
 
+Accounts:
+- The default account uses .vault/.session; additional accounts use
+  .vault.<account_id>/.session.<account_id>
+
 Session Token Storage:
 - Access tokens are encrypted with a machine-derived key (no password needed)
 - Allows auto-restore of session on app restart
 - Token file stored separately from credentials (.session file)
 
+Keyring:
+- The machine key (PBKDF2) is derived once per process and the Fernet
+  cipher is reused
+- Decrypted payloads are cached and revalidated with a stat() against the
+  file's inode, mtime and size, so status polls never re-decrypt
+
 Security Notes:
 - Salt is application-specific to prevent rainbow table attacks
 - Vault file should be added to .gitignore
@@ -21,10 +31,70 @@ from cryptography.fernet import Fernet
 import base64
 import hashlib
 import json
+import threading
 import uuid
 import platform
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+from app.accounts import ACCOUNT_ID_PATTERN, DEFAULT_ACCOUNT, validate_account_id
+from app.observability.metrics import cache_counters
+
+
+def _account_file(filename: str, account_id: str) -> Path:
+    """Per-account file next to the backend root; the default account keeps the bare name."""
+    base = Path(__file__).parent.parent.parent
+    if account_id == DEFAULT_ACCOUNT:
+        return base / filename
+    return base / f"{filename}.{validate_account_id(account_id)}"
+
+
+class _Keyring:
+    """Process-level cache of the machine cipher and decrypted vault files."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cipher: Optional[Fernet] = None
+        # path -> ((st_ino, st_mtime_ns, st_size), payload)
+        self._payloads: Dict[Path, Tuple[tuple, dict]] = {}
+        self._hit, self._miss = cache_counters("vault")
+
+    def cipher(self) -> Fernet:
+        """Fernet cipher for the machine key, derived on first use."""
+        if self._cipher is None:
+            with self._lock:
+                if self._cipher is None:
+                    self._cipher = Fernet(CredentialVault._get_machine_key())
+        return self._cipher
+
+    @staticmethod
+    def _signature(path: Path) -> tuple:
+        st = path.stat()
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def read(self, path: Path) -> dict:
+        """Decrypt `path`, reusing the cached payload if the file is unchanged.
+
+        Raises FileNotFoundError if the file does not exist.
+        """
+        signature = self._signature(path)
+        cached = self._payloads.get(path)
+        if cached is not None and cached[0] == signature:
+            self._hit.inc()
+            return dict(cached[1])
+
+        self._miss.inc()
+        payload = json.loads(self.cipher().decrypt(path.read_bytes()))
+        self._payloads[path] = (signature, payload)
+        return dict(payload)
+
+    def write(self, path: Path, payload: dict):
+        """Encrypt and write `payload` (owner read-write only), updating the cache."""
+        path.write_bytes(self.cipher().encrypt(json.dumps(payload).encode()))
+        path.chmod(0o600)
+        self._payloads[path] = (self._signature(path), dict(payload))
+
+    def forget(self, path: Path):
+        self._payloads.pop(path, None)
 
 
 class CredentialVault:
@@ -59,108 +129,92 @@ class CredentialVault:
         return base64.urlsafe_b64encode(key)
 
     @staticmethod
-    def save(api_key: str, api_secret: str) -> None:
-        """Encrypt and save credentials to vault file using machine key."""
-        key = CredentialVault._get_machine_key()
-        cipher = Fernet(key)
+    def _vault_path(account_id: str = DEFAULT_ACCOUNT) -> Path:
+        """Vault file for an account (`.vault`, or `.vault.<account_id>`)."""
+        return _account_file(CredentialVault.VAULT_FILE, account_id)
+
+    @staticmethod
+    def _session_path(account_id: str = DEFAULT_ACCOUNT) -> Path:
+        """Session file for an account (`.session`, or `.session.<account_id>`)."""
+        return _account_file(CredentialVault.SESSION_FILE, account_id)
+
+    @staticmethod
+    def list_accounts() -> List[str]:
+        """Accounts that have a vault file on disk."""
+        vault_path = CredentialVault._vault_path()
+        accounts = [DEFAULT_ACCOUNT] if vault_path.exists() else []
+        prefix = vault_path.name + "."
+        for path in sorted(vault_path.parent.glob(prefix + "*")):
+            account_id = path.name[len(prefix):]
+            if ACCOUNT_ID_PATTERN.match(account_id):
+                accounts.append(account_id)
+        return accounts
 
-        data = json.dumps({
+    @staticmethod
+    def save(api_key: str, api_secret: str, account_id: str = DEFAULT_ACCOUNT) -> None:
+        """Encrypt and save credentials to vault file using machine key."""
+        _keyring.write(CredentialVault._vault_path(account_id), {
             "api_key": api_key,
             "api_secret": api_secret
         })
 
-        encrypted = cipher.encrypt(data.encode())
-
-        vault_path = Path(__file__).parent.parent.parent / CredentialVault.VAULT_FILE
-        vault_path.write_bytes(encrypted)
-
-        # Set restrictive permissions (owner read-write only)
-        vault_path.chmod(0o600)
-
     @staticmethod
-    def load() -> Dict[str, str]:
+    def load(account_id: str = DEFAULT_ACCOUNT) -> Dict[str, str]:
         """Decrypt and load credentials from vault file using machine key."""
-        vault_path = Path(__file__).parent.parent.parent / CredentialVault.VAULT_FILE
-
-        if not vault_path.exists():
+        try:
+            return _keyring.read(CredentialVault._vault_path(account_id))
+        except FileNotFoundError:
             raise FileNotFoundError("Vault file not found. Please set up credentials first.")
 
-        key = CredentialVault._get_machine_key()
-        cipher = Fernet(key)
-
-        encrypted = vault_path.read_bytes()
-        decrypted = cipher.decrypt(encrypted)
-
-        return json.loads(decrypted)
-
     @staticmethod
-    def exists() -> bool:
+    def exists(account_id: str = DEFAULT_ACCOUNT) -> bool:
         """Check if vault file exists"""
-        vault_path = Path(__file__).parent.parent.parent / CredentialVault.VAULT_FILE
-        return vault_path.exists()
+        return CredentialVault._vault_path(account_id).exists()
 
     @staticmethod
-    def delete() -> None:
+    def delete(account_id: str = DEFAULT_ACCOUNT) -> None:
         """Delete vault file (for reset)"""
-        vault_path = Path(__file__).parent.parent.parent / CredentialVault.VAULT_FILE
+        vault_path = CredentialVault._vault_path(account_id)
+        _keyring.forget(vault_path)
         if vault_path.exists():
             vault_path.unlink()
 
     # ========== SESSION TOKEN STORAGE (Auto-restore) ==========
 
     @staticmethod
-    def save_session(access_token: str) -> None:
+    def save_session(access_token: str, account_id: str = DEFAULT_ACCOUNT) -> None:
         """Save access token encrypted with machine-derived key.
 
         This allows auto-restore on app restart without password prompt.
         The token is encrypted with a key derived from machine identifiers.
         """
-        key = CredentialVault._get_machine_key()
-        cipher = Fernet(key)
-
-        data = json.dumps({
+        _keyring.write(CredentialVault._session_path(account_id), {
             "access_token": access_token
         })
 
-        encrypted = cipher.encrypt(data.encode())
-
-        session_path = Path(__file__).parent.parent.parent / CredentialVault.SESSION_FILE
-        session_path.write_bytes(encrypted)
-        session_path.chmod(0o600)
-
     @staticmethod
-    def load_session() -> Optional[str]:
+    def load_session(account_id: str = DEFAULT_ACCOUNT) -> Optional[str]:
         """Load and decrypt access token from session file.
 
         Returns None if no session file exists or decryption fails.
         """
-        session_path = Path(__file__).parent.parent.parent / CredentialVault.SESSION_FILE
-
-        if not session_path.exists():
-            return None
-
         try:
-            key = CredentialVault._get_machine_key()
-            cipher = Fernet(key)
-
-            encrypted = session_path.read_bytes()
-            decrypted = cipher.decrypt(encrypted)
-            data = json.loads(decrypted)
-
-            return data.get("access_token")
+            return _keyring.read(CredentialVault._session_path(account_id)).get("access_token")
         except Exception:
-            # Decryption failed (wrong machine, corrupted file, etc.)
+            # Missing file, wrong machine, corrupted file, etc.
             return None
 
     @staticmethod
-    def session_exists() -> bool:
+    def session_exists(account_id: str = DEFAULT_ACCOUNT) -> bool:
         """Check if session file exists"""
-        session_path = Path(__file__).parent.parent.parent / CredentialVault.SESSION_FILE
-        return session_path.exists()
+        return CredentialVault._session_path(account_id).exists()
 
     @staticmethod
-    def delete_session() -> None:
+    def delete_session(account_id: str = DEFAULT_ACCOUNT) -> None:
         """Delete session file (for logout)"""
-        session_path = Path(__file__).parent.parent.parent / CredentialVault.SESSION_FILE
+        session_path = CredentialVault._session_path(account_id)
+        _keyring.forget(session_path)
         if session_path.exists():
             session_path.unlink()
+
+_keyring = _Keyring()
@@ -0,0 +1,262 @@
+"""
+Columnar decoding of KiteTicker binary frames.
+
+kiteconnect's `_parse_binary` builds a nested dict per tick (OHLC dict,
+ten depth-level dicts, two datetimes) with one `struct.unpack` per field.
+`TickParser` decodes a whole frame with NumPy instead: packets are grouped
+by length (8 LTP, 28/32 index, 44 quote, 184 full), each group is gathered
+into one big-endian uint32 matrix and its columns are written into a
+preallocated structured array (`TICK_DTYPE`). Full-mode depth lands in a
+(n, side, level, price/quantity/orders) float64 array, the layout
+`DepthStore` keeps, so it is stored without building level dicts.
+
+`TickBatch` views into the parser's buffers and is only valid until the
+shard's next frame; consumers that keep data must copy it.
+`TickBatch.to_dicts()` rebuilds kiteconnect-compatible tick dicts for the
+dict-based consumers (depth omitted unless asked for). In the app only the
+depth store reads the arrays; every other consumer still receives those
+dicts (see app/ticker_service.py).
+
+Enabled with `TICK_PARSER=columnar` (see `ColumnarKiteTicker`).
+"""
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from kiteconnect import KiteTicker
+
+MODE_LTP, MODE_QUOTE, MODE_FULL = 1, 2, 3
+_MODE_NAMES = {MODE_LTP: KiteTicker.MODE_LTP, MODE_QUOTE: KiteTicker.MODE_QUOTE, MODE_FULL: KiteTicker.MODE_FULL}
+
+TICK_DTYPE = np.dtype([
+    ("instrument_token", "<u4"),
+    ("mode", "u1"),
+    ("tradable", "?"),
+    ("last_price", "<f8"),
+    ("last_traded_quantity", "<u4"),
+    ("average_traded_price", "<f8"),
+    ("volume_traded", "<u4"),
+    ("total_buy_quantity", "<u4"),
+    ("total_sell_quantity", "<u4"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("change", "<f8"),
+    ("oi", "<u4"),
+    ("oi_day_high", "<u4"),
+    ("oi_day_low", "<u4"),
+    ("last_trade_time", "<i8"),  # epoch seconds, 0 if absent
+    ("exchange_timestamp", "<i8"),
+    ("packet_length", "<u2"),
+])
+DEPTH_LEVELS = 5
+
+_SEGMENT_CDS = KiteTicker.EXCHANGE_MAP["cds"]
+_SEGMENT_BCD = KiteTicker.EXCHANGE_MAP["bcd"]
+_SEGMENT_INDICES = KiteTicker.EXCHANGE_MAP["indices"]
+
+_PACKET_LENGTHS = (8, 28, 32, 44, 184)
+# Word (uint32) columns per packet length
+_INDEX_OHLC = {"high": 2, "low": 3, "open": 4, "close": 5}
+_QUOTE_OHLC = {"open": 7, "high": 8, "low": 9, "close": 10}
+
+
+class TickBatch:
+    """One decoded frame: `ticks` rows plus depth for the full-mode rows."""
+
+    __slots__ = ("ticks", "depth_rows", "depth")
+
+    def __init__(self, ticks: np.ndarray, depth_rows: np.ndarray, depth: np.ndarray):
+        self.ticks = ticks
+        # Row index into `ticks` of each `depth` entry
+        self.depth_rows = depth_rows
+        self.depth = depth
+
+    def __len__(self):
+        return len(self.ticks)
+
+    @property
+    def depth_tokens(self) -> np.ndarray:
+        return self.ticks["instrument_token"][self.depth_rows]
+
+    def to_dicts(self, with_depth: bool = False) -> List[dict]:
+        """kiteconnect-shaped tick dicts. Full-mode ticks carry `depth` as
+        level dicts with `with_depth`, else `None` (depth is in `self.depth`)."""
+        ticks = self.ticks
+        n = len(ticks)
+        columns = {name: ticks[name].tolist() for name in TICK_DTYPE.names}
+        token, mode, tradable, ltp = (columns["instrument_token"], columns["mode"],
+                                      columns["tradable"], columns["last_price"])
+        lengths = columns["packet_length"]
+        times = {}
+
+        def to_datetime(epoch):
+            value = times.get(epoch)
+            if value is None:
+                try:
+                    value = times[epoch] = datetime.fromtimestamp(epoch)
+                except (OverflowError, OSError, ValueError):
+                    return None
+            return value
+
+        depth_by_row = {}
+        if len(self.depth_rows):
+            if with_depth:
+                levels = self.depth.tolist()
+                for row, book in zip(self.depth_rows.tolist(), levels):
+                    depth_by_row[row] = {
+                        side: [{"quantity": int(q), "price": p, "orders": int(o)} for p, q, o in book[i]]
+                        for i, side in enumerate(("buy", "sell"))
+                    }
+            else:
+                depth_by_row = dict.fromkeys(self.depth_rows.tolist())
+
+        result = []
+        append = result.append
+        for i in range(n):
+            length = lengths[i]
+            tick = {"tradable": tradable[i], "mode": _MODE_NAMES[mode[i]],
+                    "instrument_token": token[i], "last_price": ltp[i]}
+            if length == 8:
+                append(tick)
+                continue
+            if length >= 44:
+                tick["last_traded_quantity"] = columns["last_traded_quantity"][i]
+                tick["average_traded_price"] = columns["average_traded_price"][i]
+                tick["volume_traded"] = columns["volume_traded"][i]
+                tick["total_buy_quantity"] = columns["total_buy_quantity"][i]
+                tick["total_sell_quantity"] = columns["total_sell_quantity"][i]
+            tick["ohlc"] = {"open": columns["open"][i], "high": columns["high"][i],
+                            "low": columns["low"][i], "close": columns["close"][i]}
+            tick["change"] = columns["change"][i]
+            if length == 184:
+                tick["last_trade_time"] = to_datetime(columns["last_trade_time"][i])
+                tick["oi"] = columns["oi"][i]
+                tick["oi_day_high"] = columns["oi_day_high"][i]
+                tick["oi_day_low"] = columns["oi_day_low"][i]
+                tick["exchange_timestamp"] = to_datetime(columns["exchange_timestamp"][i])
+                tick["depth"] = depth_by_row.get(i)
+            elif length == 32:
+                tick["exchange_timestamp"] = to_datetime(columns["exchange_timestamp"][i])
+            append(tick)
+        return result
+
+
+class TickParser:
+    """Frame decoder with buffers reused across frames (one per ticker shard)."""
+
+    def __init__(self, capacity: int = 1024):
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self._ticks = np.zeros(capacity, dtype=TICK_DTYPE)
+        self._depth = np.zeros((capacity, 2, DEPTH_LEVELS, 3))
+
+    def parse(self, frame: bytes) -> TickBatch:
+        if len(frame) < 2:
+            return TickBatch(self._ticks[:0], np.empty(0, dtype=np.intp), self._depth[:0])
+        packets = int.from_bytes(frame[0:2], "big")
+        offsets = np.empty(packets, dtype=np.intp)
+        lengths = np.empty(packets, dtype=np.intp)
+        position = 2
+        for i in range(packets):
+            length = int.from_bytes(frame[position:position + 2], "big")
+            offsets[i] = position + 2
+            lengths[i] = length
+            position += 2 + length
+        # Packets of unknown length are dropped, as kiteconnect does
+        known = np.isin(lengths, _PACKET_LENGTHS)
+        if not known.all():
+            offsets, lengths = offsets[known], lengths[known]
+        count = len(lengths)
+
+        if count > self.capacity:
+            self._allocate(max(count, self.capacity * 2))
+        ticks = self._ticks[:count]
+        ticks.fill(0)
+        ticks["packet_length"] = lengths
+        data = np.frombuffer(frame, dtype=np.uint8)
+        depth_rows = np.empty(0, dtype=np.intp)
+        depth = self._depth[:0]
+
+        for length in np.unique(lengths).tolist():
+            rows = np.flatnonzero(lengths == length)
+            # (rows, length) bytes -> (rows, length / 4) big-endian uint32 words
+            words = data[offsets[rows, None] + np.arange(length)].view(">u4").astype(np.int64)
+            group = ticks[rows]
+            self._fill(group, words, length)
+            ticks[rows] = group
+            if length == 184:
+                depth_rows = rows
+                depth = self._fill_depth(words, len(rows))
+        return TickBatch(ticks, depth_rows, depth)
+
+    @staticmethod
+    def _fill(group: np.ndarray, words: np.ndarray, length: int):
+        token = words[:, 0]
+        segment = token & 0xff
+        divisor = np.where(segment == _SEGMENT_CDS, 10000000.0, np.where(segment == _SEGMENT_BCD, 10000.0, 100.0))
+        group["instrument_token"] = token
+        group["tradable"] = segment != _SEGMENT_INDICES
+        group["last_price"] = words[:, 1] / divisor
+        if length == 8:
+            group["mode"] = MODE_LTP
+            return
+        if length in (28, 32):
+            group["mode"] = MODE_QUOTE if length == 28 else MODE_FULL
+            ohlc = _INDEX_OHLC
+            if length == 32:
+                group["exchange_timestamp"] = words[:, 7]
+        else:
+            group["mode"] = MODE_QUOTE if length == 44 else MODE_FULL
+            ohlc = _QUOTE_OHLC
+            group["last_traded_quantity"] = words[:, 2]
+            group["average_traded_price"] = words[:, 3] / divisor
+            group["volume_traded"] = words[:, 4]
+            group["total_buy_quantity"] = words[:, 5]
+            group["total_sell_quantity"] = words[:, 6]
+            if length == 184:
+                group["last_trade_time"] = words[:, 11]
+                group["oi"] = words[:, 12]
+                group["oi_day_high"] = words[:, 13]
+                group["oi_day_low"] = words[:, 14]
+                group["exchange_timestamp"] = words[:, 15]
+        for field, column in ohlc.items():
+            group[field] = words[:, column] / divisor
+        close = group["close"]
+        group["change"] = np.divide((group["last_price"] - close) * 100, close,
+                                    out=np.zeros(len(group)), where=close != 0)
+
+    def _fill_depth(self, words: np.ndarray, rows: int) -> np.ndarray:
+        """Depth levels of full packets: words 16.. hold (quantity, price, orders<<16) x 10."""
+        levels = words[:, 16:46].reshape(rows, 2, DEPTH_LEVELS, 3)
+        segment = words[:, 0] & 0xff
+        divisor = np.where(segment == _SEGMENT_CDS, 10000000.0, np.where(segment == _SEGMENT_BCD, 10000.0, 100.0))
+        depth = self._depth[:rows]
+        depth[..., 0] = levels[..., 1] / divisor[:, None, None]
+        depth[..., 1] = levels[..., 0]
+        depth[..., 2] = levels[..., 2] >> 16
+        return depth
+
+
+class ColumnarKiteTicker(KiteTicker):
+    """KiteTicker handing binary frames to `on_tick_batch` as a `TickBatch`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_tick_batch = None
+        self._parser = TickParser()
+
+    def _on_message(self, ws, payload, is_binary):
+        if not is_binary or self.on_tick_batch is None:
+            return super()._on_message(ws, payload, is_binary)
+        if self.on_message:
+            self.on_message(self, payload, is_binary)
+        if len(payload) > 4:
+            self.on_tick_batch(self, self._parser.parse(payload))
+
+
+def parse_frame(frame: bytes, parser: Optional[TickParser] = None) -> TickBatch:
+    """Decode one frame (with a throwaway parser unless one is given)."""
+    return (parser or TickParser(64)).parse(frame)
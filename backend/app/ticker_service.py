@@ -1,71 +1,409 @@
 """
 WebSocket ticker service for real-time market data streaming.
 Uses Kite Connect's KiteTicker for live price updates.
+
+There is one TickerService per account (each KiteTicker connection is tied
+to an API key and carries that account's order updates); `ticker_service`
+is the default account's instance.
+
+Kite caps instruments per connection and connections per API key, so a
+service spreads its subscriptions over up to MAX_CONNECTIONS shards. Each
+shard is its own KiteTicker connection with its own reconnect loop; all of
+them feed the same `_on_ticks` pipeline. Every connection of every account
+runs on one Twisted reactor thread, started once (`_call_in_reactor`);
+connects, subscribes and closes are scheduled onto it.
+
+With several uvicorn workers, `app.feed` sets `TickerService.feed` so only
+one worker holds upstream connections; the others relay their requests to
+it and receive its tick batches (see app/feed.py).
+
+Every tick gets a per-token sequence number (`_seq`, assigned by the worker
+holding the upstream connection and relayed unchanged) and its `Tick` model
+(app/models.py, `_model` on the tick dict), built here once for every
+consumer; its JSON is only encoded when a client needs it. The models, not the much larger Kite dicts, are kept in a bounded
+per-token replay buffer, so WebSocket clients can resume after a reconnect
+with `ticks_since`.
+
+With `TICK_PARSER=columnar` shards decode frames with app.tick_parser.
+Only depth reads the decoded arrays directly (straight into the depth
+store); everything else in the app (last_ticks, replay and `Tick` models,
+alerts, conditional orders, the fan-out and the shared feed) still gets a
+kiteconnect-shaped dict per tick, rebuilt from the batch without depth
+levels. The gain is the cheaper decode, not a dict-free path.
+`add_batch_callback` is there for consumers that can take the columnar
+`TickBatch`; none are registered today.
 """
 import asyncio
 import json
 import logging
-from typing import Callable, Set
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from kiteconnect import KiteTicker
+from twisted.internet import reactor
+from app.accounts import DEFAULT_ACCOUNT
+from app.cache import analytics_cache
+from app.depth import depth_store
 from app.kite_client import KiteClient
+from app.models import OrderUpdate, Tick
+from app.observability.histogram import LatencyHistogram
+from app.observability.metrics import tick_batches, ticks_received
+from app.observability.order_latency import order_latency
+from app.observability.prometheus import REGISTRY
+from app.observability.tick_latency import tick_latency
+from app.tick_parser import ColumnarKiteTicker, TickBatch
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class _TickRate:
+    """Ticks per second across all tickers, read at scrape time."""
+
+    def __init__(self):
+        self.second = 0
+        self.count = 0
+        self.previous = 0  # Ticks during second - 1
+
+    def add(self, n: int):
+        second = int(time.monotonic())
+        if second != self.second:
+            self.previous = self.count if second - self.second == 1 else 0
+            self.second = second
+            self.count = 0
+        self.count += n
+
+    def rate(self) -> int:
+        """Ticks during the last complete second; zero once ticks stop."""
+        second = int(time.monotonic())
+        if second == self.second:
+            return self.previous
+        return self.count if second - self.second == 1 else 0
+
+
+_tick_rate = _TickRate()
+REGISTRY.callback(
+    "tradexr_ticks_per_second",
+    "Ticks received during the last complete second.",
+    (),
+    lambda: {(): _tick_rate.rate()},
+)
+
+# One Twisted reactor runs every KiteTicker connection of every account
+_reactor_lock = threading.Lock()
+_reactor_thread = None
+
+
+def _call_in_reactor(fn, *args):
+    """Run `fn` on the reactor thread, starting the shared reactor on first use.
+
+    KiteTicker.connect(threaded=True) starts `reactor.run` in a new thread
+    whenever the reactor is not running yet, so two connects close together
+    could start it twice; it is started here, once, and connects, subscribes
+    and closes are all scheduled onto it (Twisted is not thread-safe).
+    """
+    global _reactor_thread
+    with _reactor_lock:
+        if _reactor_thread is None:
+            _reactor_thread = threading.Thread(target=reactor.run, kwargs={"installSignalHandlers": False},
+                                               name="kite-reactor", daemon=True)
+            _reactor_thread.start()
+    reactor.callFromThread(fn, *args)
+
+# Kite limits: 3000 instruments per connection, 3 connections per API key
+MAX_TOKENS_PER_CONNECTION = 3000
+MAX_CONNECTIONS = 3
+# Open another connection once every shard carries this many tokens
+SHARD_TARGET_TOKENS = 1000
+# Recent ticks kept per token for sequence-numbered resume
+REPLAY_TICKS_PER_TOKEN = 100
+# "columnar" decodes ticker frames with app.tick_parser instead of kiteconnect
+TICK_PARSER = os.getenv("TICK_PARSER") or "kiteconnect"
+
+
+class TickerShard:
+    """One KiteTicker connection carrying a subset of a service's tokens."""
+
+    def __init__(self, service: "TickerService", index: int):
+        self.service = service
+        self.index = index
+        self.tokens: Set[int] = set()
+        self.kws = None
+        self.is_connected = False
+
+    @property
+    def primary(self) -> bool:
+        return self.index == 0
+
+    def connect(self, api_key: str, access_token: str):
+        if TICK_PARSER == "columnar":
+            self.kws = ColumnarKiteTicker(api_key, access_token)
+            self.kws.on_tick_batch = self.service._on_tick_batch
+        else:
+            self.kws = KiteTicker(api_key, access_token)
+
+        # Assign callbacks; ticks from every shard share one pipeline
+        self.kws.on_ticks = self.service._on_ticks
+        self.kws.on_connect = self._on_connect
+        self.kws.on_close = self._on_close
+        self.kws.on_error = self._on_error
+        self.kws.on_reconnect = self._on_reconnect
+        # Every connection carries the account's order updates; forward once
+        if self.primary:
+            self.kws.on_order_update = self.service._on_order_update
+
+        # Queued until the shared reactor runs; connect() then finds it running
+        _call_in_reactor(self.kws.connect, True)
+
+    def _on_connect(self, ws, response):
+        """Callback on successful connection."""
+        logger.info(f"Ticker shard {self.index} connected: {response}")
+        self.is_connected = True
+        self.service._connection_changed()
+        
+        # Re-subscribe to this shard's tokens (also after a reconnect)
+        tokens = list(self.tokens)
+        if tokens:
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_FULL, tokens)
+    
+    def _on_close(self, ws, code, reason):
+        """Callback when connection is closed."""
+        logger.info(f"Ticker shard {self.index} closed: {code} - {reason}")
+        self.is_connected = False
+        self.service._connection_changed()
+    
+    def _on_error(self, ws, code, reason):
+        """Callback on connection error."""
+        logger.error(f"Ticker shard {self.index} error: {code} - {reason}")
+    
+    def _on_reconnect(self, ws, attempts_count):
+        """Callback on reconnection attempt."""
+        logger.info(f"Ticker shard {self.index} reconnecting... attempt {attempts_count}")
+
+    def send_subscribe(self, tokens: list):
+        """Subscribe tokens already recorded in `self.tokens` on the live socket."""
+        if self.kws and self.is_connected and tokens:
+            _call_in_reactor(self._subscribe, self.kws, tokens)
+
+    @staticmethod
+    def _subscribe(kws, tokens: list):
+        kws.subscribe(tokens)
+        kws.set_mode(kws.MODE_FULL, tokens)
+
+    def send_unsubscribe(self, tokens: list):
+        if self.kws and self.is_connected and tokens:
+            _call_in_reactor(self.kws.unsubscribe, tokens)
+
+    def close(self):
+        """Close this connection only.
+
+        KiteTicker.stop() would also stop the Twisted reactor every shard
+        (and every account) shares, and the reactor cannot be restarted.
+        """
+        if self.kws:
+            _call_in_reactor(self.kws.close)
+        self.is_connected = False
+
+    def info(self) -> dict:
+        return {"shard": self.index, "tokens": len(self.tokens), "connected": self.is_connected}
+
+
 class TickerService:
     """Manages WebSocket connections for real-time tick data."""
     
-    _instance = None
+    _instances = {}
+    # Shared-feed role (app.feed) when running multiple workers, else None
+    feed = None
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    def __new__(cls, account_id=DEFAULT_ACCOUNT):
+        instance = cls._instances.get(account_id)
+        if instance is None:
+            instance = cls._instances.setdefault(account_id, super().__new__(cls))
+            instance._initialized = False
+        return instance
     
-    def __init__(self):
+    def __init__(self, account_id=DEFAULT_ACCOUNT):
         if self._initialized:
             return
             
-        self.kws = None
+        self.account_id = account_id
+        self.shards: List[TickerShard] = []
+        # token -> shard carrying it; guarded by _shard_lock with `shards`
+        self._token_shard: Dict[int, TickerShard] = {}
+        self._shard_lock = threading.Lock()
+        self._credentials = None
         self.subscribed_tokens: Set[int] = set()
         self.callbacks: list[Callable] = []
+        self.batch_callbacks: list[Callable] = []
         self.last_ticks: dict = {}
-        self.is_connected = False
+        # Tick counters: plain dict/int updates, exported at scrape time
+        self.token_tick_counts: dict = {}
+        # token -> last sequence number / recent ticks (oldest first)
+        self.token_seq: Dict[int, int] = {}
+        self.replay: Dict[int, deque] = {}
+        # {callback name: LatencyHistogram} while tick-path timing is on
+        self.callback_timings = None
         self._initialized = True
+
+    @classmethod
+    def instances(cls):
+        """Ticker services for every account that has one."""
+        return list(cls._instances.values())
+
+    @property
+    def is_connected(self) -> bool:
+        feed = self.feed
+        if feed is not None and feed.remote:
+            return feed.is_connected(self)
+        return any(shard.is_connected for shard in self.shards)
     
+    def _connection_changed(self):
+        """A shard connected or closed; followers of the shared feed mirror the state."""
+        feed = self.feed
+        if feed is not None and not feed.remote:
+            feed.publish_status(self)
+
     def initialize(self):
-        """Initialize the KiteTicker with current credentials."""
-        kite = KiteClient()
+        """Spread current subscriptions over shards and connect them."""
+        kite = KiteClient(self.account_id)
         
-        if not kite.api_key or not kite.access_token:
+        if not kite.session_ready():
             logger.warning("Cannot initialize ticker: No API key or access token")
             return False
         
         try:
-            self.kws = KiteTicker(kite.api_key, kite.access_token)
-            
-            # Assign callbacks
-            self.kws.on_ticks = self._on_ticks
-            self.kws.on_connect = self._on_connect
-            self.kws.on_close = self._on_close
-            self.kws.on_error = self._on_error
-            self.kws.on_reconnect = self._on_reconnect
+            with self._shard_lock:
+                self._credentials = (kite.api_key, kite.access_token)
+                if not self.shards:
+                    self.shards.append(TickerShard(self, 0))
+                self._assign(sorted(self.subscribed_tokens))
+                for shard in self.shards:
+                    if shard.kws is None:
+                        shard.connect(*self._credentials)
             
-            logger.info("KiteTicker initialized successfully")
+            logger.info(f"KiteTicker initialized with {len(self.shards)} connection(s)")
             return True
             
         except Exception as e:
             logger.error(f"Failed to initialize KiteTicker: {e}")
             return False
+
+    def _pick_shard(self):
+        """Least-loaded shard with room; opens a shard once all reach the target."""
+        least = min(self.shards, key=lambda s: len(s.tokens), default=None)
+        load = len(least.tokens) if least else MAX_TOKENS_PER_CONNECTION
+        if load >= SHARD_TARGET_TOKENS and len(self.shards) < MAX_CONNECTIONS:
+            used = {s.index for s in self.shards}
+            least = TickerShard(self, min(set(range(MAX_CONNECTIONS)) - used))
+            self.shards.append(least)
+        elif load >= MAX_TOKENS_PER_CONNECTION:
+            return None
+        return least
+
+    def _assign(self, tokens) -> dict:
+        """Record unplaced tokens on shards; returns {shard: [tokens]}.
+
+        Tokens beyond total capacity are dropped from `subscribed_tokens`.
+        Caller holds `_shard_lock`.
+        """
+        placed = {}
+        rejected = []
+        for token in tokens:
+            if token in self._token_shard:
+                continue
+            shard = self._pick_shard()
+            if shard is None:
+                rejected.append(token)
+                continue
+            shard.tokens.add(token)
+            self._token_shard[token] = shard
+            placed.setdefault(shard, []).append(token)
+        if rejected:
+            self.subscribed_tokens.difference_update(rejected)
+            logger.warning(f"Ticker at capacity, not subscribing {len(rejected)} token(s)")
+        return placed
+
+    def _apply(self, placed: dict):
+        """Push new placements to their connections, opening new shards."""
+        for shard, tokens in placed.items():
+            if shard.kws is None:
+                # on_connect subscribes everything recorded on the shard
+                shard.connect(*self._credentials)
+            else:
+                shard.send_subscribe(tokens)
+            logger.info(f"Subscribed to {len(tokens)} token(s) on shard {shard.index}")
+
+    def _rebalance(self):
+        """Merge the smallest secondary shard away once the others can carry it.
+
+        Caller holds `_shard_lock`.
+        """
+        while len(self.shards) > 1:
+            if len(self._token_shard) > (len(self.shards) - 1) * SHARD_TARGET_TOKENS:
+                return
+            victim = min(self.shards[1:], key=lambda s: len(s.tokens))
+            moving = sorted(victim.tokens)
+            self.shards.remove(victim)
+            victim.close()
+            for token in moving:
+                del self._token_shard[token]
+            self._apply(self._assign(moving))
+            logger.info(f"Merged ticker shard {victim.index} ({len(moving)} tokens moved)")
     
+    def _on_tick_batch(self, ws, batch: TickBatch):
+        """Columnar ingest (TICK_PARSER=columnar): depth and batch consumers, then the dict pipeline."""
+        if len(batch.depth_rows):
+            depth_store.update_batch(batch.depth_tokens, batch.depth)
+        for callback in self.batch_callbacks:
+            try:
+                callback(batch)
+            except Exception as e:
+                logger.error(f"Error in tick batch callback: {e}")
+        # Followers of the shared feed rebuild depth from relayed dicts
+        feed = self.feed
+        self._on_ticks(ws, batch.to_dicts(with_depth=feed is not None and not feed.remote))
+
     def _on_ticks(self, ws, ticks):
         """Callback when ticks are received."""
+        tick_latency.received(ticks)
+        timings = self.callback_timings
+        if timings is not None:
+            started = time.perf_counter_ns()
+
+        counts = self.token_tick_counts
+        seqs = self.token_seq
+        replay = self.replay
         for tick in ticks:
             token = tick.get('instrument_token')
             self.last_ticks[token] = tick
-            logger.debug(f"Tick: {tick.get('tradingsymbol', token)} = {tick.get('last_price')}")
+            counts[token] = counts.get(token, 0) + 1
+            previous = seqs.get(token, 0)
+            seq = tick.get('_seq')
+            if seq is None:
+                seq = tick['_seq'] = previous + 1
+            elif seq == previous:
+                continue  # Relayed tick already buffered (feed re-prime)
+            seqs[token] = seq
+            model = tick['_model'] = Tick.from_kite(tick)
+            buffer = replay.get(token)
+            if buffer is None:
+                buffer = replay[token] = deque(maxlen=REPLAY_TICKS_PER_TOKEN)
+            elif seq < previous:
+                buffer.clear()  # Upstream owner restarted its sequence
+            buffer.append(model)
+            depth = tick.get('depth')
+            if depth is not None:
+                depth_store.update(token, depth)
+
+        self._count_batch(len(ticks))
+
+        if timings is not None:
+            self._record_timing("ingest", started)
+            self._run_callbacks_timed(ticks)
+            return
         
         # Notify all registered callbacks
         for callback in self.callbacks:
@@ -73,51 +411,112 @@ class TickerService:
                 callback(ticks)
             except Exception as e:
                 logger.error(f"Error in tick callback: {e}")
+
+    def _run_callbacks_timed(self, ticks):
+        """Callback loop used while tick-path timing mode is on."""
+        for callback in self.callbacks:
+            started = time.perf_counter_ns()
+            try:
+                callback(ticks)
+            except Exception as e:
+                logger.error(f"Error in tick callback: {e}")
+            self._record_timing(getattr(callback, "__qualname__", repr(callback)), started)
+
+    def _record_timing(self, name: str, started_ns: int):
+        timings = self.callback_timings
+        if timings is None:
+            return
+        histogram = timings.get(name)
+        if histogram is None:
+            histogram = timings.setdefault(name, LatencyHistogram())
+        histogram.record_ns(time.perf_counter_ns() - started_ns)
+
+    def set_callback_timing(self, enabled: bool):
+        """Toggle per-callback timing on the tick path (off = zero overhead)."""
+        if enabled and self.callback_timings is None:
+            self.callback_timings = {}
+        elif not enabled:
+            self.callback_timings = None
+
+    def get_callback_timings(self) -> dict:
+        timings = self.callback_timings
+        if timings is None:
+            return {"enabled": False, "callbacks": {}}
+        return {
+            "enabled": True,
+            "callbacks": {name: hist.summary() for name, hist in list(timings.items())},
+        }
     
-    def _on_connect(self, ws, response):
-        """Callback on successful connection."""
-        logger.info(f"WebSocket connected: {response}")
-        self.is_connected = True
-        
-        # Re-subscribe to previously subscribed tokens
-        if self.subscribed_tokens:
-            ws.subscribe(list(self.subscribed_tokens))
-            ws.set_mode(ws.MODE_FULL, list(self.subscribed_tokens))
-    
-    def _on_close(self, ws, code, reason):
-        """Callback when connection is closed."""
-        logger.info(f"WebSocket closed: {code} - {reason}")
-        self.is_connected = False
-    
-    def _on_error(self, ws, code, reason):
-        """Callback on connection error."""
-        logger.error(f"WebSocket error: {code} - {reason}")
+    def _count_batch(self, n: int):
+        """Update tick counters once per batch (not per tick)."""
+        tick_batches.inc()
+        ticks_received.inc(n)
+        _tick_rate.add(n)
     
-    def _on_reconnect(self, ws, attempts_count):
-        """Callback on reconnection attempt."""
-        logger.info(f"Reconnecting... attempt {attempts_count}")
+    def _on_order_update(self, ws, data):
+        """Callback for order postbacks on the ticker connection."""
+        update = OrderUpdate(data)  # Built once for the tracker and the feed relay
+        logger.info(f"Order update: {update.order_id} -> {update.status}")
+        order_latency.on_order_update(update)
+        analytics_cache.invalidate(self.account_id)  # Fills change holdings/positions
+        feed = self.feed
+        if feed is not None and not feed.remote:
+            feed.publish_order_update(self, update)
     
     def subscribe(self, instrument_tokens: list[int]):
         """Subscribe to instrument tokens for tick data."""
-        self.subscribed_tokens.update(instrument_tokens)
-        
-        if self.kws and self.is_connected:
-            self.kws.subscribe(instrument_tokens)
-            self.kws.set_mode(self.kws.MODE_FULL, instrument_tokens)
-            logger.info(f"Subscribed to tokens: {instrument_tokens}")
+        feed = self.feed
+        if feed is not None and feed.remote:
+            self.subscribed_tokens.update(instrument_tokens)
+            feed.subscribe(self, instrument_tokens)
+            return
+
+        with self._shard_lock:
+            self.subscribed_tokens.update(instrument_tokens)
+            
+            # Before start() tokens are only recorded; initialize() places them
+            if self.shards:
+                self._apply(self._assign(instrument_tokens))
     
     def unsubscribe(self, instrument_tokens: list[int]):
         """Unsubscribe from instrument tokens."""
-        self.subscribed_tokens.difference_update(instrument_tokens)
-        
-        if self.kws and self.is_connected:
-            self.kws.unsubscribe(instrument_tokens)
-            logger.info(f"Unsubscribed from tokens: {instrument_tokens}")
+        feed = self.feed
+        if feed is not None and feed.remote:
+            self.subscribed_tokens.difference_update(instrument_tokens)
+            feed.unsubscribe(self, instrument_tokens)
+            return
+
+        with self._shard_lock:
+            self.subscribed_tokens.difference_update(instrument_tokens)
+            
+            removed = {}
+            for token in instrument_tokens:
+                shard = self._token_shard.pop(token, None)
+                if shard is not None:
+                    shard.tokens.discard(token)
+                    removed.setdefault(shard, []).append(token)
+            for shard, tokens in removed.items():
+                shard.send_unsubscribe(tokens)
+                logger.info(f"Unsubscribed from {len(tokens)} token(s) on shard {shard.index}")
+            self._rebalance()
     
-    def add_callback(self, callback: Callable):
-        """Register a callback for tick updates."""
-        self.callbacks.append(callback)
+    def add_callback(self, callback: Callable, first: bool = False):
+        """Register a callback for tick updates.
+
+        `first` runs it ahead of existing callbacks (order triggers).
+        """
+        if first:
+            self.callbacks.insert(0, callback)
+        else:
+            self.callbacks.append(callback)
     
+    def add_batch_callback(self, callback: Callable):
+        """Register a callback for columnar `TickBatch`es (TICK_PARSER=columnar only).
+
+        The batch is only valid during the call; copy what you keep.
+        """
+        self.batch_callbacks.append(callback)
+
     def remove_callback(self, callback: Callable):
         """Remove a callback."""
         if callback in self.callbacks:
@@ -126,29 +525,89 @@ class TickerService:
     def get_last_tick(self, instrument_token: int):
         """Get the last received tick for an instrument."""
         return self.last_ticks.get(instrument_token)
+
+    def get_last_tick_model(self, instrument_token: int) -> Optional[Tick]:
+        """The last tick's model (what /ws/ticks clients are sent)."""
+        buffer = self.replay.get(instrument_token)
+        return buffer[-1] if buffer else None
+
+    def ticks_since(self, instrument_token: int, since_seq: int) -> Tuple[List[Tick], bool]:
+        """Buffered tick models newer than `since_seq`, and whether none are missing.
+
+        When the buffer no longer reaches back to `since_seq` (or the sequence
+        restarted), only the latest tick is returned, flagged incomplete.
+        """
+        latest = self.token_seq.get(instrument_token, 0)
+        if since_seq >= latest:
+            if since_seq == latest:
+                return [], True
+            last = self.get_last_tick_model(instrument_token)
+            return ([last] if last else []), False
+        ticks = [tick for tick in list(self.replay.get(instrument_token, ())) if tick.seq > since_seq]
+        if ticks and ticks[0].seq == since_seq + 1:
+            return ticks, True
+        last = self.get_last_tick_model(instrument_token)
+        return ([last] if last else []), False
+
+    def live_tick(self, instrument_token: int):
+        """Last tick if the token is streaming right now (so it is current)."""
+        if instrument_token in self.subscribed_tokens and self.is_connected:
+            return self.last_ticks.get(instrument_token)
+        return None
     
     def start(self):
-        """Start the ticker in a background thread."""
-        if not self.kws:
-            if not self.initialize():
-                return False
-        
-        try:
-            # Run in threaded mode so it doesn't block
-            self.kws.connect(threaded=True)
-            logger.info("KiteTicker started in threaded mode")
+        """Start the ticker connections in the background (reactor thread)."""
+        feed = self.feed
+        if feed is not None and feed.remote:
+            return feed.start(self)
+        if self.shards:
             return True
-        except Exception as e:
-            logger.error(f"Failed to start ticker: {e}")
-            return False
+        started = self.initialize()
+        if started and feed is not None:
+            feed.attach(self)
+        return started
     
     def stop(self):
         """Stop the ticker."""
-        if self.kws:
-            self.kws.stop()
-            self.is_connected = False
-            logger.info("KiteTicker stopped")
+        feed = self.feed
+        if feed is not None and feed.remote:
+            feed.stop(self)
+            return
+
+        with self._shard_lock:
+            for shard in self.shards:
+                shard.close()
+            self.shards = []
+            self._token_shard = {}
+        logger.info("KiteTicker stopped")
 
+    def shard_status(self) -> list:
+        """Token load and connection state of each shard."""
+        return [shard.info() for shard in list(self.shards)]
 
-# Singleton instance
+
+# Default account instance
 ticker_service = TickerService()
+
+
+def _token_tick_counts():
+    totals = {}
+    for service in TickerService.instances():
+        for token, count in list(service.token_tick_counts.items()):
+            totals[(token,)] = totals.get((token,), 0) + count
+    return totals
+
+
+REGISTRY.callback(
+    "tradexr_token_ticks_received_total",
+    "Ticks received per instrument token.",
+    ("token",),
+    _token_tick_counts,
+    kind="counter",
+)
+REGISTRY.callback(
+    "tradexr_ticker_subscribed_tokens",
+    "Instrument tokens subscribed on the ticker, per account.",
+    ("account",),
+    lambda: {(s.account_id,): len(s.subscribed_tokens) for s in TickerService.instances()},
+)
@@ -0,0 +1,151 @@
+"""
+Memory and allocations of the dict pipeline vs app.models, under tracemalloc.
+
+Replays what the backend did before the models with what it does now:
+
+- replay   one full-mode tick kept in TickerService's replay buffer (the
+           kiteconnect dict, depth included, vs its `Tick` model)
+- ticks    one batch formatted for the fan-out and written to --clients
+           clients (dicts re-encoded per client vs `Tick` JSON spliced)
+- quote    one /quote cache hit (FastAPI encoding the cached dict vs the
+           `Quote` body sent as is)
+- candles  one cached /candles set (list of candle dicts vs `CandleSeries`)
+           and one cache hit
+
+For each it reports the bytes and blocks the result holds (what a cache or
+client queue keeps), the peak traced memory of one run, and wall time per
+operation.
+
+    cd backend && python -m benchmarks.models --ticks 500 --clients 20
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from kiteconnect import KiteTicker
+from app.backfill import IST
+from app.models import CandleSeries, Quote, Tick, format_candle
+from benchmarks.tick_parser import build_frame
+
+
+def build_candles(count: int) -> list:
+    start = datetime(2026, 10, 16, 9, 15, tzinfo=IST)
+    return [{"date": start + timedelta(minutes=i), "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i,
+             "close": 100.5 + i, "volume": 1000 + i} for i in range(count)]
+
+
+def format_tick(tick: dict) -> dict:
+    """The per-tick dict /ws/ticks used to build."""
+    return {
+        "instrument_token": tick.get("instrument_token"),
+        "symbol": tick.get("tradingsymbol", ""),
+        "last_price": tick.get("last_price"),
+        "change": tick.get("change", 0),
+        "volume": tick.get("volume", 0),
+        "ohlc": tick.get("ohlc", {}),
+        "timestamp": str(tick.get("timestamp", "")),
+        "seq": tick.get("_seq"),
+    }
+
+
+def measure(fn, repeat: int, samples: int = 10):
+    """(bytes held, blocks held, peak bytes, seconds) per call of `fn`.
+
+    Held memory is what `samples` kept results occupy, averaged, so one-off
+    interpreter free-list and cache growth does not count as held.
+    """
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    gc.collect()
+    before = tracemalloc.take_snapshot()
+    kept = [fn() for _ in range(samples)]
+    held = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    del kept
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    return (sum(s.size_diff for s in held) / samples, sum(s.count_diff for s in held) / samples, peak, elapsed)
+
+
+def report(title: str, per: str, units: int, rows: dict):
+    print(f"\n{title}")
+    print(f"{'':>8} {'held B/' + per:>12} {'blocks/' + per:>12} {'peak B':>12} {'us/op':>10}")
+    for name, (held, blocks, peak, elapsed) in rows.items():
+        print(f"{name:>8} {held / units:>12,.1f} {blocks / units:>12,.2f} {peak:>12,} {elapsed * 1e6:>10,.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=500, help="ticks per batch")
+    parser.add_argument("--clients", type=int, default=20, help="/ws/ticks clients in the fan-out")
+    parser.add_argument("--candles", type=int, default=375, help="candles per set (375 = one minute session)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    frame = build_frame(args.ticks)
+    parse = KiteTicker("key", "token")._parse_binary
+    ticks = parse(frame)
+    for seq, tick in enumerate(ticks, 1):
+        tick["_seq"] = seq
+
+    # The model keeps the OHLC dict it shares with the Kite tick, so both sides start from the frame
+    report(f"replay: {args.ticks} full-mode ticks buffered", "tick", args.ticks, {
+        "dict": measure(lambda: parse(frame), args.repeat),
+        "model": measure(lambda: [Tick.from_kite(tick) for tick in parse(frame)], args.repeat),
+    })
+
+    def dict_fanout():
+        formatted = [format_tick(tick) for tick in ticks]
+        for _ in range(args.clients):
+            json.dumps({"type": "ticks", "data": formatted})
+        return formatted
+
+    def model_fanout():
+        models = [Tick.from_kite(tick) for tick in ticks]
+        for _ in range(args.clients):
+            '{"type":"ticks","data":[' + ",".join(tick.json for tick in models) + "]}"
+        return models
+
+    report(f"fan-out: {args.ticks} ticks, {args.clients} clients", "tick", args.ticks,
+           {"dict": measure(dict_fanout, args.repeat), "model": measure(model_fanout, args.repeat)})
+
+    raw_quote = {"last_price": 61.5, "net_change": 0.4, "volume": 123456, "upper_circuit_limit": 67.6,
+                 "lower_circuit_limit": 55.3, "ohlc": {"open": 61.0, "high": 61.9, "low": 60.8, "close": 61.1}}
+    quote = Quote("GOLDBEES", "NSE", raw_quote)
+    cached_dict = quote.to_dict()
+    report("quote: one cache hit", "hit", 1, {
+        "dict": measure(lambda: JSONResponse(jsonable_encoder(cached_dict)), args.repeat * 20),
+        "model": measure(lambda: Response(quote.body, media_type="application/json"), args.repeat * 20),
+    })
+
+    candles = build_candles(args.candles)
+
+    def dict_candles():
+        return {"symbol": "GOLDBEES", "exchange": "NSE", "interval": "minute",
+                "candles": [format_candle(i, candle) for i, candle in enumerate(candles)]}
+
+    def model_candles():
+        return CandleSeries.from_kite("GOLDBEES", "NSE", "minute", candles)
+
+    report(f"candles: one cached set of {args.candles}", "candle", args.candles,
+           {"dict": measure(dict_candles, args.repeat), "model": measure(model_candles, args.repeat)})
+
+    cached_candles, series = dict_candles(), model_candles()
+    report("candles: one cache hit", "hit", 1, {
+        "dict": measure(lambda: JSONResponse(jsonable_encoder(cached_candles)), args.repeat),
+        "model": measure(lambda: Response(series.body, media_type="application/json"), args.repeat),
+    })
+
+
+if __name__ == "__main__":
+    main()
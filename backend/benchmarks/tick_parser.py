@@ -0,0 +1,90 @@
+"""
+Ticks/second decoded by kiteconnect's parser vs app.tick_parser.
+
+Builds synthetic KiteTicker frames (full-mode packets with depth by default)
+and times:
+
+- stock       KiteTicker._parse_binary (nested dicts, datetimes, depth dicts)
+- columnar    TickParser.parse into the preallocated structured array
+- columnar+dicts  parse plus TickBatch.to_dicts() for dict-based consumers
+
+Also checks that to_dicts(with_depth=True) matches the stock output, on
+one of the frames and on a mixed frame with a packet of unknown length.
+
+    cd backend && python -m benchmarks.tick_parser --ticks 500 --frames 200
+"""
+import argparse
+import random
+import struct
+import time
+from kiteconnect import KiteTicker
+from app.tick_parser import TickParser
+
+PACKET_LENGTHS = {"ltp": 8, "quote": 44, "full": 184}
+
+
+def build_packet(token: int, mode: str, rng: random.Random) -> bytes:
+    price = rng.randint(1000, 500000)
+    if mode == "ltp":
+        return struct.pack(">II", token, price)
+    words = [token, price, rng.randint(1, 500), price, rng.randint(0, 10**7), rng.randint(0, 10**6),
+             rng.randint(0, 10**6), price - 100, price + 200, price - 300, price + 50]
+    if mode == "full":
+        now = int(time.time())
+        words += [now - 1, rng.randint(0, 10**6), rng.randint(0, 10**6), rng.randint(0, 10**6), now]
+        packet = struct.pack(f">{len(words)}I", *words)
+        for level in range(10):
+            packet += struct.pack(">IIHH", rng.randint(1, 5000), price + (level - 5) * 5, rng.randint(1, 50), 0)
+        return packet
+    return struct.pack(f">{len(words)}I", *words)
+
+
+def build_frame(count: int, mode: str = "full", seed: int = 1) -> bytes:
+    rng = random.Random(seed)
+    packets = [build_packet(256265 + i * 256 + 1, mode, rng) for i in range(count)]
+    return struct.pack(">H", count) + b"".join(struct.pack(">H", len(p)) + p for p in packets)
+
+
+def build_mixed_frame(seed: int = 1) -> bytes:
+    """One packet of each mode plus one of an unknown length (which both parsers drop)."""
+    rng = random.Random(seed)
+    packets = [build_packet(256265 + i * 256 + 1, mode, rng) for i, mode in enumerate(("ltp", "quote", "full"))]
+    packets.insert(1, struct.pack(">III", 256265, 100, 0))  # 12 bytes
+    return struct.pack(">H", len(packets)) + b"".join(struct.pack(">H", len(p)) + p for p in packets)
+
+
+def rate(fn, frames, ticks_per_frame: int) -> float:
+    started = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    return ticks_per_frame * len(frames) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=500, help="packets per frame")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--mode", choices=sorted(PACKET_LENGTHS), default="full")
+    args = parser.parse_args()
+
+    frames = [build_frame(args.ticks, args.mode, seed) for seed in range(args.frames)]
+    stock = KiteTicker("key", "token")
+    columnar = TickParser(args.ticks)
+
+    for name, frame in (("frame", frames[0]), ("mixed frame", build_mixed_frame())):
+        expected = stock._parse_binary(frame)
+        actual = columnar.parse(frame).to_dicts(with_depth=True)
+        mismatches = sum(1 for a, b in zip(expected, actual) if a != b) + abs(len(expected) - len(actual))
+        print(f"output check ({name}): {len(actual)} ticks, {mismatches} mismatches")
+
+    results = {
+        "stock": rate(stock._parse_binary, frames, args.ticks),
+        "columnar": rate(columnar.parse, frames, args.ticks),
+        "columnar+dicts": rate(lambda f: columnar.parse(f).to_dicts(), frames, args.ticks),
+    }
+    for name, ticks_per_second in results.items():
+        print(f"{name:>15}: {ticks_per_second:>12,.0f} ticks/s  ({ticks_per_second / results['stock']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from app.cache import TTLCache
+
+
+def test_set_skipped_after_invalidation_since_generation():
+    cache = TTLCache("test", ttl=10.0)
+    generation = cache.generation("a")
+    cache.invalidate("a")  # e.g. an order update while fetching
+    assert not cache.set("a", 1, generation=generation)
+    assert cache.get("a") is None
+    assert cache.set("a", 2, generation=cache.generation("a"))
+    assert cache.get("a") == 2
+
+
+def test_invalidate_all_changes_every_generation():
+    cache = TTLCache("test", ttl=10.0)
+    generation = cache.generation("a")
+    cache.invalidate("b")
+    assert cache.generation("a") == generation
+    cache.invalidate()
+    assert not cache.set("a", 1, generation=generation)
@@ -0,0 +1,24 @@
+import numpy as np
+from app.depth import LEVELS, DepthStore
+
+
+def _depth(price: float) -> dict:
+    levels = [{"price": price + i, "quantity": 10 * (i + 1), "orders": i + 1} for i in range(LEVELS)]
+    return {"buy": levels, "sell": levels}
+
+
+def test_update_grows_past_capacity():
+    store = DepthStore(capacity=2)
+    for token in range(5):
+        store.update(token, _depth(100.0 * (token + 1)))
+    for token in range(5):
+        book = store.snapshot(token)
+        assert book["buy"][0] == {"price": 100.0 * (token + 1), "quantity": 10, "orders": 1}
+        assert book["sell"][LEVELS - 1]["quantity"] == 10 * LEVELS
+
+
+def test_update_batch_grows_past_capacity():
+    store = DepthStore(capacity=2)
+    books = np.arange(3 * 2 * LEVELS * 3, dtype=float).reshape(3, 2, LEVELS, 3)
+    store.update_batch(np.array([7, 8, 9]), books)
+    assert np.array_equal(store.book(9), books[2])
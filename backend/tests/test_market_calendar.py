@@ -0,0 +1,29 @@
+from datetime import datetime
+import pytest
+from app import market_calendar
+from app.market_calendar import IST, cache_ttl
+
+# Friday 2026-10-16 is a trading day
+FRIDAY = datetime(2026, 10, 16, tzinfo=IST)
+
+
+@pytest.mark.parametrize("hour, minute", [(9, 5), (12, 0), (15, 30), (15, 45)])
+def test_cache_ttl_is_normal_until_settled(monkeypatch, hour, minute):
+    monkeypatch.setattr(market_calendar, "now_ist", lambda: FRIDAY.replace(hour=hour, minute=minute))
+    assert cache_ttl("NSE", 5) == 5
+
+
+def test_cache_ttl_lasts_until_next_pre_open_after_settle(monkeypatch):
+    monkeypatch.setattr(market_calendar, "now_ist", lambda: FRIDAY.replace(hour=16))
+    # Monday 09:00 is 65 hours away
+    assert cache_ttl("NSE", 5) == 65 * 3600
+
+
+def test_cache_ttl_before_pre_open_stops_at_pre_open(monkeypatch):
+    monkeypatch.setattr(market_calendar, "now_ist", lambda: FRIDAY.replace(hour=8, minute=30))
+    assert cache_ttl("NSE", 5) == 30 * 60
+
+
+def test_cache_ttl_ignores_other_exchanges(monkeypatch):
+    monkeypatch.setattr(market_calendar, "now_ist", lambda: FRIDAY.replace(hour=20))
+    assert cache_ttl("MCX", 5) == 5
@@ -0,0 +1,19 @@
+from app import ticker_service
+from app.ticker_service import _TickRate
+
+
+def test_rate_reports_last_complete_second_and_decays(monkeypatch):
+    now = [100.2]
+    monkeypatch.setattr(ticker_service.time, "monotonic", lambda: now[0])
+    rate = _TickRate()
+    rate.add(30)
+    rate.add(20)
+    assert rate.rate() == 0  # Second 100 is still running
+    now[0] = 101.5
+    assert rate.rate() == 50  # No batch yet in 101
+    rate.add(7)
+    assert rate.rate() == 50
+    now[0] = 102.1
+    assert rate.rate() == 7
+    now[0] = 105.0
+    assert rate.rate() == 0  # Ticks stopped
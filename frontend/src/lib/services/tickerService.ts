@@ -1,5 +1,9 @@
 /**
  * WebSocket service for real-time tick data from Kite.
+ *
+ * Ticks carry a per-token sequence number; after a reconnect the client
+ * resubscribes with the last sequence seen per token (`since_seq`) and the
+ * server replays what was missed.
  */
 import { writable, derived, type Readable } from 'svelte/store';
 import { API_CONFIG } from '$lib/config/api';
@@ -17,6 +21,7 @@ export interface Tick {
         close: number;
     };
     timestamp: string;
+    seq?: number;
 }
 
 export interface TickerState {
@@ -39,6 +44,28 @@ function createTickerStore() {
     let reconnectAttempts = 0;
     const MAX_RECONNECT_ATTEMPTS = 5;
     const RECONNECT_DELAY = 2000;
+    // Tokens to resubscribe after a reconnect, and last sequence seen per token
+    const subscribedTokens = new Set<number>();
+    const lastSeq = new Map<number, number>();
+
+    function applyTicks(ticks: Tick[]) {
+        update(state => {
+            const newTicks = new Map(state.ticks);
+            for (const tick of ticks) {
+                const seen = lastSeq.get(tick.instrument_token);
+                if (tick.seq != null) {
+                    if (seen != null && tick.seq <= seen) continue;
+                    lastSeq.set(tick.instrument_token, tick.seq);
+                }
+                newTicks.set(tick.instrument_token, tick);
+            }
+            return {
+                ...state,
+                ticks: newTicks,
+                lastUpdate: Date.now()
+            };
+        });
+    }
 
     function connect() {
         if (ws?.readyState === WebSocket.OPEN) {
@@ -53,24 +80,25 @@ function createTickerStore() {
                 console.log('[Ticker] WebSocket connected');
                 reconnectAttempts = 0;
                 update(state => ({ ...state, connected: true }));
+                if (subscribedTokens.size > 0) {
+                    ws?.send(JSON.stringify({
+                        action: 'subscribe',
+                        tokens: Array.from(subscribedTokens),
+                        since_seq: Object.fromEntries(lastSeq)
+                    }));
+                }
             };
 
             ws.onmessage = (event) => {
                 try {
                     const message = JSON.parse(event.data);
 
-                    if (message.type === 'ticks') {
-                        update(state => {
-                            const newTicks = new Map(state.ticks);
-                            for (const tick of message.data) {
-                                newTicks.set(tick.instrument_token, tick);
-                            }
-                            return {
-                                ...state,
-                                ticks: newTicks,
-                                lastUpdate: Date.now()
-                            };
-                        });
+                    if (message.type === 'ticks' || message.type === 'snapshot') {
+                        if (message.type === 'snapshot') {
+                            // Tokens with a gap restart from the latest tick
+                            for (const token of message.gaps ?? []) lastSeq.delete(token);
+                        }
+                        applyTicks(message.data);
                     } else if (message.type === 'ping') {
                         // Respond to keep-alive
                         ws?.send(JSON.stringify({ action: 'pong' }));
@@ -106,10 +134,13 @@ function createTickerStore() {
             ws.close();
             ws = null;
         }
+        subscribedTokens.clear();
+        lastSeq.clear();
         set(initialState);
     }
 
     function subscribeToTokens(tokens: number[]) {
+        for (const token of tokens) subscribedTokens.add(token);
         if (ws?.readyState === WebSocket.OPEN) {
             ws.send(JSON.stringify({
                 action: 'subscribe',
@@ -120,6 +151,10 @@ function createTickerStore() {
     }
 
     function unsubscribeFromTokens(tokens: number[]) {
+        for (const token of tokens) {
+            subscribedTokens.delete(token);
+            lastSeq.delete(token);
+        }
         if (ws?.readyState === WebSocket.OPEN) {
             ws.send(JSON.stringify({
                 action: 'unsubscribe',